@@ -1,20 +1,297 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import ccxt
-import time
+import random
 import threading
 import os
+import json
+import logging
+import asyncio
+from operator import itemgetter
 
 from config import AVAILABLE_EXCHANGES, AVAILABLE_TIMEFRAMES, AVAILABLE_SYMBOLS, DEFAULT_SETTINGS
-from data_fetcher import fetch_market_data, get_available_symbols
-from technical_analysis import calculate_indicators
-from pattern_recognition import analyze_patterns
-from signal_generator import generate_signals
-from telegram_notifier import setup_telegram_bot, send_signal_notification
+from data_fetcher import fetch_market_data
+from data_fetcher_async import fetch_market_data_async, get_available_symbols_async, close_exchanges
+from technical_analysis import calculate_indicators, warmup_indicators, IndicatorState
+from pattern_recognition import PatternAnalyzer, warmup_patterns
+from signal_generator import generate_signals_row
+from telegram_notifier import setup_telegram_bot, send_signal_notifications_batch
 from backtester import run_backtest
-from utils import load_config, save_config
+from utils import load_config, save_config, BloomFilter
+from database import init_db_schema
+
+# Data fetchers log through the logging module; show their INFO messages on the console
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+# Upper bound on concurrent symbol fetches during a market scan
+MAX_SCAN_WORKERS = 8
+
+# Retry delays (seconds) after a failed loop iteration: doubled per failure up to the cap
+LOOP_BACKOFF_INITIAL = 1.0
+LOOP_BACKOFF_MAX = 300.0
+
+# Consecutive unexpected (non-network) errors tolerated before the loop gives up
+MAX_CONSECUTIVE_FAILURES = 5
+
+# Seconds between Stop checks while the loop waits for its next run
+STOP_POLL_INTERVAL = 1.0
+
+# Number of most recent signals kept in memory for the Signal Monitor tab;
+# every signal is already persisted to the database by generate_signals_row
+RECENT_SIGNALS_LIMIT = 200
+
+# Number of signal cards rendered on the Signal Monitor tab
+SIGNAL_CARDS_SHOWN = 50
+
+# Backtest signal tables longer than this are shown without Styler coloring
+MAX_STYLED_ROWS = 500
+
+# Number of most recent bars drawn on the Market Data chart
+DEFAULT_CHART_BARS = 500
+
+# Maximum number of points drawn on the backtest equity curve
+MAX_EQUITY_POINTS = 2000
+
+# Quote currencies offered for market scanning
+QUOTE_CURRENCIES = ('USDT', 'USD', 'BTC', 'ETH')
+
+# Pattern analyzers per (exchange_id, symbol, timeframe); consecutive scans of
+# a market re-analyze only the bars that changed since the previous scan
+_PATTERN_ANALYZERS = {}
+
+# Incremental indicator states per (exchange_id, symbol, timeframe); each scan
+# only feeds the candles that closed since the previous one
+_INDICATOR_STATES = {}
+
+# Value -> position lookup for selectbox defaults, built once per option list
+@st.cache_data(show_spinner=False)
+def _index_map(items):
+    return {value: i for i, value in enumerate(items)}
+
+# Hashable identity of a signal used for de-duplication
+def signal_key(signal):
+    return (signal.get('symbol'), signal.get('timestamp'), signal.get('strategy'), signal.get('signal_type'))
+
+# HTML card for one signal on the Signal Monitor tab (no blank lines, so cards
+# can be concatenated inside one markdown HTML block)
+def _signal_card(signal):
+    signal_type = signal.get("signal_type", "")
+    card_class = "signal-long" if signal_type == "LONG" else "signal-short"
+    signal_icon = "📈" if signal_type == "LONG" else "📉"
+    signal_type_fa = "خرید" if signal_type == "LONG" else "فروش"
+    
+    return f"""
+    <div class="signal-box {card_class}">
+        <h4 style="margin: 0; display: flex; justify-content: space-between;">
+            <span>{signal_icon} {signal.get("symbol", "")}</span>
+            <span style="font-size: 0.8rem;">{signal.get("timestamp", "")}</span>
+        </h4>
+        <p style="margin: 5px 0;">نوع: <b>{signal_type_fa}</b> | استراتژی: <b>{signal.get("strategy", "")}</b></p>
+        <div style="display: flex; justify-content: space-between; margin-top: 10px;">
+            <span>ورود: <b>{signal.get("entry_price", "")}</b></span>
+            <span>هدف ۱: <b>{signal.get("target1", "")}</b></span>
+            <span>هدف ۲: <b>{signal.get("target2", "")}</b></span>
+        </div>
+        <div style="display: flex; justify-content: space-between; margin-top: 5px;">
+            <span>حد ضرر: <b>{signal.get("stop_loss", "")}</b></span>
+            <span>اهرم: <b>{signal.get("leverage", "")}X</b></span>
+            <span>ریسک/ریوارد: <b>1:{signal.get("risk_reward_ratio2", "")}</b></span>
+        </div>
+    </div>
+    """.strip()
+
+_DS = DEFAULT_SETTINGS
+
+# Current config value, falling back to DEFAULT_SETTINGS (or `default` for keys it lacks)
+def _cfg(key, default=None):
+    return st.session_state.config.get(key, _DS.get(key, default))
+
+# Evenly spaced subset of a series for plotting, always keeping the first and last point
+def _downsample(y, max_pts=MAX_EQUITY_POINTS):
+    n = len(y)
+    if n <= max_pts:
+        return np.arange(n), y
+    idx = np.linspace(0, n - 1, max_pts).astype(np.int64)
+    return idx, y[idx]
+
+# Config keys that change what the Market Data chart looks like
+_CHART_CFG_PREFIXES = ('use_', 'macd_', 'rsi_', 'atr_', 'chart_')
+
+def _chart_cfg_json(config):
+    # Stable, hashable cache key for the chart-relevant part of the config
+    return json.dumps({k: v for k, v in config.items() if k.startswith(_CHART_CFG_PREFIXES)}, sort_keys=True)
+
+# Build the Market Data figure; reused across reruns until a new bar arrives or
+# the chart settings change. _df is not hashed - last_bar_ts stands in for it.
+@st.cache_data(ttl=60, show_spinner=False)
+def _build_market_fig(symbol, exchange, timeframe, last_bar_ts, cfg_json, _df):
+    cfg = json.loads(cfg_json)
+    use_macd = cfg.get('use_macd', _DS['use_macd'])
+    use_rsi = cfg.get('use_rsi', _DS['use_rsi'])
+    use_atr = cfg.get('use_atr', _DS['use_atr'])
+    
+    # Only chart the most recent bars; indicators were computed on the full history
+    chart_bars = int(cfg.get('chart_bars', DEFAULT_CHART_BARS))
+    df_plot = _df.iloc[-chart_bars:]
+    
+    # Create plot
+    fig = go.Figure()
+    
+    # Add candlestick chart
+    fig.add_trace(go.Candlestick(
+        x=df_plot.index,
+        open=df_plot['open'],
+        high=df_plot['high'],
+        low=df_plot['low'],
+        close=df_plot['close'],
+        name="قیمت",
+        increasing_line_color='#00C853',
+        decreasing_line_color='#F44336'
+    ))
+    
+    # Display MACD if enabled
+    if use_macd and 'macd' in df_plot.columns:
+        fig.add_trace(go.Scatter(
+            x=df_plot.index,
+            y=df_plot['macd'],
+            mode='lines',
+            line=dict(color='#2196F3', width=1.5),
+            name='MACD',
+            yaxis="y2"
+        ))
+        
+        fig.add_trace(go.Scatter(
+            x=df_plot.index,
+            y=df_plot['macd_signal'],
+            mode='lines',
+            line=dict(color='#FF5722', width=1.5),
+            name='سیگنال MACD',
+            yaxis="y2"
+        ))
+        
+        fig.add_trace(go.Bar(
+            x=df_plot.index,
+            y=df_plot['macd_hist'],
+            name='هیستوگرام MACD',
+            marker_color=np.where(df_plot['macd_hist'].to_numpy() > 0, '#00C853', '#F44336'),
+            yaxis="y2"
+        ))
+    
+    # Display RSI if enabled
+    if use_rsi and 'rsi' in df_plot.columns:
+        fig.add_trace(go.Scatter(
+            x=df_plot.index,
+            y=df_plot['rsi'],
+            mode='lines',
+            line=dict(color='#9C27B0', width=1.5),
+            name='RSI',
+            yaxis="y3"
+        ))
+        
+        # Add overbought and oversold lines as shapes rather than two-point traces
+        rsi_overbought = cfg.get('rsi_overbought', _DS['rsi_overbought'])
+        rsi_oversold = cfg.get('rsi_oversold', _DS['rsi_oversold'])
+        
+        fig.add_hline(
+            y=rsi_overbought,
+            yref="y3",
+            line_dash='dash',
+            line_color='#F44336',
+            annotation_text='اشباع خرید'
+        )
+        
+        fig.add_hline(
+            y=rsi_oversold,
+            yref="y3",
+            line_dash='dash',
+            line_color='#00C853',
+            annotation_text='اشباع فروش'
+        )
+    
+    # Display ATR if enabled
+    if use_atr and 'atr' in df_plot.columns:
+        fig.add_trace(go.Scatter(
+            x=df_plot.index,
+            y=df_plot['atr'],
+            mode='lines',
+            line=dict(color='#FF9800', width=1.5),
+            name='ATR',
+            yaxis="y4"
+        ))
+    
+    # Update layout for additional y-axes and dark mode
+    fig.update_layout(
+        title={
+            'text': f"{symbol} - {timeframe}",
+            'y': 0.95,
+            'x': 0.5,
+            'xanchor': 'center',
+            'yanchor': 'top',
+            'font': {'size': 24, 'color': '#FFFFFF'}
+        },
+        yaxis=dict(
+            title="قیمت",
+            domain=[0.6, 1],
+            gridcolor="#132F4C",
+            titlefont=dict(color="#FFFFFF"),
+            tickfont=dict(color="#FFFFFF")
+        ),
+        yaxis2=dict(
+            title="MACD",
+            domain=[0.4, 0.6],
+            anchor="x",
+            overlaying="y",
+            side="right",
+            gridcolor="#132F4C",
+            titlefont=dict(color="#FFFFFF"),
+            tickfont=dict(color="#FFFFFF")
+        ) if use_macd else None,
+        yaxis3=dict(
+            title="RSI",
+            domain=[0.2, 0.4],
+            anchor="x",
+            overlaying="y",
+            side="right",
+            gridcolor="#132F4C",
+            titlefont=dict(color="#FFFFFF"),
+            tickfont=dict(color="#FFFFFF")
+        ) if use_rsi else None,
+        yaxis4=dict(
+            title="ATR",
+            domain=[0, 0.2],
+            anchor="x",
+            overlaying="y",
+            side="right",
+            gridcolor="#132F4C",
+            titlefont=dict(color="#FFFFFF"),
+            tickfont=dict(color="#FFFFFF")
+        ) if use_atr else None,
+        xaxis=dict(
+            # The rangeslider would render the whole series a second time
+            rangeslider=dict(visible=False),
+            type="date",
+            gridcolor="#132F4C",
+            titlefont=dict(color="#FFFFFF"),
+            tickfont=dict(color="#FFFFFF")
+        ),
+        height=700,
+        hovermode='x unified',
+        dragmode='zoom',
+        showlegend=True,
+        legend=dict(
+            orientation="h",
+            y=1.1,
+            font=dict(color="#FFFFFF")
+        ),
+        plot_bgcolor="#0A1929",
+        paper_bgcolor="#0A1929",
+        margin=dict(l=10, r=10, t=80, b=10)
+    )
+    
+    return fig
 
 # Page configuration
 st.set_page_config(
@@ -23,9 +300,18 @@ st.set_page_config(
     layout="wide"
 )
 
+# Create the database tables once per process (a no-op on later reruns)
+try:
+    init_db_schema()
+except Exception as e:
+    print(f"Error initializing database schema: {str(e)}")
+
 # Initialize session state
 if 'running' not in st.session_state:
     st.session_state.running = False
+if 'loop_thread' not in st.session_state:
+    # Thread of the last started signal loop; a new one starts only after it exits
+    st.session_state.loop_thread = None
 if 'config' not in st.session_state:
     st.session_state.config = load_config()
 if 'signals' not in st.session_state:
@@ -34,6 +320,15 @@ if 'last_run' not in st.session_state:
     st.session_state.last_run = None
 if 'bot_initialized' not in st.session_state:
     st.session_state.bot_initialized = False
+if 'signal_count' not in st.session_state:
+    # Total signals recorded this session (the list above only keeps the most recent ones)
+    st.session_state.signal_count = len(st.session_state.signals)
+if 'signal_keys' not in st.session_state:
+    # Hashable keys of known signals for O(1) duplicate checks
+    st.session_state.signal_keys = {signal_key(s) for s in st.session_state.signals}
+if 'signal_filter' not in st.session_state:
+    # Bloom filter in front of signal_keys: most lookups are rejected without hashing into the set
+    st.session_state.signal_filter = BloomFilter(items=st.session_state.signal_keys)
 
 # Initialize Telegram bot
 def init_telegram_bot():
@@ -52,98 +347,209 @@ def init_telegram_bot():
         st.warning("Telegram token and chat ID are required to enable notifications.")
         st.session_state.bot_initialized = False
 
-# Signal generation loop for a single symbol
+# Signal generation loop: runs the async scheduler on this (background) thread
 def signal_generation_loop():
-    # Add a check to ensure session_state has required fields
-    while True:
-        try:
-            # Need to access session_state in a thread-safe manner
-            if not hasattr(st.session_state, 'running') or not st.session_state.running:
-                # If not running or the attribute doesn't exist, exit the loop
-                print("Signal generation loop stopped or not properly initialized")
-                break
-            
-            # Get current configuration
-            if not hasattr(st.session_state, 'config'):
-                print("Config not found in session_state")
-                time.sleep(10)  # Wait and retry
-                continue
+    # Compile the indicator and pattern kernels before the first scan rather than inside it
+    warmup_indicators()
+    warmup_patterns()
+    asyncio.run(signal_generation_loop_async())
+
+# Sleep up to `seconds`, returning early once the loop has been stopped
+async def wait_while_running(state, seconds):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + seconds
+    while state.get('running', False):
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        await asyncio.sleep(min(STOP_POLL_INTERVAL, remaining))
+
+async def signal_generation_loop_async():
+    backoff = LOOP_BACKOFF_INITIAL
+    failures = 0
+    
+    try:
+        while True:
+            try:
+                # Snapshot the session state once per iteration; the scan below
+                # only works with these locals
+                state = st.session_state
+                if not state.get('running', False):
+                    # If not running or the attribute doesn't exist, exit the loop
+                    print("Signal generation loop stopped or not properly initialized")
+                    break
                 
-            config = st.session_state.config
-            
-            # Check if we should scan the whole market or just a specific symbol
-            scan_whole_market = config.get('scan_whole_market', False)
-            
-            if scan_whole_market:
-                # Scan the whole market
-                market_scan_loop()
-            else:
-                # Fetch market data for a single symbol
-                symbol = config.get('symbol', DEFAULT_SETTINGS['symbol'])
-                exchange_id = config.get('exchange', DEFAULT_SETTINGS['exchange'])
-                timeframe = config.get('timeframe', DEFAULT_SETTINGS['timeframe'])
+                # Get current configuration
+                config = state.get('config')
+                if config is None:
+                    print("Config not found in session_state")
+                    await asyncio.sleep(10)  # Wait and retry
+                    continue
+                    
+                bot_initialized = state.get('bot_initialized', False)
+                signals_list = state.setdefault('signals', [])
+                if 'signal_keys' not in state:
+                    state['signal_keys'] = {signal_key(s) for s in signals_list}
+                signal_keys = state['signal_keys']
+                if 'signal_filter' not in state:
+                    state['signal_filter'] = BloomFilter(items=signal_keys)
+                signal_filter = state['signal_filter']
                 
-                # Process this single symbol
-                process_symbol(symbol, exchange_id, timeframe, config)
-            
-            # Wait for the next run
-            interval_minutes = config.get('check_interval', DEFAULT_SETTINGS['check_interval'])
-            time.sleep(interval_minutes * 60)
-            
-        except Exception as e:
-            print(f"Error in signal generation loop: {str(e)}")
-            time.sleep(60)  # Wait before retrying
+                # Bound concurrent symbol fetches to stay within exchange rate limits
+                scan_workers = max(1, min(int(config.get('scan_workers', MAX_SCAN_WORKERS)), MAX_SCAN_WORKERS))
+                semaphore = asyncio.Semaphore(scan_workers)
+                
+                # Check if we should scan the whole market or just a specific symbol
+                scan_whole_market = config.get('scan_whole_market', False)
+                
+                if scan_whole_market:
+                    # Scan the whole market
+                    last_run, recorded = await market_scan_loop(config, semaphore, signals_list, signal_keys, signal_filter, bot_initialized)
+                else:
+                    # Fetch market data for a single symbol
+                    symbol = config.get('symbol', DEFAULT_SETTINGS['symbol'])
+                    exchange_id = config.get('exchange', DEFAULT_SETTINGS['exchange'])
+                    timeframe = config.get('timeframe', DEFAULT_SETTINGS['timeframe'])
+                    
+                    # Process this single symbol
+                    new_signals, last_run = await process_symbol(symbol, exchange_id, timeframe, config, semaphore)
+                    recorded = await handle_new_signals(new_signals, signals_list, signal_keys, signal_filter, bot_initialized)
+                
+                # Running total; signals_list itself only keeps the latest ones
+                state['signal_count'] = state.get('signal_count', 0) + recorded
+                
+                # Update last run time
+                if last_run:
+                    state['last_run'] = last_run
+                
+                # Successful iteration: reset the retry state
+                backoff = LOOP_BACKOFF_INITIAL
+                failures = 0
+                
+                # Wait for the next run; Stop ends the wait so the thread exits promptly
+                interval_minutes = config.get('check_interval', DEFAULT_SETTINGS['check_interval'])
+                await wait_while_running(state, interval_minutes * 60)
+                
+            except ccxt.NetworkError as e:
+                # Exchange outages and rate limits (RateLimitExceeded is a NetworkError): keep retrying
+                backoff = min(backoff * 2, LOOP_BACKOFF_MAX)
+                print(f"Network error in signal generation loop, retrying in {backoff:.0f}s: {str(e)}")
+                await asyncio.sleep(backoff + random.uniform(0, backoff * 0.1))
+                
+            except Exception as e:
+                failures += 1
+                if failures >= MAX_CONSECUTIVE_FAILURES:
+                    # Likely a bug rather than a transient problem; stop and surface it
+                    print(f"Signal generation loop failed {failures} times in a row, stopping")
+                    st.session_state.running = False
+                    raise
+                
+                backoff = min(backoff * 2, LOOP_BACKOFF_MAX)
+                print(f"Error in signal generation loop, retrying in {backoff:.0f}s: {str(e)}")
+                await asyncio.sleep(backoff + random.uniform(0, backoff * 0.1))  # Jitter avoids retrying in lockstep
+    
+    finally:
+        # Async exchange sessions belong to this event loop
+        await close_exchanges()
+
+# Run the analysis pipeline on already-fetched data for one symbol
+def analyze_symbol(df, symbol, config, analyzer, indicators):
+    # Calculate technical indicators for the latest candle
+    latest = indicators.advance(df)
+    
+    # Analyze patterns
+    df = analyzer.analyze(df, config)
+    
+    # Generate signals from the latest candle's patterns and indicators
+    row = df.iloc[-1].to_dict()
+    row.update(latest)
+    new_signals = generate_signals_row(row, config)
+    
+    # Make sure the symbol is set in each signal
+    for signal in new_signals:
+        signal['symbol'] = symbol
+    
+    return new_signals
 
 # Function to process a single symbol
-def process_symbol(symbol, exchange_id, timeframe, config):
+async def process_symbol(symbol, exchange_id, timeframe, config, semaphore):
+    """
+    Fetch data, run the analysis pipeline and generate signals for one symbol.
+    Does not touch st.session_state so many symbols can be processed concurrently.
+    
+    Returns:
+        tuple: (list of new signals, datetime of the run or None on failure)
+    """
     try:
-        # Fetch the data
-        df = fetch_market_data(exchange_id, symbol, timeframe)
+        # Fetch the data; the semaphore keeps us within the exchange rate limits
+        async with semaphore:
+            df = await fetch_market_data_async(exchange_id, symbol, timeframe)
         
         if df is not None and not df.empty:
-            # Calculate technical indicators
-            df = calculate_indicators(df, config)
-            
-            # Analyze patterns
-            df = analyze_patterns(df, config)
-            
-            # Generate signals
-            new_signals = generate_signals(df, config)
-            
-            # Send notifications for new signals
-            if new_signals and hasattr(st.session_state, 'bot_initialized') and st.session_state.bot_initialized:
-                if not hasattr(st.session_state, 'signals'):
-                    st.session_state.signals = []
-                    
-                for signal in new_signals:
-                    # Make sure the symbol is set in the signal
-                    signal['symbol'] = symbol
-                    
-                    # Check if the signal is new (not in the current signals list)
-                    if signal not in st.session_state.signals:
-                        send_signal_notification(signal)
-                        st.session_state.signals.append(signal)
-            
-            # Update last run time
-            if hasattr(st.session_state, 'last_run'):
-                st.session_state.last_run = datetime.now()
-                
-            return new_signals
+            # CPU-bound analysis runs off the event loop so other fetches keep flowing
+            market = (exchange_id, symbol, timeframe)
+            analyzer = _PATTERN_ANALYZERS.setdefault(market, PatternAnalyzer())
+            indicators = _INDICATOR_STATES.get(market)
+            if indicators is None or indicators.settings != IndicatorState.settings_key(config):
+                indicators = _INDICATOR_STATES[market] = IndicatorState(config)
+            new_signals = await asyncio.to_thread(analyze_symbol, df, symbol, config, analyzer, indicators)
+            return new_signals, datetime.now()
     except Exception as e:
         print(f"Error processing symbol {symbol}: {str(e)}")
     
-    return []
+    return [], None
+
+# Record new signals and send notifications
+async def handle_new_signals(new_signals, signals_list, signal_keys, signal_filter, bot_initialized):
+    """
+    Append unseen signals to signals_list and notify Telegram about them
+    
+    Args:
+        new_signals (list): Signals produced by process_symbol
+        signals_list (list): Most recent signals, updated in place and capped at RECENT_SIGNALS_LIMIT
+        signal_keys (set): Keys of every recorded signal, updated in place
+        signal_filter (BloomFilter): Bloom filter over signal_keys, updated in place
+        bot_initialized (bool): Whether the Telegram bot is set up
+    
+    Returns:
+        int: Number of new signals recorded
+    """
+    # Send notifications for new signals
+    if new_signals and bot_initialized:
+        new_batch = []
+        for signal in new_signals:
+            # Check if the signal is new (not already recorded)
+            key = signal_key(signal)
+            # A Bloom filter miss means the key is definitely new; only hits need the exact set
+            if key not in signal_filter or key not in signal_keys:
+                signal_filter.add(key)
+                signal_keys.add(key)
+                signals_list.append(signal)
+                new_batch.append(signal)
+        
+        # Keep only the most recent signals in memory
+        if len(signals_list) > RECENT_SIGNALS_LIMIT:
+            del signals_list[:-RECENT_SIGNALS_LIMIT]
+        
+        # One Telegram request for all new signals instead of one per signal; the
+        # HTTP call and the database updates run off the event loop so scans keep going
+        await asyncio.to_thread(send_signal_notifications_batch, new_batch)
+        return len(new_batch)
+    
+    return 0
 
 # Market scanning loop
-def market_scan_loop():
+async def market_scan_loop(config, semaphore, signals_list, signal_keys, signal_filter, bot_initialized):
+    """
+    Scan every symbol matching the configured filters
+    
+    Returns:
+        tuple: (datetime of the most recent successful symbol run or None, number of new signals recorded)
+    """
+    latest_run = None
+    recorded = 0
+    
     try:
-        # Get current configuration
-        if not hasattr(st.session_state, 'config'):
-            print("Config not found in session_state")
-            return
-            
-        config = st.session_state.config
-        
         # Exchange and timeframe settings
         exchange_id = config.get('exchange', DEFAULT_SETTINGS['exchange'])
         timeframe = config.get('timeframe', DEFAULT_SETTINGS['timeframe'])
@@ -152,20 +558,27 @@ def market_scan_loop():
         
         print(f"Starting market scan on {exchange_id} for {quote_currency} pairs with minimum volume {min_volume}")
         
-        # Get available symbols
-        symbols = get_available_symbols(exchange_id, quote_currency, min_volume)
+        # Get available symbols (cached for an hour; the universe changes slowly)
+        symbols = await get_available_symbols_async(exchange_id, quote_currency, min_volume)
         
         if not symbols:
             print("No symbols found matching criteria")
-            return
+            return None, 0
         
         print(f"Found {len(symbols)} symbols to scan")
         
-        # Process each symbol
+        # Process all symbols concurrently on the event loop; the semaphore
+        # caps in-flight fetches so the exchange rate limiter is not overwhelmed.
+        results = await asyncio.gather(*[
+            process_symbol(symbol, exchange_id, timeframe, config, semaphore)
+            for symbol in symbols
+        ])
+        
         all_signals = []
-        for symbol in symbols:
-            print(f"Processing {symbol}...")
-            signals = process_symbol(symbol, exchange_id, timeframe, config)
+        for symbol, (signals, last_run) in zip(symbols, results):
+            recorded += await handle_new_signals(signals, signals_list, signal_keys, signal_filter, bot_initialized)
+            if last_run:
+                latest_run = last_run
             if signals:
                 all_signals.extend(signals)
                 print(f"Found {len(signals)} signals for {symbol}")
@@ -174,6 +587,8 @@ def market_scan_loop():
         
     except Exception as e:
         print(f"Error in market scan loop: {str(e)}")
+    
+    return latest_run, recorded
 
 # Main application layout
 st.markdown("""
@@ -240,19 +655,19 @@ with st.sidebar:
     exchange = st.selectbox(
         "Exchange", 
         AVAILABLE_EXCHANGES, 
-        index=AVAILABLE_EXCHANGES.index(st.session_state.config.get('exchange', DEFAULT_SETTINGS['exchange']))
+        index=_index_map(AVAILABLE_EXCHANGES).get(_cfg('exchange'), 0)
     )
     
     symbol = st.selectbox(
         "Symbol", 
         AVAILABLE_SYMBOLS, 
-        index=AVAILABLE_SYMBOLS.index(st.session_state.config.get('symbol', DEFAULT_SETTINGS['symbol']))
+        index=_index_map(AVAILABLE_SYMBOLS).get(_cfg('symbol'), 0)
     )
     
     timeframe = st.selectbox(
         "Timeframe", 
         AVAILABLE_TIMEFRAMES, 
-        index=AVAILABLE_TIMEFRAMES.index(st.session_state.config.get('timeframe', DEFAULT_SETTINGS['timeframe']))
+        index=_index_map(AVAILABLE_TIMEFRAMES).get(_cfg('timeframe'), 0)
     )
     
     # Strategy settings
@@ -260,74 +675,76 @@ with st.sidebar:
     
     # MACD settings
     st.write("MACD Settings")
-    use_macd = st.checkbox("Use MACD", value=st.session_state.config.get('use_macd', DEFAULT_SETTINGS['use_macd']))
+    use_macd = st.checkbox("Use MACD", value=_cfg('use_macd'))
     macd_fast = st.number_input("MACD Fast Period", min_value=1, max_value=50, 
-                               value=st.session_state.config.get('macd_fast', DEFAULT_SETTINGS['macd_fast']))
+                               value=_cfg('macd_fast'))
     macd_slow = st.number_input("MACD Slow Period", min_value=1, max_value=100, 
-                               value=st.session_state.config.get('macd_slow', DEFAULT_SETTINGS['macd_slow']))
+                               value=_cfg('macd_slow'))
     macd_signal = st.number_input("MACD Signal Period", min_value=1, max_value=50, 
-                                 value=st.session_state.config.get('macd_signal', DEFAULT_SETTINGS['macd_signal']))
+                                 value=_cfg('macd_signal'))
     
     # RSI settings
     st.write("RSI Settings")
-    use_rsi = st.checkbox("Use RSI", value=st.session_state.config.get('use_rsi', DEFAULT_SETTINGS['use_rsi']))
+    use_rsi = st.checkbox("Use RSI", value=_cfg('use_rsi'))
     rsi_period = st.number_input("RSI Period", min_value=1, max_value=50, 
-                                value=st.session_state.config.get('rsi_period', DEFAULT_SETTINGS['rsi_period']))
+                                value=_cfg('rsi_period'))
     rsi_overbought = st.number_input("RSI Overbought Level", min_value=50, max_value=100, 
-                                    value=st.session_state.config.get('rsi_overbought', DEFAULT_SETTINGS['rsi_overbought']))
+                                    value=_cfg('rsi_overbought'))
     rsi_oversold = st.number_input("RSI Oversold Level", min_value=0, max_value=50, 
-                                  value=st.session_state.config.get('rsi_oversold', DEFAULT_SETTINGS['rsi_oversold']))
+                                  value=_cfg('rsi_oversold'))
     
     # ATR settings
     st.write("ATR Settings")
-    use_atr = st.checkbox("Use ATR", value=st.session_state.config.get('use_atr', DEFAULT_SETTINGS['use_atr']))
+    use_atr = st.checkbox("Use ATR", value=_cfg('use_atr'))
     atr_period = st.number_input("ATR Period", min_value=1, max_value=50, 
-                                value=st.session_state.config.get('atr_period', DEFAULT_SETTINGS['atr_period']))
+                                value=_cfg('atr_period'))
     atr_multiplier = st.number_input("ATR Multiplier (for stop loss)", min_value=0.1, max_value=10.0, step=0.1, 
-                                    value=st.session_state.config.get('atr_multiplier', DEFAULT_SETTINGS['atr_multiplier']))
+                                    value=_cfg('atr_multiplier'))
     
     # Pattern recognition settings
     st.subheader("Pattern Recognition")
     use_candlestick_patterns = st.checkbox("Use Candlestick Patterns", 
-                                          value=st.session_state.config.get('use_candlestick_patterns', 
-                                                                          DEFAULT_SETTINGS['use_candlestick_patterns']))
+                                          value=_cfg('use_candlestick_patterns'))
     use_harmonic_patterns = st.checkbox("Use Harmonic Patterns", 
-                                       value=st.session_state.config.get('use_harmonic_patterns', 
-                                                                       DEFAULT_SETTINGS['use_harmonic_patterns']))
+                                       value=_cfg('use_harmonic_patterns'))
     use_price_action = st.checkbox("Use Price Action", 
-                                  value=st.session_state.config.get('use_price_action', 
-                                                                  DEFAULT_SETTINGS['use_price_action']))
+                                  value=_cfg('use_price_action'))
     
     # Notification settings
     st.subheader("Notification Settings")
     telegram_token = st.text_input("Telegram Bot Token", 
-                                  value=st.session_state.config.get('telegram_token', ''), 
+                                  value=_cfg('telegram_token', ''), 
                                   type="password")
     telegram_chat_id = st.text_input("Telegram Chat ID", 
-                                    value=st.session_state.config.get('telegram_chat_id', ''))
+                                    value=_cfg('telegram_chat_id', ''))
     
     # Signal check interval
     check_interval = st.number_input("Check Interval (minutes)", 
                                     min_value=1, max_value=1440, 
-                                    value=st.session_state.config.get('check_interval', DEFAULT_SETTINGS['check_interval']))
+                                    value=_cfg('check_interval'))
+    
+    # Chart settings
+    chart_bars = st.number_input("Chart Bars", 
+                                min_value=50, max_value=5000, step=50, 
+                                value=_cfg('chart_bars', DEFAULT_CHART_BARS))
     
     # Market scanning settings
     st.subheader("بررسی بازار")
     scan_whole_market = st.checkbox("اسکن خودکار کل بازار", 
-                                   value=st.session_state.config.get('scan_whole_market', False),
+                                   value=_cfg('scan_whole_market', False),
                                    help="فعال کردن این گزینه باعث می‌شود سیستم به طور خودکار همه ارزها را اسکن کند")
     
     quote_currency = st.selectbox(
         "ارز پایه", 
-        ['USDT', 'USD', 'BTC', 'ETH'],
-        index=['USDT', 'USD', 'BTC', 'ETH'].index(st.session_state.config.get('quote_currency', 'USDT'))
+        QUOTE_CURRENCIES,
+        index=_index_map(QUOTE_CURRENCIES).get(_cfg('quote_currency', 'USDT'), 0)
     )
     
     min_volume = st.number_input(
         "حداقل حجم معاملات 24 ساعته (به دلار)", 
         min_value=10000, 
         max_value=100000000, 
-        value=st.session_state.config.get('min_volume', 1000000),
+        value=_cfg('min_volume', 1000000),
         step=100000
     )
 
@@ -355,6 +772,7 @@ with st.sidebar:
             'telegram_token': telegram_token,
             'telegram_chat_id': telegram_chat_id,
             'check_interval': check_interval,
+            'chart_bars': chart_bars,
             'scan_whole_market': scan_whole_market,
             'quote_currency': quote_currency,
             'min_volume': min_volume
@@ -384,19 +802,25 @@ with tab1:
     with col1:
         if not st.session_state.running:
             if st.button("🚀 شروع سیگنال‌گیری", use_container_width=True):
-                # Initialize the Telegram bot if not already done
-                if not st.session_state.bot_initialized:
-                    init_telegram_bot()
-                
-                if st.session_state.bot_initialized or not (telegram_token and telegram_chat_id):
-                    st.session_state.running = True
-                    # Start the signal generation loop in a separate thread
-                    thread = threading.Thread(target=signal_generation_loop, daemon=True)
-                    thread.start()
-                    st.success("سیگنال‌گیری با موفقیت شروع شد!")
-                    st.rerun()
+                previous = st.session_state.loop_thread
+                if previous is not None and previous.is_alive():
+                    # The stopped loop is still closing its exchange clients; never run two at once
+                    st.warning("سیگنال‌گیری قبلی هنوز در حال توقف است. لطفاً چند لحظه دیگر دوباره تلاش کنید.")
                 else:
-                    st.error("خطا در اتصال به تلگرام. لطفاً تنظیمات را بررسی کنید.")
+                    # Initialize the Telegram bot if not already done
+                    if not st.session_state.bot_initialized:
+                        init_telegram_bot()
+                    
+                    if st.session_state.bot_initialized or not (telegram_token and telegram_chat_id):
+                        st.session_state.running = True
+                        # Start the signal generation loop in a separate thread
+                        thread = threading.Thread(target=signal_generation_loop, daemon=True)
+                        st.session_state.loop_thread = thread
+                        thread.start()
+                        st.success("سیگنال‌گیری با موفقیت شروع شد!")
+                        st.rerun()
+                    else:
+                        st.error("خطا در اتصال به تلگرام. لطفاً تنظیمات را بررسی کنید.")
         else:
             if st.button("⏹ توقف سیگنال‌گیری", use_container_width=True):
                 st.session_state.running = False
@@ -412,9 +836,9 @@ with tab1:
         st.markdown(f'<p>وضعیت: <span class="indicator {status_class}">{status_text}</span></p>', unsafe_allow_html=True)
     
     with col3:
-        symbol_count = "همه ارزها" if st.session_state.config.get('scan_whole_market', False) else st.session_state.config.get('symbol', DEFAULT_SETTINGS['symbol'])
+        symbol_count = "همه ارزها" if _cfg('scan_whole_market', False) else _cfg('symbol')
         st.markdown(f"<p>ارزهای تحت نظر: <b>{symbol_count}</b></p>", unsafe_allow_html=True)
-        signal_count = len(st.session_state.signals) if hasattr(st.session_state, 'signals') else 0
+        signal_count = st.session_state.signal_count
         st.markdown(f"<p>تعداد سیگنال‌ها: <b>{signal_count}</b></p>", unsafe_allow_html=True)
     
     st.markdown('</div>', unsafe_allow_html=True)
@@ -431,42 +855,23 @@ with tab1:
         </div>
         """, unsafe_allow_html=True)
     else:
-        # Custom display for signals with cards
-        cols = st.columns(2)
-        for i, signal in enumerate(st.session_state.signals):
-            signal_type = signal.get("signal_type", "")
-            card_class = "signal-long" if signal_type == "LONG" else "signal-short"
-            signal_icon = "📈" if signal_type == "LONG" else "📉"
-            signal_type_fa = "خرید" if signal_type == "LONG" else "فروش"
-            
-            col_idx = i % 2
-            with cols[col_idx]:
-                signal_html = f"""
-                <div class="signal-box {card_class}">
-                    <h4 style="margin: 0; display: flex; justify-content: space-between;">
-                        <span>{signal_icon} {signal.get("symbol", "")}</span>
-                        <span style="font-size: 0.8rem;">{signal.get("timestamp", "")}</span>
-                    </h4>
-                    <p style="margin: 5px 0;">نوع: <b>{signal_type_fa}</b> | استراتژی: <b>{signal.get("strategy", "")}</b></p>
-                    <div style="display: flex; justify-content: space-between; margin-top: 10px;">
-                        <span>ورود: <b>{signal.get("entry_price", "")}</b></span>
-                        <span>هدف ۱: <b>{signal.get("target1", "")}</b></span>
-                        <span>هدف ۲: <b>{signal.get("target2", "")}</b></span>
-                    </div>
-                    <div style="display: flex; justify-content: space-between; margin-top: 5px;">
-                        <span>حد ضرر: <b>{signal.get("stop_loss", "")}</b></span>
-                        <span>اهرم: <b>{signal.get("leverage", "")}X</b></span>
-                        <span>ریسک/ریوارد: <b>1:{signal.get("risk_reward_ratio2", "")}</b></span>
-                    </div>
-                </div>
-                """
-                st.markdown(signal_html, unsafe_allow_html=True)
+        # Render the most recent signal cards as one 2-column grid in a single markdown call
+        recent_signals = st.session_state.signals[-SIGNAL_CARDS_SHOWN:]
+        signals_html = (
+            '<div style="display: grid; grid-template-columns: 1fr 1fr; gap: 0.5rem;">'
+            + ''.join(_signal_card(signal) for signal in recent_signals)
+            + '</div>'
+        )
+        st.markdown(signals_html, unsafe_allow_html=True)
         
         col1, col2 = st.columns([1, 3])
         with col1:
             # Clear signals button
             if st.button("🧹 پاک کردن سیگنال‌ها", use_container_width=True):
                 st.session_state.signals = []
+                st.session_state.signal_count = 0
+                st.session_state.signal_keys = set()
+                st.session_state.signal_filter = BloomFilter()
                 st.rerun()
 
 with tab2:
@@ -477,13 +882,13 @@ with tab2:
     col1, col2, col3 = st.columns([1, 1, 1])
     
     with col1:
-        current_symbol = st.session_state.config.get('symbol', DEFAULT_SETTINGS['symbol'])
-        current_exchange = st.session_state.config.get('exchange', DEFAULT_SETTINGS['exchange'])
+        current_symbol = _cfg('symbol')
+        current_exchange = _cfg('exchange')
         st.markdown(f"<p>نماد: <b>{current_symbol}</b></p>", unsafe_allow_html=True)
         st.markdown(f"<p>صرافی: <b>{current_exchange}</b></p>", unsafe_allow_html=True)
     
     with col2:
-        current_timeframe = st.session_state.config.get('timeframe', DEFAULT_SETTINGS['timeframe'])
+        current_timeframe = _cfg('timeframe')
         st.markdown(f"<p>تایم‌فریم: <b>{current_timeframe}</b></p>", unsafe_allow_html=True)
         # Add refresh button
         if st.button("🔄 بارگذاری مجدد داده‌ها", use_container_width=True):
@@ -491,7 +896,7 @@ with tab2:
     
     with col3:
         # Add manual data check for other symbols
-        if not st.session_state.config.get('scan_whole_market', False):
+        if not _cfg('scan_whole_market', False):
             if st.button("📊 بررسی ارز دیگر", use_container_width=True):
                 st.session_state.check_other_symbol = True
     
@@ -499,9 +904,9 @@ with tab2:
     
     # Fetch and display current market data
     try:
-        current_symbol = st.session_state.config.get('symbol', DEFAULT_SETTINGS['symbol'])
-        current_exchange = st.session_state.config.get('exchange', DEFAULT_SETTINGS['exchange'])
-        current_timeframe = st.session_state.config.get('timeframe', DEFAULT_SETTINGS['timeframe'])
+        current_symbol = _cfg('symbol')
+        current_exchange = _cfg('exchange')
+        current_timeframe = _cfg('timeframe')
         
         with st.spinner("در حال دریافت داده‌های بازار..."):
             df = fetch_market_data(current_exchange, current_symbol, current_timeframe)
@@ -536,157 +941,14 @@ with tab2:
             </div>
             """, unsafe_allow_html=True)
             
-            # Create plot
-            fig = go.Figure()
-            
-            # Add candlestick chart
-            fig.add_trace(go.Candlestick(
-                x=df.index,
-                open=df['open'],
-                high=df['high'],
-                low=df['low'],
-                close=df['close'],
-                name="قیمت",
-                increasing_line_color='#00C853',
-                decreasing_line_color='#F44336'
-            ))
-            
-            # Display MACD if enabled
-            if st.session_state.config.get('use_macd', DEFAULT_SETTINGS['use_macd']) and 'macd' in df.columns:
-                fig.add_trace(go.Scatter(
-                    x=df.index,
-                    y=df['macd'],
-                    mode='lines',
-                    line=dict(color='#2196F3', width=1.5),
-                    name='MACD',
-                    yaxis="y2"
-                ))
-                
-                fig.add_trace(go.Scatter(
-                    x=df.index,
-                    y=df['macd_signal'],
-                    mode='lines',
-                    line=dict(color='#FF5722', width=1.5),
-                    name='سیگنال MACD',
-                    yaxis="y2"
-                ))
-                
-                fig.add_trace(go.Bar(
-                    x=df.index,
-                    y=df['macd_hist'],
-                    name='هیستوگرام MACD',
-                    marker_color=df['macd_hist'].apply(lambda x: '#00C853' if x > 0 else '#F44336'),
-                    yaxis="y2"
-                ))
-            
-            # Display RSI if enabled
-            if st.session_state.config.get('use_rsi', DEFAULT_SETTINGS['use_rsi']) and 'rsi' in df.columns:
-                fig.add_trace(go.Scatter(
-                    x=df.index,
-                    y=df['rsi'],
-                    mode='lines',
-                    line=dict(color='#9C27B0', width=1.5),
-                    name='RSI',
-                    yaxis="y3"
-                ))
-                
-                # Add overbought and oversold lines
-                fig.add_trace(go.Scatter(
-                    x=[df.index[0], df.index[-1]],
-                    y=[st.session_state.config.get('rsi_overbought', DEFAULT_SETTINGS['rsi_overbought']), 
-                       st.session_state.config.get('rsi_overbought', DEFAULT_SETTINGS['rsi_overbought'])],
-                    mode='lines',
-                    line=dict(color='#F44336', dash='dash'),
-                    name='اشباع خرید',
-                    yaxis="y3"
-                ))
-                
-                fig.add_trace(go.Scatter(
-                    x=[df.index[0], df.index[-1]],
-                    y=[st.session_state.config.get('rsi_oversold', DEFAULT_SETTINGS['rsi_oversold']), 
-                       st.session_state.config.get('rsi_oversold', DEFAULT_SETTINGS['rsi_oversold'])],
-                    mode='lines',
-                    line=dict(color='#00C853', dash='dash'),
-                    name='اشباع فروش',
-                    yaxis="y3"
-                ))
-            
-            # Display ATR if enabled
-            if st.session_state.config.get('use_atr', DEFAULT_SETTINGS['use_atr']) and 'atr' in df.columns:
-                fig.add_trace(go.Scatter(
-                    x=df.index,
-                    y=df['atr'],
-                    mode='lines',
-                    line=dict(color='#FF9800', width=1.5),
-                    name='ATR',
-                    yaxis="y4"
-                ))
-            
-            # Update layout for additional y-axes and dark mode
-            fig.update_layout(
-                title={
-                    'text': f"{current_symbol} - {current_timeframe}",
-                    'y': 0.95,
-                    'x': 0.5,
-                    'xanchor': 'center',
-                    'yanchor': 'top',
-                    'font': {'size': 24, 'color': '#FFFFFF'}
-                },
-                yaxis=dict(
-                    title="قیمت",
-                    domain=[0.6, 1],
-                    gridcolor="#132F4C",
-                    titlefont=dict(color="#FFFFFF"),
-                    tickfont=dict(color="#FFFFFF")
-                ),
-                yaxis2=dict(
-                    title="MACD",
-                    domain=[0.4, 0.6],
-                    anchor="x",
-                    overlaying="y",
-                    side="right",
-                    gridcolor="#132F4C",
-                    titlefont=dict(color="#FFFFFF"),
-                    tickfont=dict(color="#FFFFFF")
-                ) if st.session_state.config.get('use_macd', DEFAULT_SETTINGS['use_macd']) else None,
-                yaxis3=dict(
-                    title="RSI",
-                    domain=[0.2, 0.4],
-                    anchor="x",
-                    overlaying="y",
-                    side="right",
-                    gridcolor="#132F4C",
-                    titlefont=dict(color="#FFFFFF"),
-                    tickfont=dict(color="#FFFFFF")
-                ) if st.session_state.config.get('use_rsi', DEFAULT_SETTINGS['use_rsi']) else None,
-                yaxis4=dict(
-                    title="ATR",
-                    domain=[0, 0.2],
-                    anchor="x",
-                    overlaying="y",
-                    side="right",
-                    gridcolor="#132F4C",
-                    titlefont=dict(color="#FFFFFF"),
-                    tickfont=dict(color="#FFFFFF")
-                ) if st.session_state.config.get('use_atr', DEFAULT_SETTINGS['use_atr']) else None,
-                xaxis=dict(
-                    rangeslider=dict(visible=True),
-                    type="date",
-                    gridcolor="#132F4C",
-                    titlefont=dict(color="#FFFFFF"),
-                    tickfont=dict(color="#FFFFFF")
-                ),
-                height=700,
-                dragmode='zoom',
-                showlegend=True,
-                legend=dict(
-                    orientation="h",
-                    y=1.1,
-                    font=dict(color="#FFFFFF")
-                ),
-                plot_bgcolor="#0A1929",
-                paper_bgcolor="#0A1929",
-                margin=dict(l=10, r=10, t=80, b=10)
+            # Chart is cached per (symbol, exchange, timeframe, last bar, chart settings)
+            fig = _build_market_fig(
+                current_symbol,
+                current_exchange,
+                current_timeframe,
+                df.index[-1].value,
+                _chart_cfg_json(st.session_state.config),
+                df
             )
             
             # Display plot
@@ -709,16 +971,16 @@ with tab3:
     col1, col2, col3 = st.columns([1, 1, 1])
     
     with col1:
-        symbol = st.session_state.config.get('symbol', DEFAULT_SETTINGS['symbol'])
+        symbol = _cfg('symbol')
         st.markdown(f"<p>نماد: <b>{symbol}</b></p>", unsafe_allow_html=True)
         
         backtest_days = st.slider("دوره آزمایش (روز)", min_value=7, max_value=365, value=30)
     
     with col2:
-        exchange_id = st.session_state.config.get('exchange', DEFAULT_SETTINGS['exchange'])
+        exchange_id = _cfg('exchange')
         st.markdown(f"<p>صرافی: <b>{exchange_id}</b></p>", unsafe_allow_html=True)
         
-        timeframe = st.session_state.config.get('timeframe', DEFAULT_SETTINGS['timeframe'])
+        timeframe = _cfg('timeframe')
         st.markdown(f"<p>تایم‌فریم: <b>{timeframe}</b></p>", unsafe_allow_html=True)
     
     with col3:
@@ -800,22 +1062,20 @@ with tab3:
         
         # Create equity curve
         if "signals" in backtest_results and backtest_results["signals"]:
-            # Initialize equity curve
-            config = st.session_state.config
-            equity = [100]  # Start with 100 units
-            dates = []
+            # Sort signals by date; run_backtest already returns them in bar order,
+            # so this only sorts if that ever stops being true
+            sorted_signals = backtest_results["signals"]
+            timestamps = [s["timestamp"] for s in sorted_signals]
+            if any(a > b for a, b in zip(timestamps, timestamps[1:])):
+                sorted_signals = sorted(sorted_signals, key=itemgetter("timestamp"))
             
-            # Sort signals by date
-            sorted_signals = sorted(backtest_results["signals"], key=lambda x: x.get("timestamp", ""))
-            
-            for signal in sorted_signals:
-                pnl = signal.get("profit_loss", 0)
-                dates.append(signal.get("timestamp", ""))
-                if pnl:
-                    risk = config.get('risk_percent', 1.0) / 100  # Convert to decimal
-                    equity.append(equity[-1] * (1 + (pnl / 100 * risk)))
-                else:
-                    equity.append(equity[-1])
+            # Equity curve starting at 100 units, compounding each trade's risk-weighted return
+            risk = _cfg('risk_percent') / 100  # Convert to decimal
+            pnl_arr = np.fromiter((s.get("profit_loss") or 0.0 for s in sorted_signals), dtype=np.float64, count=len(sorted_signals))
+            equity = np.empty(pnl_arr.size + 1, dtype=np.float64)
+            equity[0] = 1.0
+            np.cumprod(1 + pnl_arr / 100 * risk, out=equity[1:])
+            equity *= 100
             
             # Create the equity curve plot
             if len(equity) > 1:
@@ -824,9 +1084,10 @@ with tab3:
                 st.markdown('<h3 style="margin-top: 0; border-bottom: 1px solid rgba(250, 250, 250, 0.2); padding-bottom: 10px;">نمودار رشد سرمایه</h3>', unsafe_allow_html=True)
                 
                 fig = go.Figure()
+                x, y = _downsample(equity)
                 fig.add_trace(go.Scatter(
-                    x=list(range(len(equity))),
-                    y=equity,
+                    x=x,
+                    y=y,
                     mode='lines',
                     name='رشد سرمایه',
                     line=dict(color='#00C853' if equity[-1] > equity[0] else '#F44336', width=2)
@@ -890,22 +1151,16 @@ with tab3:
             
             signals_df = pd.DataFrame(signals_display)
             
-            # Color-code the dataframe
-            def color_profit_loss(val):
-                try:
-                    if isinstance(val, str) and "%" in val:
-                        num = float(val.replace("%", ""))
-                        if num > 0:
-                            return 'color: #00C853'
-                        elif num < 0:
-                            return 'color: #F44336'
-                except:
-                    pass
-                return ''
-            
-            styled_df = signals_df.style.applymap(color_profit_loss, subset=['سود/ضرر'])
-            
-            st.dataframe(styled_df, use_container_width=True)
+            if len(signals_df) > MAX_STYLED_ROWS:
+                # Styler renders HTML for every cell; large tables are shown unstyled
+                st.dataframe(signals_df, use_container_width=True)
+            else:
+                # Color-code the profit/loss column from the numeric values in one pass
+                pnl_values = np.array([s.get('profit_loss') or np.nan for s in sorted_signals], dtype=np.float64)
+                pnl_css = np.where(pnl_values > 0, 'color: #00C853', np.where(pnl_values < 0, 'color: #F44336', ''))
+                
+                styled_df = signals_df.style.apply(lambda col: pnl_css, subset=['سود/ضرر'])
+                st.dataframe(styled_df, use_container_width=True)
             st.markdown('</div>', unsafe_allow_html=True)
         else:
             st.info("هیچ سیگنالی در طول دوره آزمایش تولید نشده است.")
@@ -1,10 +1,103 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from data_fetcher import fetch_historical_data
+from data_fetcher import fetch_historical_data_cached
 from technical_analysis import calculate_indicators
 from pattern_recognition import analyze_patterns
-from signal_generator import generate_signals, filter_conflicting_signals
+from signal_generator import generate_signals_batch
+from jit import njit, prange
+
+# Exit reasons indexed by the level code returned from _simulate_exit
+EXIT_REASONS = ('Stop Loss', 'Target 1', 'Target 2', 'End of data')
+
+@njit(cache=True)
+def _simulate_exit(highs, lows, closes, stop_loss, target1, target2, is_long):
+    """
+    Find where a trade exits, checking stop loss, then target 1, then target 2 on each bar
+    
+    Args:
+        highs (numpy.ndarray): float64 highs of the bars after entry
+        lows (numpy.ndarray): float64 lows of the bars after entry
+        closes (numpy.ndarray): float64 closes of the bars after entry
+        stop_loss (float): Stop loss price
+        target1 (float): First target price
+        target2 (float): Second target price
+        is_long (bool): True for LONG trades, False for SHORT
+        
+    Returns:
+        tuple: (bar index or -1 if no level was hit, exit price, index into EXIT_REASONS)
+    """
+    for k in range(highs.shape[0]):
+        if is_long:
+            if lows[k] <= stop_loss:
+                return k, stop_loss, 0
+            if highs[k] >= target1:
+                return k, target1, 1
+            if highs[k] >= target2:
+                return k, target2, 2
+        else:
+            if highs[k] >= stop_loss:
+                return k, stop_loss, 0
+            if lows[k] <= target1:
+                return k, target1, 1
+            if lows[k] <= target2:
+                return k, target2, 2
+    
+    # No exit level hit: close at the last bar
+    return -1, closes[-1], 3
+
+@njit(parallel=True, cache=True)
+def _simulate_exits(highs, lows, closes, entry_idx, entry_price, stop_loss, target1, target2, is_long):
+    """
+    Run _simulate_exit for every trade in parallel; each trade only writes its own slot
+    
+    Args:
+        highs (numpy.ndarray): float64 highs of the whole backtest
+        lows (numpy.ndarray): float64 lows of the whole backtest
+        closes (numpy.ndarray): float64 closes of the whole backtest
+        entry_idx (numpy.ndarray): int64 entry bar of each trade
+        entry_price (numpy.ndarray): float64 entry price of each trade
+        stop_loss (numpy.ndarray): float64 stop loss of each trade
+        target1 (numpy.ndarray): float64 first target of each trade
+        target2 (numpy.ndarray): float64 second target of each trade
+        is_long (numpy.ndarray): bool, True for LONG trades
+        
+    Returns:
+        tuple: (exit bar, exit price, profit/loss %, index into EXIT_REASONS) arrays
+    """
+    n_trades = entry_idx.shape[0]
+    n_bars = highs.shape[0]
+    exit_idx = np.empty(n_trades, dtype=np.int64)
+    exit_price = np.empty(n_trades, dtype=np.float64)
+    profit_loss = np.empty(n_trades, dtype=np.float64)
+    exit_reason = np.empty(n_trades, dtype=np.int64)
+    
+    for t in prange(n_trades):
+        start = entry_idx[t] + 1
+        
+        if start >= n_bars:
+            # Signal was at the end of the data, no future data to evaluate
+            exit_idx[t] = entry_idx[t]
+            exit_price[t] = entry_price[t]
+            profit_loss[t] = 0.0
+            exit_reason[t] = 3
+            continue
+        
+        bar, price, reason = _simulate_exit(
+            highs[start:], lows[start:], closes[start:],
+            stop_loss[t], target1[t], target2[t], is_long[t]
+        )
+        
+        exit_idx[t] = start + bar if bar >= 0 else n_bars - 1
+        exit_price[t] = price
+        exit_reason[t] = reason
+        
+        if is_long[t]:
+            profit_loss[t] = (price - entry_price[t]) / entry_price[t] * 100
+        else:  # SHORT
+            profit_loss[t] = (entry_price[t] - price) / entry_price[t] * 100
+    
+    return exit_idx, exit_price, profit_loss, exit_reason
 
 def run_backtest(exchange_id, symbol, timeframe, days, config):
     """
@@ -25,8 +118,8 @@ def run_backtest(exchange_id, symbol, timeframe, days, config):
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
-        # Fetch historical data
-        df = fetch_historical_data(exchange_id, symbol, timeframe, start_date, end_date)
+        # Fetch historical data (cached; re-running the same backtest doesn't re-download)
+        df = fetch_historical_data_cached(exchange_id, symbol, timeframe, start_date, end_date)
         
         if df is None or df.empty:
             print(f"No historical data available for {symbol} on {exchange_id}")
@@ -38,214 +131,98 @@ def run_backtest(exchange_id, symbol, timeframe, days, config):
         # Analyze patterns
         df = analyze_patterns(df, config)
         
-        # Run through the data and generate signals
-        signals = []
+        # Generate the signals for every bar at once
         position = None
-        
-        for i in range(1, len(df)):
-            # Get the current row
-            current_df = df.iloc[:i+1]
-            
-            # Generate signals for the current row
-            new_signals = generate_signals(current_df, config)
-            new_signals = filter_conflicting_signals(new_signals)
-            
-            for signal in new_signals:
-                # Add the signal timestamp
-                signal['timestamp'] = df.index[i].strftime('%Y-%m-%d %H:%M:%S')
-                
-                # Initialize position tracking data
-                signal['exit_price'] = None
-                signal['exit_time'] = None
-                signal['profit_loss'] = None
-                signal['exit_reason'] = None
-                
-                signals.append(signal)
-        
-        # Simulate trades and calculate results
-        for i, signal in enumerate(signals):
-            # Get signal details
-            try:
-                entry_time_str = signal['timestamp']
-                entry_time = pd.to_datetime(entry_time_str)
-                entry_price = signal['entry_price']
-                stop_loss = signal['stop_loss']
-                target1 = signal['target1']
-                target2 = signal['target2']
-                signal_type = signal['signal_type']
-                
-                # Find data after entry - safely handle any timestamp issues
-                try:
-                    entry_idx = df.index.get_indexer([entry_time], method='nearest')[0]
-                except:
-                    # If there's an issue with direct indexing, find the closest time
-                    time_diffs = [(idx, abs(idx - entry_time)) for idx in df.index]
-                    closest_time = min(time_diffs, key=lambda x: x[1])[0]
-                    entry_idx = df.index.get_loc(closest_time)
-                    
-                future_data = df.iloc[entry_idx+1:]
-            except Exception as e:
-                print(f"Error processing signal timestamp: {e}, signal: {signal}")
-                # Skip this signal
-                continue
-            
-            if future_data.empty:
-                # Signal was at the end of the data, no future data to evaluate
-                signal['exit_price'] = entry_price
-                signal['exit_time'] = entry_time.strftime('%Y-%m-%d %H:%M:%S')
-                signal['profit_loss'] = 0
-                signal['exit_reason'] = 'End of data'
-                continue
-            
-            # Initialize variables for tracking the trade
-            exit_price = None
-            exit_time = None
-            profit_loss = None
-            exit_reason = None
-            
-            # Simulate the trade
-            for idx, row in future_data.iterrows():
-                high = row['high']
-                low = row['low']
-                close = row['close']
-                
-                # Check for stop loss hit
-                if signal_type == 'LONG' and low <= stop_loss:
-                    exit_price = stop_loss
-                    exit_time = idx
-                    profit_loss = (exit_price - entry_price) / entry_price * 100
-                    exit_reason = 'Stop Loss'
-                    break
-                
-                elif signal_type == 'SHORT' and high >= stop_loss:
-                    exit_price = stop_loss
-                    exit_time = idx
-                    profit_loss = (entry_price - exit_price) / entry_price * 100
-                    exit_reason = 'Stop Loss'
-                    break
-                
-                # Check for target1 hit
-                if signal_type == 'LONG' and high >= target1:
-                    exit_price = target1
-                    exit_time = idx
-                    profit_loss = (exit_price - entry_price) / entry_price * 100
-                    exit_reason = 'Target 1'
-                    break
-                
-                elif signal_type == 'SHORT' and low <= target1:
-                    exit_price = target1
-                    exit_time = idx
-                    profit_loss = (entry_price - exit_price) / entry_price * 100
-                    exit_reason = 'Target 1'
-                    break
-                
-                # Check for target2 hit (rarely but possible)
-                if signal_type == 'LONG' and high >= target2:
-                    exit_price = target2
-                    exit_time = idx
-                    profit_loss = (exit_price - entry_price) / entry_price * 100
-                    exit_reason = 'Target 2'
-                    break
-                
-                elif signal_type == 'SHORT' and low <= target2:
-                    exit_price = target2
-                    exit_time = idx
-                    profit_loss = (entry_price - exit_price) / entry_price * 100
-                    exit_reason = 'Target 2'
-                    break
-            
-            # If trade hasn't exited, use the last close price
-            if exit_price is None:
-                exit_price = future_data.iloc[-1]['close']
-                exit_time = future_data.index[-1]
-                
-                if signal_type == 'LONG':
-                    profit_loss = (exit_price - entry_price) / entry_price * 100
-                else:  # SHORT
-                    profit_loss = (entry_price - exit_price) / entry_price * 100
-                
-                exit_reason = 'End of data'
-            
-            # Update signal with trade results
-            signal['exit_price'] = float(exit_price)
-            signal['exit_time'] = exit_time.strftime('%Y-%m-%d %H:%M:%S')
-            signal['profit_loss'] = float(profit_loss)
-            signal['exit_reason'] = exit_reason
-        
-        # Calculate performance metrics
-        total_signals = len(signals)
-        winning_signals = len([s for s in signals if s['profit_loss'] > 0])
-        losing_signals = len([s for s in signals if s['profit_loss'] <= 0])
+        sig_df = generate_signals_batch(df, config)
+        
+        # Price arrays for the compiled exit search
+        highs = df['high'].to_numpy(dtype=np.float64)
+        lows = df['low'].to_numpy(dtype=np.float64)
+        closes = df['close'].to_numpy(dtype=np.float64)
+        
+        # Trade columns as arrays; the bar each signal was generated on gives
+        # its entry without a timestamp lookup
+        entry_idx = sig_df['_bar_idx'].to_numpy(dtype=np.int64)
+        entry_prices = sig_df['entry_price'].to_numpy(dtype=np.float64)
+        stop_losses = sig_df['stop_loss'].to_numpy(dtype=np.float64)
+        targets1 = sig_df['target1'].to_numpy(dtype=np.float64)
+        targets2 = sig_df['target2'].to_numpy(dtype=np.float64)
+        is_long = (sig_df['signal_type'] == 'LONG').to_numpy(dtype=np.bool_)
+        
+        # Simulate all trades at once
+        exit_idx, exit_prices, profit_losses, exit_levels = _simulate_exits(
+            highs, lows, closes, entry_idx, entry_prices, stop_losses, targets1, targets2, is_long
+        )
+        
+        # Store the trade results as columns of the signals frame
+        sig_df['exit_price'] = exit_prices
+        sig_df['exit_time'] = df.index[exit_idx].strftime('%Y-%m-%d %H:%M:%S')
+        sig_df['profit_loss'] = profit_losses
+        sig_df['exit_reason'] = np.asarray(EXIT_REASONS, dtype=object)[exit_levels]
+        
+        # Calculate performance metrics from the per-trade return column
+        total_signals = len(sig_df)
+        pnl = sig_df['profit_loss'].to_numpy(dtype=np.float64)
+        wins = pnl > 0
+        
+        winning_signals = int(wins.sum())
+        losing_signals = total_signals - winning_signals
         
         if total_signals > 0:
             win_rate = (winning_signals / total_signals) * 100
-        else:
-            win_rate = 0
-        
-        # Calculate average profit
-        if total_signals > 0:
-            avg_profit = sum([s['profit_loss'] for s in signals]) / total_signals
-        else:
-            avg_profit = 0
-        
-        # Calculate maximum drawdown
-        if total_signals > 0:
-            # Sort signals by timestamp
-            sorted_signals = sorted(signals, key=lambda s: s['timestamp'])
             
-            # Calculate cumulative returns
-            equity_curve = [100]  # Start with 100 units
-            for signal in sorted_signals:
-                profit_loss = signal['profit_loss'] / 100  # Convert to decimal
-                equity_curve.append(equity_curve[-1] * (1 + profit_loss))
+            # Calculate average profit
+            avg_profit = float(pnl.mean())
             
-            # Calculate drawdown
+            # Calculate maximum drawdown; signals are ordered by bar, so they are already in time order
+            equity_curve = np.empty(total_signals + 1, dtype=np.float64)
+            equity_curve[0] = 1.0  # Start with 100 units
+            np.cumprod(1 + pnl / 100, out=equity_curve[1:])
+            equity_curve *= 100
             running_max = np.maximum.accumulate(equity_curve)
-            drawdown = ((running_max - equity_curve) / running_max) * 100
-            max_drawdown = max(drawdown)
+            max_drawdown = float(((1.0 - equity_curve / running_max) * 100).max())
         else:
+            win_rate = 0
+            avg_profit = 0
             max_drawdown = 0
         
         # Calculate profit factor
-        winning_sum = sum([s['profit_loss'] for s in signals if s['profit_loss'] > 0])
-        losing_sum = abs(sum([s['profit_loss'] for s in signals if s['profit_loss'] < 0]))
+        winning_sum = float(pnl[wins].sum())
+        losing_sum = float(-pnl[pnl < 0].sum())
         
         if losing_sum > 0:
             profit_factor = winning_sum / losing_sum
         else:
             profit_factor = winning_sum if winning_sum > 0 else 0
         
-        # Prepare strategy performance comparison
-        strategy_performance = {}
-        
-        for signal in signals:
-            strategy = signal['strategy']
-            if strategy not in strategy_performance:
-                strategy_performance[strategy] = {
-                    'count': 0,
-                    'win_count': 0,
-                    'loss_count': 0,
-                    'profit_sum': 0,
-                    'loss_sum': 0
-                }
-            
-            strategy_performance[strategy]['count'] += 1
-            
-            if signal['profit_loss'] > 0:
-                strategy_performance[strategy]['win_count'] += 1
-                strategy_performance[strategy]['profit_sum'] += signal['profit_loss']
-            else:
-                strategy_performance[strategy]['loss_count'] += 1
-                strategy_performance[strategy]['loss_sum'] += abs(signal['profit_loss'])
+        # Prepare strategy performance comparison with one groupby over the trades
+        trades = pd.DataFrame({
+            'strategy': sig_df['strategy'].to_numpy(),
+            'win': wins,
+            'profit': np.where(wins, pnl, 0.0),
+            'loss': np.where(wins, 0.0, -pnl)
+        })
+        grouped = trades.groupby('strategy', sort=False)
+        
+        perf = pd.DataFrame({
+            'count': grouped.size(),
+            'win_count': grouped['win'].sum(),
+            'profit_sum': grouped['profit'].sum(),
+            'loss_sum': grouped['loss'].sum()
+        })
+        perf['loss_count'] = perf['count'] - perf['win_count']
         
         # Calculate win rate and profit factor for each strategy
-        for strategy, perf in strategy_performance.items():
-            perf['win_rate'] = (perf['win_count'] / perf['count']) * 100 if perf['count'] > 0 else 0
-            
-            if perf['loss_sum'] > 0:
-                perf['profit_factor'] = perf['profit_sum'] / perf['loss_sum']
-            else:
-                perf['profit_factor'] = perf['profit_sum'] if perf['profit_sum'] > 0 else 0
+        perf['win_rate'] = perf['win_count'] / perf['count'] * 100
+        perf['profit_factor'] = np.where(
+            perf['loss_sum'] > 0,
+            perf['profit_sum'] / perf['loss_sum'].where(perf['loss_sum'] > 0, 1.0),
+            perf['profit_sum']
+        )
+        
+        strategy_performance = perf[[
+            'count', 'win_count', 'loss_count', 'profit_sum', 'loss_sum', 'win_rate', 'profit_factor'
+        ]].to_dict('index')
         
         # Prepare the results
         results = {
@@ -256,7 +233,7 @@ def run_backtest(exchange_id, symbol, timeframe, days, config):
             'avg_profit': avg_profit,
             'max_drawdown': max_drawdown,
             'profit_factor': profit_factor,
-            'signals': signals,
+            'signals': sig_df.to_dict('records'),
             'strategy_performance': strategy_performance
         }
         
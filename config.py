@@ -1,7 +1,8 @@
 # Configuration settings for the trading signal generator
+from types import MappingProxyType
 
-# Default settings
-DEFAULT_SETTINGS = {
+# Default settings (read-only; use DEFAULT_SETTINGS.copy() for an editable config)
+DEFAULT_SETTINGS = MappingProxyType({
     # Exchange and symbol settings
     'exchange': 'kraken',
     'symbol': 'BTC/USDT',
@@ -37,10 +38,10 @@ DEFAULT_SETTINGS = {
     # Position settings
     'default_leverage': 5,
     'risk_percent': 1.0  # Risk 1% of account per trade
-}
+})
 
-# Available exchanges
-AVAILABLE_EXCHANGES = [
+# Available exchanges (tuples: ordered for the UI and immutable)
+AVAILABLE_EXCHANGES = (
     'binance',
     'bitfinex',
     'bitmex',
@@ -50,26 +51,26 @@ AVAILABLE_EXCHANGES = [
     'kraken',
     'kucoin',
     'okex'
-]
+)
 
 # Available timeframes
-AVAILABLE_TIMEFRAMES = [
+AVAILABLE_TIMEFRAMES = (
     '1m', '3m', '5m', '15m', '30m',
     '1h', '2h', '4h', '6h', '8h', '12h',
     '1d', '3d', '1w', '1M'
-]
+)
 
 # Available symbols
-AVAILABLE_SYMBOLS = [
+AVAILABLE_SYMBOLS = (
     'BTC/USDT', 'ETH/USDT', 'BNB/USDT', 'SOL/USDT', 'XRP/USDT',
     'ADA/USDT', 'DOGE/USDT', 'DOT/USDT', 'MATIC/USDT', 'AVAX/USDT',
     'LINK/USDT', 'UNI/USDT', 'LTC/USDT', 'BCH/USDT', 'ALGO/USDT',
     'ATOM/USDT', 'FIL/USDT', 'XLM/USDT', 'TRX/USDT', 'ETC/USDT',
     'ETH/BTC', 'BNB/BTC', 'SOL/BTC', 'XRP/BTC', 'ADA/BTC'
-]
+)
 
 # Candlestick patterns
-CANDLESTICK_PATTERNS = [
+CANDLESTICK_PATTERNS = (
     'hammer',
     'inverted_hammer',
     'hanging_man',
@@ -84,20 +85,20 @@ CANDLESTICK_PATTERNS = [
     'piercing_pattern',
     'dark_cloud_cover',
     'spinning_top'
-]
+)
 
 # Harmonic patterns
-HARMONIC_PATTERNS = [
+HARMONIC_PATTERNS = (
     'gartley',
     'butterfly',
     'bat',
     'crab',
     'shark',
     'cypher'
-]
+)
 
 # Price action patterns
-PRICE_ACTION_PATTERNS = [
+PRICE_ACTION_PATTERNS = (
     'double_top',
     'double_bottom',
     'triple_top',
@@ -113,4 +114,4 @@ PRICE_ACTION_PATTERNS = [
     'flag_bearish',
     'pennant_bullish',
     'pennant_bearish'
-]
+)
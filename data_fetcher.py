@@ -1,8 +1,77 @@
 import ccxt
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 import time
+import random
 import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# How long (seconds) a filtered symbol list stays valid before volumes are re-checked
+SYMBOLS_CACHE_TTL = 3600
+
+# How often (seconds) the exchanges re-download their market listings
+MARKETS_RELOAD_INTERVAL = 3600
+
+# Maximum number of (exchange, symbol, timeframe, limit) OHLCV frames kept in memory
+OHLCV_CACHE_SIZE = 512
+
+# Maximum number of historical (backtest) frames kept in memory
+HISTORICAL_CACHE_SIZE = 16
+
+# Historical downloads are split into segments of this many candles, fetched
+# by up to HISTORICAL_FETCH_WORKERS threads; ccxt's rate limiter still spaces
+# the requests out
+HISTORICAL_CHUNK_LIMIT = 1000
+HISTORICAL_FETCH_WORKERS = 4
+
+# Attempts per historical request, and the longest wait (seconds) between them
+# when the exchange is throttling us
+HISTORICAL_FETCH_RETRIES = 6
+HISTORICAL_BACKOFF_MAX = 60
+
+# Popular exchanges tried, in this order of preference, when the requested one fails
+FALLBACK_EXCHANGES = ('kraken', 'coinbase', 'kucoin', 'bitfinex', 'huobi', 'okex')
+
+# Price/volume columns are stored as float32: ~7 significant digits is plenty
+# for candles and halves the memory every indicator pass has to read
+OHLCV_DTYPE = 'float32'
+OHLCV_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+# Closed historical candles are kept on disk per (exchange, symbol, timeframe),
+# so later backtests only download candles newer than the stored ones
+OHLCV_STORE_DIR = os.getenv("TRADESAGE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "tradesage"))
+
+# Connection pool sizes of the HTTP session shared by all exchange clients
+HTTP_POOL_CONNECTIONS = 32
+HTTP_POOL_MAXSIZE = 64
+
+# One HTTP session for every synchronous exchange client, so keep-alive
+# connections (and their TLS handshakes) are reused across calls and threads
+_HTTP_SESSION = requests.Session()
+_HTTP_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=HTTP_POOL_CONNECTIONS,
+    pool_maxsize=HTTP_POOL_MAXSIZE,
+    max_retries=Retry(total=3, backoff_factor=0.3)
+))
+
+# Shared exchange clients, one per exchange_id, with markets already loaded
+_EXCHANGE_CACHE = {}
+_EXCHANGE_LOCK = threading.Lock()
+
+# When each shared exchange last loaded its markets
+_MARKETS_LOADED_AT = {}
+
+# Per-exchange locks serializing each exchange's market downloads
+_MARKETS_LOCKS = {}
 
 def initialize_exchange(exchange_id, rate_limit=True):
     """
@@ -22,6 +91,7 @@ def initialize_exchange(exchange_id, rate_limit=True):
             'enableRateLimit': rate_limit,
             'timeout': 30000,
             'adjustForTimeDifference': True,
+            'session': _HTTP_SESSION,
         })
         
         # Use API key and secret if available
@@ -35,65 +105,298 @@ def initialize_exchange(exchange_id, rate_limit=True):
         return exchange
     
     except Exception as e:
-        print(f"Error initializing exchange {exchange_id}: {str(e)}")
+        logger.error("Error initializing exchange %s: %s", exchange_id, e)
         return None
 
-def fetch_market_data(exchange_id, symbol, timeframe, limit=500, fallback=True):
+def get_exchange(exchange_id, reload_markets=False):
+    """
+    Get the shared exchange instance for an exchange, creating it and
+    loading its markets on first use
+    
+    Args:
+        exchange_id (str): Exchange identifier
+        reload_markets (bool): Re-download the markets of an existing instance
+        
+    Returns:
+        ccxt.Exchange: Exchange instance, or None if it could not be initialized
+    """
+    with _EXCHANGE_LOCK:
+        exchange = _EXCHANGE_CACHE.get(exchange_id)
+        
+        if exchange is None:
+            exchange = initialize_exchange(exchange_id)
+            
+            if exchange is None:
+                return None
+            
+            _EXCHANGE_CACHE[exchange_id] = exchange
+        
+        markets_lock = _MARKETS_LOCKS.setdefault(exchange_id, threading.Lock())
+    
+    # Download markets outside the global lock, so cold exchanges load in
+    # parallel; only callers of this exchange wait for its download
+    with markets_lock:
+        if _EXCHANGE_CACHE.get(exchange_id) is not exchange:
+            # The instance was dropped after a failed first load; start over
+            return get_exchange(exchange_id, reload_markets)
+        
+        first_load = exchange_id not in _MARKETS_LOADED_AT
+        if first_load or reload_markets:
+            try:
+                # Load markets once; later calls reuse them
+                exchange.load_markets(reload=not first_load)
+            except Exception:
+                if first_load:
+                    with _EXCHANGE_LOCK:
+                        _EXCHANGE_CACHE.pop(exchange_id, None)
+                raise
+            _MARKETS_LOADED_AT[exchange_id] = time.time()
+    
+    return exchange
+
+def ohlcv_to_dataframe(ohlcv, dtype=OHLCV_DTYPE):
+    """
+    Convert a ccxt OHLCV list into a DataFrame indexed by candle open time
+    
+    Args:
+        ohlcv (list): List of [timestamp_ms, open, high, low, close, volume] rows
+        dtype (str): Dtype of the price and volume columns ('float32' or 'float64')
+        
+    Returns:
+        pandas.DataFrame: Dataframe with market data
+    """
+    # One numeric array instead of per-row type inference
+    arr = np.asarray(ohlcv, dtype=np.float64).reshape(-1, 6)
+    
+    # Millisecond timestamps reinterpreted as datetimes, no string parsing
+    index = pd.DatetimeIndex(arr[:, 0].astype(np.int64).view('datetime64[ms]'), name='timestamp').as_unit('ns')
+    
+    # Downcast prices and volume column by column
+    df = pd.DataFrame(
+        {column: arr[:, i + 1].astype(dtype) for i, column in enumerate(OHLCV_COLUMNS)},
+        index=index
+    )
+    
+    return df
+
+def _ohlcv_store_path(exchange_id, symbol, timeframe):
+    # One file per market and timeframe, e.g. binance_BTC-USDT_1h.pkl
+    name = f"{exchange_id}_{symbol}_{timeframe}".replace("/", "-").replace(":", "-")
+    return os.path.join(OHLCV_STORE_DIR, f"{name}.pkl")
+
+def load_stored_ohlcv(exchange_id, symbol, timeframe):
+    """
+    Load the closed candles stored on disk for a market
+    
+    Args:
+        exchange_id (str): Exchange identifier
+        symbol (str): Trading pair symbol
+        timeframe (str): Timeframe for the data
+        
+    Returns:
+        pandas.DataFrame: Stored candles, or None if nothing is stored
+    """
+    path = _ohlcv_store_path(exchange_id, symbol, timeframe)
+    
+    if not os.path.exists(path):
+        return None
+    
+    try:
+        return pd.read_pickle(path)
+    except Exception as e:
+        logger.error("Error reading stored candles from %s: %s", path, e)
+        return None
+
+def store_ohlcv(exchange_id, symbol, timeframe, df):
+    """
+    Write the closed candles of `df` to the on-disk store of a market
+    
+    Args:
+        exchange_id (str): Exchange identifier
+        symbol (str): Trading pair symbol
+        timeframe (str): Timeframe for the data
+        df (pandas.DataFrame): Candles to store (the currently forming one is skipped)
+    """
+    # The last candle may still be forming; only closed candles are immutable
+    closed_before = pd.Timestamp(time.time() - timeframe_to_seconds(timeframe), unit='s')
+    closed = df[df.index <= closed_before]
+    
+    if closed.empty:
+        return
+    
+    path = _ohlcv_store_path(exchange_id, symbol, timeframe)
+    
+    try:
+        os.makedirs(OHLCV_STORE_DIR, exist_ok=True)
+        # Write to a temporary file first so a crash never leaves a truncated store
+        tmp_path = f"{path}.tmp"
+        closed.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.error("Error storing candles to %s: %s", path, e)
+
+class _NoMarketData(Exception):
+    # Raised inside the cached fetch so failed lookups are not memoized
+    pass
+
+def timeframe_to_seconds(timeframe):
+    """
+    Convert a ccxt timeframe string (e.g. '5m', '1h') to seconds
+    
+    Args:
+        timeframe (str): Timeframe string
+        
+    Returns:
+        int: Timeframe length in seconds (60 if the timeframe is not recognised)
+    """
+    try:
+        return int(ccxt.Exchange.parse_timeframe(timeframe))
+    except Exception:
+        return 60
+
+@lru_cache(maxsize=OHLCV_CACHE_SIZE)
+def _fetch_market_data_cached(exchange_id, symbol, timeframe, limit, fallback, dtype, bar_bucket):
+    # bar_bucket is only part of the cache key; it advances when a new candle opens
+    df = _fetch_market_data(exchange_id, symbol, timeframe, limit, fallback, dtype)
+    
+    if df is None or df.empty:
+        raise _NoMarketData()
+    
+    return df
+
+def fetch_market_data(exchange_id, symbol, timeframe, limit=500, fallback=True, dtype=OHLCV_DTYPE):
     """
     Fetch market data from exchange
     
+    Results are cached until the next candle of `timeframe` opens, so
+    repeated scans inside one bar don't re-download the same window.
+    The returned frame is shared between callers and must not be
+    modified in place; copy it first.
+    
     Args:
         exchange_id (str): Exchange identifier
         symbol (str): Trading pair symbol
         timeframe (str): Timeframe for the data
         limit (int): Number of candles to fetch
         fallback (bool): Whether to try fallback exchanges if the primary fails
-        
+        dtype (str): Dtype of the price and volume columns; 'float64' where
+                     float32's ~7 significant digits are not enough
+    
     Returns:
         pandas.DataFrame: Dataframe with market data
     """
+    bar_bucket = int(time.time() // timeframe_to_seconds(timeframe))
+    
+    try:
+        return _fetch_market_data_cached(exchange_id, symbol, timeframe, limit, fallback, dtype, bar_bucket)
+    except _NoMarketData:
+        return None
+
+def _fetch_market_data(exchange_id, symbol, timeframe, limit=500, fallback=True, dtype=OHLCV_DTYPE):
+    # Uncached implementation behind fetch_market_data
     try:
-        # Initialize exchange
-        exchange = initialize_exchange(exchange_id)
+        # Get the shared exchange instance (markets are loaded on first use)
+        exchange = get_exchange(exchange_id)
         
         if exchange is None:
             if fallback:
-                print(f"Failed to initialize {exchange_id}, trying fallback exchange...")
-                return fetch_market_data_from_fallback(symbol, timeframe, limit, [exchange_id])
+                logger.warning("Failed to initialize %s, trying fallback exchange...", exchange_id)
+                return fetch_market_data_from_fallback(symbol, timeframe, limit, [exchange_id], dtype)
             return None
         
-        # Load markets to validate symbol
-        exchange.load_markets()
-        
         # Fetch OHLCV data
         ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
         
         # Convert to DataFrame
-        df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        
-        # Convert timestamp to datetime
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        
-        # Set timestamp as index
-        df.set_index('timestamp', inplace=True)
-        
-        return df
+        return ohlcv_to_dataframe(ohlcv, dtype)
     
     except ccxt.BaseError as e:
-        print(f"CCXT error when fetching {symbol} from {exchange_id}: {str(e)}")
+        logger.error("CCXT error when fetching %s from %s: %s", symbol, exchange_id, e)
         if fallback:
-            print(f"Trying fallback exchange for {symbol}...")
-            return fetch_market_data_from_fallback(symbol, timeframe, limit, [exchange_id])
+            logger.info("Trying fallback exchange for %s...", symbol)
+            return fetch_market_data_from_fallback(symbol, timeframe, limit, [exchange_id], dtype)
         return None
     
     except Exception as e:
-        print(f"Error fetching market data for {symbol} from {exchange_id}: {str(e)}")
+        logger.error("Error fetching market data for %s from %s: %s", symbol, exchange_id, e)
         if fallback:
-            print(f"Trying fallback exchange for {symbol}...")
-            return fetch_market_data_from_fallback(symbol, timeframe, limit, [exchange_id])
+            logger.info("Trying fallback exchange for %s...", symbol)
+            return fetch_market_data_from_fallback(symbol, timeframe, limit, [exchange_id], dtype)
+        return None
+
+def _first_fallback_result(fetch, exchange_ids, what):
+    """
+    Run `fetch(exchange_id)` for every fallback exchange concurrently and
+    return the first non-empty result
+    
+    Args:
+        fetch (callable): Fetch function taking an exchange identifier
+        exchange_ids (list): Fallback exchanges to try
+        what (str): Description of the data for log messages
+        
+    Returns:
+        The first non-empty result, or None if every exchange failed
+    """
+    if not exchange_ids:
         return None
+    
+    pool = ThreadPoolExecutor(max_workers=len(exchange_ids))
+    futures = {}
+    for exchange_id in exchange_ids:
+        logger.debug("Attempting to fetch %s from fallback exchange: %s", what, exchange_id)
+        futures[pool.submit(fetch, exchange_id)] = exchange_id
+    
+    try:
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error("Error fetching %s from fallback exchange %s: %s", what, futures[future], e)
+                continue
+            
+            if result is not None and len(result) > 0:
+                logger.info("Successfully fetched %s from fallback exchange: %s", what, futures[future])
+                return result
+    finally:
+        # Don't wait for the slower exchanges
+        pool.shutdown(wait=False, cancel_futures=True)
+    
+    return None
+
+def _try_fallbacks(fetch, excluded_exchanges, what, concurrent=True):
+    """
+    Try `fetch(exchange_id)` on the fallback exchanges and return the first
+    non-empty result
+    
+    Args:
+        fetch (callable): Fetch function taking an exchange identifier
+        excluded_exchanges (list): List of exchanges to exclude from fallback attempts
+        what (str): Description of the data for log messages
+        concurrent (bool): Probe all exchanges at once instead of in order of preference
+        
+    Returns:
+        The first non-empty result, or None if every exchange failed
+    """
+    exchange_ids = [ex for ex in FALLBACK_EXCHANGES if not excluded_exchanges or ex not in excluded_exchanges]
+    
+    if concurrent:
+        result = _first_fallback_result(fetch, exchange_ids, what)
+    else:
+        result = None
+        for exchange_id in exchange_ids:
+            logger.debug("Attempting to fetch %s from fallback exchange: %s", what, exchange_id)
+            candidate = fetch(exchange_id)
+            if candidate is not None and len(candidate) > 0:
+                logger.info("Successfully fetched %s from fallback exchange: %s", what, exchange_id)
+                result = candidate
+                break
+    
+    if result is None:
+        logger.warning("All fallback exchanges failed. No %s could be retrieved.", what)
+    
+    return result
 
-def fetch_market_data_from_fallback(symbol, timeframe, limit=500, excluded_exchanges=None):
+def fetch_market_data_from_fallback(symbol, timeframe, limit=500, excluded_exchanges=None, dtype=OHLCV_DTYPE):
     """
     Fetch market data from fallback exchanges
     
@@ -102,27 +405,78 @@ def fetch_market_data_from_fallback(symbol, timeframe, limit=500, excluded_excha
         timeframe (str): Timeframe for the data
         limit (int): Number of candles to fetch
         excluded_exchanges (list): List of exchanges to exclude from fallback attempts
+        dtype (str): Dtype of the price and volume columns
         
     Returns:
         pandas.DataFrame: Dataframe with market data
     """
-    # List of popular exchanges to try as fallbacks
-    fallback_exchanges = ['kraken', 'coinbase', 'kucoin', 'bitfinex', 'huobi', 'okex']
-    
-    # Remove excluded exchanges
-    if excluded_exchanges:
-        fallback_exchanges = [ex for ex in fallback_exchanges if ex not in excluded_exchanges]
+    return _try_fallbacks(
+        lambda exchange_id: fetch_market_data(exchange_id, symbol, timeframe, limit, fallback=False, dtype=dtype),  # Prevent infinite recursion
+        excluded_exchanges, "data"
+    )
+
+def _fetch_ohlcv_range(exchange, symbol, timeframe, since, until):
+    # Candles with since <= timestamp < until as an (n, 6) float64 array,
+    # paging forward from `since` (exchanges may return fewer than
+    # HISTORICAL_CHUNK_LIMIT per request); None if a request failed, so a
+    # truncated range is never mistaken for complete data
+    expected_rows = (until - since) // (timeframe_to_seconds(timeframe) * 1000) + 1
+    buf = np.empty((expected_rows, 6), dtype=np.float64)
+    n = 0
+    min_delay = exchange.rateLimit / 1000
+    delay = min_delay
     
-    # Try each fallback exchange
-    for exchange_id in fallback_exchanges:
-        print(f"Attempting to fetch data from fallback exchange: {exchange_id}")
-        df = fetch_market_data(exchange_id, symbol, timeframe, limit, fallback=False)  # Prevent infinite recursion
-        if df is not None and not df.empty:
-            print(f"Successfully fetched data from fallback exchange: {exchange_id}")
-            return df
+    while since < until:
+        candles = None
+        
+        # ccxt's rate limiter spaces healthy requests; only back off when the exchange pushes back
+        for attempt in range(HISTORICAL_FETCH_RETRIES):
+            try:
+                candles = exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=HISTORICAL_CHUNK_LIMIT)
+                delay = max(min_delay, delay * 0.8)
+                break
+            
+            except (ccxt.RateLimitExceeded, ccxt.DDoSProtection) as e:
+                logger.warning("Rate limited fetching %s, retrying in %.1fs: %s", symbol, delay, e)
+                time.sleep(delay)
+                delay = min(delay * 2, HISTORICAL_BACKOFF_MAX)
+            
+            except ccxt.NetworkError as e:
+                logger.warning("Network error fetching %s, retrying: %s", symbol, e)
+                time.sleep(delay + random.random())
+            
+            except Exception as e:
+                logger.error("Error in fetch loop: %s", e)
+                return None
+        
+        if candles is None:
+            logger.error("Giving up fetching %s after %d attempts", symbol, HISTORICAL_FETCH_RETRIES)
+            return None
+        
+        # An empty page means the exchange has no newer candles
+        if not candles:
+            break
+        
+        chunk = np.asarray(candles, dtype=np.float64).reshape(-1, 6)
+        chunk = chunk[chunk[:, 0] < until]
+        
+        # Grow the buffer if the exchange returned more candles than the cadence predicts
+        if n + len(chunk) > len(buf):
+            grown = np.empty((max(2 * len(buf), n + len(chunk)), 6), dtype=np.float64)
+            grown[:n] = buf[:n]
+            buf = grown
+        
+        buf[n:n + len(chunk)] = chunk
+        n += len(chunk)
+        
+        # Update since to the timestamp of the last candle
+        since = candles[-1][0] + 1
     
-    print("All fallback exchanges failed. No data could be retrieved.")
-    return None
+    return buf[:n]
+
+def _is_contiguous(index, tf_ms):
+    # True if consecutive candle times in `index` are exactly one timeframe apart
+    return bool((np.diff(index.to_numpy().astype('datetime64[ms]').astype(np.int64)) == tf_ms).all())
 
 def fetch_historical_data(exchange_id, symbol, timeframe, start_date, end_date=None, fallback=True):
     """
@@ -140,76 +494,89 @@ def fetch_historical_data(exchange_id, symbol, timeframe, start_date, end_date=N
         pandas.DataFrame: Dataframe with historical market data
     """
     try:
-        # Initialize exchange
-        exchange = initialize_exchange(exchange_id)
+        # Get the shared exchange instance (markets are loaded on first use)
+        exchange = get_exchange(exchange_id)
         
         if exchange is None:
             if fallback:
-                print(f"Failed to initialize {exchange_id}, trying fallback exchange for historical data...")
+                logger.warning("Failed to initialize %s, trying fallback exchange for historical data...", exchange_id)
                 return fetch_historical_data_from_fallback(symbol, timeframe, start_date, end_date, [exchange_id])
             return None
         
-        # Load markets to validate symbol
-        exchange.load_markets()
-        
         # Set end date to current time if not provided
         if end_date is None:
             end_date = datetime.now()
         
         # Convert datetime to milliseconds timestamp
-        since = int(start_date.timestamp() * 1000)
+        start_ms = int(start_date.timestamp() * 1000)
+        end_ms = int(end_date.timestamp() * 1000)
+        since = start_ms
+        tf_ms = timeframe_to_seconds(timeframe) * 1000
+        
+        # The store holds one gap-free run of candles; only when it starts at
+        # or before start_ms do just the newer candles need fetching
+        stored = load_stored_ohlcv(exchange_id, symbol, timeframe)
+        if (stored is not None and not stored.empty and stored.index[0] <= pd.Timestamp(start_ms, unit='ms')
+                and _is_contiguous(stored.index, tf_ms)):
+            since = max(since, int(stored.index[-1].timestamp() * 1000) + 1)
+        else:
+            stored = None
         
-        # Fetch data in chunks due to exchange limitations
-        all_candles = []
-        while since < int(end_date.timestamp() * 1000):
-            try:
-                candles = exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=1000)
-                
-                if not candles:
-                    break
-                
-                all_candles.extend(candles)
-                
-                # Update since to the timestamp of the last candle
-                since = candles[-1][0] + 1
-                
-                # Add delay to avoid rate limiting
-                time.sleep(exchange.rateLimit / 1000)
-            
-            except Exception as e:
-                print(f"Error in fetch loop: {str(e)}")
-                time.sleep(exchange.rateLimit / 1000)
-                break
+        # Fetch data in chunks due to exchange limitations; candles come on a
+        # fixed cadence, so the segment starts are known up front
+        step = HISTORICAL_CHUNK_LIMIT * tf_ms
+        segments = [(start, min(start + step, end_ms)) for start in range(since, end_ms, step)]
         
-        # Convert to DataFrame
-        if all_candles:
-            df = pd.DataFrame(all_candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            
-            # Convert timestamp to datetime
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            
-            # Set timestamp as index
-            df.set_index('timestamp', inplace=True)
-            
+        parts = []
+        if segments:
+            with ThreadPoolExecutor(max_workers=min(HISTORICAL_FETCH_WORKERS, len(segments))) as pool:
+                parts = list(pool.map(lambda seg: _fetch_ohlcv_range(exchange, symbol, timeframe, *seg), segments))
+        
+        # A failed segment leaves a hole; treat the whole fetch as failed
+        if any(part is None for part in parts):
+            raise ValueError(f"Incomplete historical data for {symbol} from {exchange_id}")
+        
+        all_candles = np.concatenate(parts) if parts else np.empty((0, 6))
+        
+        # Convert to DataFrame and merge with the stored candles
+        df = ohlcv_to_dataframe(all_candles) if len(all_candles) else None
+        
+        if stored is not None:
+            if df is not None:
+                df = pd.concat([stored, df])
+                df = df[~df.index.duplicated(keep='last')].sort_index()
+            else:
+                df = stored
+        
+        # Only persist a gap-free run that covers the requested start, so the
+        # store never holds holes that later delta fetches would skip over
+        if (len(all_candles) and df.index[0] < pd.Timestamp(start_ms + tf_ms, unit='ms')
+                and _is_contiguous(df.index, tf_ms)):
+            store_ohlcv(exchange_id, symbol, timeframe, df)
+        
+        if df is not None:
+            df = df.loc[pd.Timestamp(start_ms, unit='ms'):pd.Timestamp(end_ms, unit='ms')]
+        
+        if df is not None and not df.empty:
             return df
         else:
-            print(f"No data returned for {symbol} from {exchange_id}")
+            logger.warning("No data returned for %s from %s", symbol, exchange_id)
             if fallback:
-                print(f"Trying fallback exchange for historical data of {symbol}...")
+                logger.info("Trying fallback exchange for historical data of %s...", symbol)
                 return fetch_historical_data_from_fallback(symbol, timeframe, start_date, end_date, [exchange_id])
             return None
     
     except ccxt.BaseError as e:
-        print(f"CCXT error when fetching historical data for {symbol} from {exchange_id}: {str(e)}")
+        logger.error("CCXT error when fetching historical data for %s from %s: %s", symbol, exchange_id, e)
         if fallback:
-            print(f"Trying fallback exchange for historical data of {symbol}...")
+            logger.info("Trying fallback exchange for historical data of %s...", symbol)
             return fetch_historical_data_from_fallback(symbol, timeframe, start_date, end_date, [exchange_id])
         return None
     
     except Exception as e:
-        print(f"Error fetching historical data for {symbol} from {exchange_id}: {str(e)}")
+        logger.error("Error fetching historical data for %s from %s: %s", symbol, exchange_id, e)
         if fallback:
-            print(f"Trying fallback exchange for historical data of {symbol}...")
+            logger.info("Trying fallback exchange for historical data of %s...", symbol)
             return fetch_historical_data_from_fallback(symbol, timeframe, start_date, end_date, [exchange_id])
         return None
 
@@ -227,23 +594,51 @@ def fetch_historical_data_from_fallback(symbol, timeframe, start_date, end_date=
     Returns:
         pandas.DataFrame: Dataframe with historical market data
     """
-    # List of popular exchanges to try as fallbacks
-    fallback_exchanges = ['kraken', 'coinbase', 'kucoin', 'bitfinex', 'huobi', 'okex']
+    # One exchange at a time: every attempt downloads the whole range
+    return _try_fallbacks(
+        lambda exchange_id: fetch_historical_data(exchange_id, symbol, timeframe, start_date, end_date, fallback=False),  # Prevent infinite recursion
+        excluded_exchanges, "historical data", concurrent=False
+    )
+
+@lru_cache(maxsize=HISTORICAL_CACHE_SIZE)
+def _fetch_historical_data_cached(exchange_id, symbol, timeframe, start_ts, end_ts):
+    df = fetch_historical_data(exchange_id, symbol, timeframe, datetime.fromtimestamp(start_ts), datetime.fromtimestamp(end_ts))
     
-    # Remove excluded exchanges
-    if excluded_exchanges:
-        fallback_exchanges = [ex for ex in fallback_exchanges if ex not in excluded_exchanges]
+    if df is None or df.empty:
+        raise _NoMarketData()
     
-    # Try each fallback exchange
-    for exchange_id in fallback_exchanges:
-        print(f"Attempting to fetch historical data from fallback exchange: {exchange_id}")
-        df = fetch_historical_data(exchange_id, symbol, timeframe, start_date, end_date, fallback=False)  # Prevent infinite recursion
-        if df is not None and not df.empty:
-            print(f"Successfully fetched historical data from fallback exchange: {exchange_id}")
-            return df
+    return df
+
+def fetch_historical_data_cached(exchange_id, symbol, timeframe, start_date, end_date=None):
+    """
+    Fetch historical market data, reusing an earlier download of the same range
     
-    print("All fallback exchanges failed. No historical data could be retrieved.")
-    return None
+    Both ends of the range are aligned to candle boundaries of `timeframe`,
+    so repeated backtests inside one bar share a cache entry. The returned
+    frame is shared between callers and must not be modified in place.
+    
+    Args:
+        exchange_id (str): Exchange identifier
+        symbol (str): Trading pair symbol
+        timeframe (str): Timeframe for the data
+        start_date (datetime): Start date for the data
+        end_date (datetime, optional): End date for the data. Defaults to current time.
+        
+    Returns:
+        pandas.DataFrame: Dataframe with historical market data
+    """
+    if end_date is None:
+        end_date = datetime.now()
+    
+    tf_seconds = timeframe_to_seconds(timeframe)
+    start_ts = int(start_date.timestamp() // tf_seconds) * tf_seconds
+    # Round the end up so the candle that is currently forming stays in range
+    end_ts = (int(end_date.timestamp() // tf_seconds) + 1) * tf_seconds
+    
+    try:
+        return _fetch_historical_data_cached(exchange_id, symbol, timeframe, start_ts, end_ts)
+    except _NoMarketData:
+        return None
 
 def fetch_ticker(exchange_id, symbol, fallback=True):
     """
@@ -258,12 +653,12 @@ def fetch_ticker(exchange_id, symbol, fallback=True):
         dict: Ticker data
     """
     try:
-        # Initialize exchange
-        exchange = initialize_exchange(exchange_id)
+        # Get the shared exchange instance (markets are loaded on first use)
+        exchange = get_exchange(exchange_id)
         
         if exchange is None:
             if fallback:
-                print(f"Failed to initialize {exchange_id}, trying fallback exchange for ticker...")
+                logger.warning("Failed to initialize %s, trying fallback exchange for ticker...", exchange_id)
                 return fetch_ticker_from_fallback(symbol, [exchange_id])
             return None
         
@@ -272,16 +667,16 @@ def fetch_ticker(exchange_id, symbol, fallback=True):
         return ticker
     
     except ccxt.BaseError as e:
-        print(f"CCXT error when fetching ticker for {symbol} from {exchange_id}: {str(e)}")
+        logger.error("CCXT error when fetching ticker for %s from %s: %s", symbol, exchange_id, e)
         if fallback:
-            print(f"Trying fallback exchange for ticker of {symbol}...")
+            logger.info("Trying fallback exchange for ticker of %s...", symbol)
             return fetch_ticker_from_fallback(symbol, [exchange_id])
         return None
     
     except Exception as e:
-        print(f"Error fetching ticker for {symbol} from {exchange_id}: {str(e)}")
+        logger.error("Error fetching ticker for %s from %s: %s", symbol, exchange_id, e)
         if fallback:
-            print(f"Trying fallback exchange for ticker of {symbol}...")
+            logger.info("Trying fallback exchange for ticker of %s...", symbol)
             return fetch_ticker_from_fallback(symbol, [exchange_id])
         return None
 
@@ -296,23 +691,29 @@ def fetch_ticker_from_fallback(symbol, excluded_exchanges=None):
     Returns:
         dict: Ticker data
     """
-    # List of popular exchanges to try as fallbacks
-    fallback_exchanges = ['kraken', 'coinbase', 'kucoin', 'bitfinex', 'huobi', 'okex']
-    
-    # Remove excluded exchanges
-    if excluded_exchanges:
-        fallback_exchanges = [ex for ex in fallback_exchanges if ex not in excluded_exchanges]
-    
-    # Try each fallback exchange
-    for exchange_id in fallback_exchanges:
-        print(f"Attempting to fetch ticker from fallback exchange: {exchange_id}")
-        ticker = fetch_ticker(exchange_id, symbol, fallback=False)  # Prevent infinite recursion
-        if ticker is not None:
-            print(f"Successfully fetched ticker from fallback exchange: {exchange_id}")
-            return ticker
+    return _try_fallbacks(
+        lambda exchange_id: fetch_ticker(exchange_id, symbol, fallback=False),  # Prevent infinite recursion
+        excluded_exchanges, "ticker data"
+    )
+
+def quote_symbols(markets, quote_currency):
+    """
+    Active spot symbols quoted in a currency, from ccxt's parsed markets
     
-    print("All fallback exchanges failed. No ticker data could be retrieved.")
-    return None
+    Args:
+        markets (dict): Markets of a loaded exchange (symbol -> market)
+        quote_currency (str): Quote currency (e.g., 'USDT', 'USD', 'BTC')
+        
+    Returns:
+        list: Matching symbols
+    """
+    # 'active' is None when the exchange doesn't report it; only skip explicit delistings
+    return [
+        symbol for symbol, market in markets.items()
+        if market.get('quote') == quote_currency
+        and market.get('spot', True)
+        and market.get('active') is not False
+    ]
 
 def get_available_symbols(exchange_id, quote_currency='USDT', min_volume=100000, fallback=True):
     """
@@ -328,49 +729,57 @@ def get_available_symbols(exchange_id, quote_currency='USDT', min_volume=100000,
         list: List of available symbols meeting the criteria
     """
     try:
-        # Initialize exchange
-        exchange = initialize_exchange(exchange_id)
+        # Shared exchange instance; its markets are already loaded
+        exchange = get_exchange(exchange_id)
         
         if exchange is None:
             if fallback:
-                print(f"Failed to initialize {exchange_id}, trying fallback exchange for symbols...")
+                logger.warning("Failed to initialize %s, trying fallback exchange for symbols...", exchange_id)
                 return get_available_symbols_from_fallback(quote_currency, min_volume, [exchange_id])
             return []
         
-        # Load markets
-        markets = exchange.load_markets()
+        markets = exchange.markets
         
-        # Filter symbols by quote currency and volume
+        # Candidate symbols with the requested quote currency
+        candidates = quote_symbols(markets, quote_currency)
+        
+        # Filter symbols by volume
         filtered_symbols = []
         
-        for symbol in markets:
-            # Check if the symbol ends with the quote currency
-            if not symbol.endswith(f'/{quote_currency}'):
-                continue
+        if exchange.has.get('fetchTickers'):
+            # One request for every ticker instead of one per symbol
+            tickers = exchange.fetch_tickers()
                 
-            try:
-                # Fetch ticker to get volume info
-                ticker = exchange.fetch_ticker(symbol)
+            # Check if volume meets minimum requirements (convert to USD)
+            filtered_symbols = [
+                symbol for symbol in candidates
+                if (tickers.get(symbol, {}).get('quoteVolume') or 0) >= min_volume
+            ]
+        else:
+            for symbol in candidates:
+                try:
+                    # Fetch ticker to get volume info
+                    ticker = exchange.fetch_ticker(symbol)
                 
-                # Check if volume meets minimum requirements (convert to USD)
-                volume_usd = ticker.get('quoteVolume', 0)
+                    # Check if volume meets minimum requirements (convert to USD)
+                    volume_usd = ticker.get('quoteVolume') or 0
                 
-                if volume_usd >= min_volume:
-                    filtered_symbols.append(symbol)
-            except Exception as e:
-                print(f"Error checking volume for {symbol}: {str(e)}")
-                continue
+                    if volume_usd >= min_volume:
+                        filtered_symbols.append(symbol)
+                except Exception as e:
+                    logger.error("Error checking volume for %s: %s", symbol, e)
+                    continue
         
         if filtered_symbols:
             return filtered_symbols
         else:
-            print(f"No symbols with {quote_currency} and min volume {min_volume} found on {exchange_id}")
+            logger.warning("No symbols with %s and min volume %s found on %s", quote_currency, min_volume, exchange_id)
             if fallback:
                 return get_available_symbols_from_fallback(quote_currency, min_volume, [exchange_id])
             return []
     
     except Exception as e:
-        print(f"Error getting available symbols from {exchange_id}: {str(e)}")
+        logger.error("Error getting available symbols from %s: %s", exchange_id, e)
         if fallback:
             return get_available_symbols_from_fallback(quote_currency, min_volume, [exchange_id])
         return []
@@ -387,20 +796,8 @@ def get_available_symbols_from_fallback(quote_currency='USDT', min_volume=100000
     Returns:
         list: List of available symbols meeting the criteria
     """
-    # List of popular exchanges to try as fallbacks
-    fallback_exchanges = ['kraken', 'coinbase', 'kucoin', 'bitfinex', 'huobi', 'okex']
-    
-    # Remove excluded exchanges
-    if excluded_exchanges:
-        fallback_exchanges = [ex for ex in fallback_exchanges if ex not in excluded_exchanges]
-    
-    # Try each fallback exchange
-    for exchange_id in fallback_exchanges:
-        print(f"Attempting to fetch symbols from fallback exchange: {exchange_id}")
-        symbols = get_available_symbols(exchange_id, quote_currency, min_volume, fallback=False)  # Prevent infinite recursion
-        if symbols:
-            print(f"Successfully fetched symbols from fallback exchange: {exchange_id}")
-            return symbols
-    
-    print("All fallback exchanges failed. No symbols could be retrieved.")
-    return []
+    symbols = _try_fallbacks(
+        lambda exchange_id: get_available_symbols(exchange_id, quote_currency, min_volume, fallback=False),  # Prevent infinite recursion
+        excluded_exchanges, "symbols"
+    )
+    return symbols if symbols is not None else []
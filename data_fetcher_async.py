@@ -0,0 +1,295 @@
+import asyncio
+import os
+import logging
+import time
+import weakref
+import aiohttp
+import ccxt.async_support as ccxt_async
+
+from data_fetcher import (
+    ohlcv_to_dataframe, timeframe_to_seconds, fetch_market_data_from_fallback,
+    fetch_ticker_from_fallback, get_available_symbols_from_fallback, quote_symbols,
+    SYMBOLS_CACHE_TTL, MARKETS_RELOAD_INTERVAL
+)
+
+logger = logging.getLogger(__name__)
+
+# Connection limits of each event loop's HTTP session, shared by its async exchange clients
+HTTP_LIMIT_PER_HOST = 16
+DNS_CACHE_TTL = 300
+
+# HTTP session and async exchange clients of each running event loop. Both are
+# bound to the loop that created them, and every signal loop (each Start click,
+# each browser session) runs its own loop, so they are never shared between loops.
+_LOOP_CLIENTS = weakref.WeakKeyDictionary()
+
+# Filtered symbol lists: (exchange_id, quote, min_volume, markets fingerprint) -> (created_at, symbols)
+_SYMBOLS_CACHE = {}
+
+# Most filtered symbol lists kept; stale and superseded entries are evicted first
+SYMBOLS_CACHE_SIZE = 32
+
+# Last fetched frame per (exchange, symbol, timeframe, limit), with the bar it belongs to
+_OHLCV_CACHE = {}
+
+def _markets_fingerprint(exchange):
+    # Changes only when a market is listed or delisted
+    return hash(tuple(sorted(exchange.markets.keys())))
+
+def _store_symbols(cache_key, symbols, ttl):
+    # Cache a filtered symbol list, evicting entries that are expired or
+    # superseded (same lookup, older market listings), then the oldest ones
+    now = time.time()
+    for key, (created_at, _) in list(_SYMBOLS_CACHE.items()):
+        if now - created_at >= ttl or key[:3] == cache_key[:3]:
+            del _SYMBOLS_CACHE[key]
+    
+    while len(_SYMBOLS_CACHE) >= SYMBOLS_CACHE_SIZE:
+        del _SYMBOLS_CACHE[min(_SYMBOLS_CACHE, key=lambda key: _SYMBOLS_CACHE[key][0])]
+    
+    _SYMBOLS_CACHE[cache_key] = (now, tuple(symbols))
+
+class _LoopClients:
+    """
+    HTTP session and async exchange clients of one event loop, closed by
+    close_exchanges()
+    """
+    def __init__(self):
+        # One aiohttp session for every exchange client of the loop; created
+        # here so it binds to the running loop
+        connector = aiohttp.TCPConnector(limit_per_host=HTTP_LIMIT_PER_HOST, ttl_dns_cache=DNS_CACHE_TTL)
+        self.session = aiohttp.ClientSession(connector=connector)
+        
+        # Exchange clients, one per exchange_id
+        self.exchanges = {}
+        
+        # When each exchange's markets were last loaded (time.time())
+        self.markets_loaded_at = {}
+
+def _loop_clients():
+    # Clients of the running event loop, created on first use
+    loop = asyncio.get_running_loop()
+    clients = _LOOP_CLIENTS.get(loop)
+    if clients is None:
+        clients = _LOOP_CLIENTS[loop] = _LoopClients()
+    return clients
+
+async def get_exchange_async(exchange_id):
+    """
+    Get the running event loop's async exchange instance for an exchange,
+    creating it and loading its markets on first use
+    
+    Args:
+        exchange_id (str): Exchange identifier
+    
+    Returns:
+        ccxt.async_support.Exchange: Exchange instance, or None if it could not be initialized
+    """
+    clients = _loop_clients()
+    exchange = clients.exchanges.get(exchange_id)
+    if exchange is not None:
+        return exchange
+    
+    try:
+        # Create exchange instance
+        exchange_class = getattr(ccxt_async, exchange_id)
+        exchange = exchange_class({
+            'enableRateLimit': True,
+            'timeout': 30000,
+            'adjustForTimeDifference': True,
+            'session': clients.session,
+        })
+        
+        # Use API key and secret if available
+        api_key = os.getenv(f"{exchange_id.upper()}_API_KEY", None)
+        api_secret = os.getenv(f"{exchange_id.upper()}_API_SECRET", None)
+        
+        if api_key and api_secret:
+            exchange.apiKey = api_key
+            exchange.secret = api_secret
+        
+        clients.exchanges[exchange_id] = exchange
+        await exchange.load_markets()
+        clients.markets_loaded_at[exchange_id] = time.time()
+        return exchange
+    
+    except Exception as e:
+        logger.error("Error initializing async exchange %s: %s", exchange_id, e)
+        stale = clients.exchanges.pop(exchange_id, None)
+        if stale is not None:
+            await stale.close()
+        return None
+
+async def close_exchanges():
+    """
+    Close the running event loop's async exchange instances and their shared
+    HTTP session; clients of other event loops are left open
+    """
+    clients = _LOOP_CLIENTS.pop(asyncio.get_running_loop(), None)
+    if clients is None:
+        return
+    
+    for exchange in clients.exchanges.values():
+        try:
+            await exchange.close()
+        except Exception as e:
+            logger.error("Error closing exchange %s: %s", exchange.id, e)
+    
+    # The exchanges don't own the shared session, so close it here
+    await clients.session.close()
+
+async def fetch_market_data_async(exchange_id, symbol, timeframe, limit=500, fallback=True):
+    """
+    Fetch market data from exchange without blocking the event loop
+    
+    Like fetch_market_data, results are reused until the next candle of
+    `timeframe` opens, and the returned frame must not be modified in place.
+    
+    Args:
+        exchange_id (str): Exchange identifier
+        symbol (str): Trading pair symbol
+        timeframe (str): Timeframe for the data
+        limit (int): Number of candles to fetch
+        fallback (bool): Whether to try fallback exchanges if the primary fails
+    
+    Returns:
+        pandas.DataFrame: Dataframe with market data
+    """
+    cache_key = (exchange_id, symbol, timeframe, limit)
+    bar_bucket = int(time.time() // timeframe_to_seconds(timeframe))
+    
+    cached = _OHLCV_CACHE.get(cache_key)
+    if cached is not None and cached[0] == bar_bucket:
+        return cached[1]
+    
+    try:
+        exchange = await get_exchange_async(exchange_id)
+        
+        if exchange is None:
+            raise ValueError(f"Failed to initialize {exchange_id}")
+        
+        # Fetch OHLCV data
+        ohlcv = await exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+        
+        if ohlcv:
+            df = ohlcv_to_dataframe(ohlcv)
+            _OHLCV_CACHE[cache_key] = (bar_bucket, df)
+            return df
+        
+        logger.warning("No data returned for %s from %s", symbol, exchange_id)
+    
+    except Exception as e:
+        logger.error("Error fetching market data for %s from %s: %s", symbol, exchange_id, e)
+    
+    if fallback:
+        # Fallback exchanges are rarely needed; reuse the synchronous path off the event loop
+        logger.info("Trying fallback exchange for %s...", symbol)
+        return await asyncio.to_thread(fetch_market_data_from_fallback, symbol, timeframe, limit, [exchange_id])
+    
+    return None
+
+async def fetch_ticker_async(exchange_id, symbol, fallback=True):
+    """
+    Fetch current ticker data for a symbol without blocking the event loop
+    
+    Args:
+        exchange_id (str): Exchange identifier
+        symbol (str): Trading pair symbol
+        fallback (bool): Whether to try fallback exchanges if the primary fails
+        
+    Returns:
+        dict: Ticker data
+    """
+    try:
+        exchange = await get_exchange_async(exchange_id)
+        
+        if exchange is None:
+            raise ValueError(f"Failed to initialize {exchange_id}")
+        
+        return await exchange.fetch_ticker(symbol)
+    
+    except Exception as e:
+        logger.error("Error fetching ticker for %s from %s: %s", symbol, exchange_id, e)
+    
+    if fallback:
+        logger.info("Trying fallback exchange for ticker of %s...", symbol)
+        return await asyncio.to_thread(fetch_ticker_from_fallback, symbol, [exchange_id])
+    
+    return None
+
+async def get_available_symbols_async(exchange_id, quote_currency='USDT', min_volume=100000, fallback=True, ttl=SYMBOLS_CACHE_TTL):
+    """
+    Get available trading pairs with a specific quote currency and minimum
+    volume without blocking the event loop
+    
+    Results are cached: they are reused while the exchange's market
+    listings are unchanged and the result is younger than `ttl` seconds.
+    
+    Args:
+        exchange_id (str): Exchange identifier
+        quote_currency (str): Quote currency (e.g., 'USDT', 'USD', 'BTC')
+        min_volume (float): Minimum 24h volume in USD
+        fallback (bool): Whether to try fallback exchanges if the primary fails
+        ttl (int): Cache lifetime in seconds
+        
+    Returns:
+        list: List of available symbols meeting the criteria
+    """
+    filtered_symbols = []
+    
+    try:
+        exchange = await get_exchange_async(exchange_id)
+        
+        if exchange is None:
+            raise ValueError(f"Failed to initialize {exchange_id}")
+        
+        # Pick up newly listed / delisted markets once they are old enough
+        now = time.time()
+        markets_loaded_at = _loop_clients().markets_loaded_at
+        if now - markets_loaded_at.get(exchange_id, 0) > MARKETS_RELOAD_INTERVAL:
+            await exchange.load_markets(reload=True)
+            markets_loaded_at[exchange_id] = now
+        
+        cache_key = (exchange_id, quote_currency, min_volume, _markets_fingerprint(exchange))
+        cached = _SYMBOLS_CACHE.get(cache_key)
+        if cached is not None and now - cached[0] < ttl:
+            return list(cached[1])
+        
+        # Candidate symbols with the requested quote currency
+        candidates = quote_symbols(exchange.markets, quote_currency)
+        
+        if exchange.has.get('fetchTickers'):
+            # One request for every ticker instead of one per symbol
+            tickers = await exchange.fetch_tickers()
+        else:
+            # One request per symbol, issued concurrently; ccxt's rate limiter spaces them out
+            results = await asyncio.gather(
+                *[exchange.fetch_ticker(symbol) for symbol in candidates],
+                return_exceptions=True
+            )
+            tickers = {}
+            for symbol, ticker in zip(candidates, results):
+                if isinstance(ticker, Exception):
+                    logger.error("Error checking volume for %s: %s", symbol, ticker)
+                else:
+                    tickers[symbol] = ticker
+        
+        # Check if volume meets minimum requirements (convert to USD)
+        filtered_symbols = [
+            symbol for symbol in candidates
+            if (tickers.get(symbol, {}).get('quoteVolume') or 0) >= min_volume
+        ]
+        
+        if filtered_symbols:
+            _store_symbols(cache_key, filtered_symbols, ttl)
+            return filtered_symbols
+        
+        logger.warning("No symbols with %s and min volume %s found on %s", quote_currency, min_volume, exchange_id)
+    
+    except Exception as e:
+        logger.error("Error getting available symbols from %s: %s", exchange_id, e)
+    
+    if fallback:
+        return await asyncio.to_thread(get_available_symbols_from_fallback, quote_currency, min_volume, [exchange_id])
+    
+    return filtered_symbols
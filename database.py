@@ -1,20 +1,33 @@
 import os
+import json
+import io
+import copy
+import time
+import csv
+import threading
+from contextlib import contextmanager
 import sqlalchemy as sa
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from datetime import datetime
+from sqlalchemy.pool import NullPool
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.types import JSON
+from datetime import datetime, timezone
 
 # Create a base class for declarative class definitions
 Base = declarative_base()
 
+# JSON document column: binary JSONB on PostgreSQL, JSON text elsewhere (SQLite)
+JSONDocument = JSON().with_variant(postgresql.JSONB(), 'postgresql')
+
 # Create signal table model
 class Signal(Base):
     __tablename__ = 'signals'
     
     id = Column(Integer, primary_key=True)
     signal_id = Column(String(50), unique=True)
-    timestamp = Column(DateTime, default=datetime.now)
+    timestamp = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     symbol = Column(String(20))
     signal_type = Column(String(10))  # LONG or SHORT
     strategy = Column(String(100))
@@ -29,11 +42,27 @@ class Signal(Base):
     leverage = Column(Integer)
     status = Column(String(20), default='OPEN')  # OPEN, CLOSED, HIT_TARGET1, HIT_TARGET2, STOPPED
     exit_price = Column(Float, nullable=True)
-    exit_time = Column(DateTime, nullable=True)
+    exit_time = Column(DateTime(timezone=True), nullable=True)
     profit_loss = Column(Float, nullable=True)
     exit_reason = Column(String(50), nullable=True)
     telegram_sent = Column(Boolean, default=False)
     
+    # signal_id lookups already use the index behind its unique constraint
+    __table_args__ = (
+        # get_signals(): newest first
+        Index('ix_signals_ts_desc', timestamp.desc()),
+        # Time-range scans; BRIN stays tiny on this append-only table (PostgreSQL only)
+        Index('ix_signals_ts_brin', 'timestamp', postgresql_using='brin').ddl_if(dialect='postgresql'),
+        # get_signals(open_only=True): filter on status, newest first
+        Index('ix_signals_status_ts', 'status', 'timestamp'),
+        # check_pending_signals: only the few unsent rows are indexed, oldest first
+        Index(
+            'ix_signals_pending_ts', 'timestamp',
+            postgresql_where=sa.text('telegram_sent = false'),
+            sqlite_where=sa.text('telegram_sent = 0')
+        ),
+    )
+    
     def __repr__(self):
         return f"<Signal(id={self.id}, symbol={self.symbol}, type={self.signal_type}, strategy={self.strategy})>"
 
@@ -70,7 +99,7 @@ class Configuration(Base):
     default_leverage = Column(Integer)
     risk_percent = Column(Float)
     is_active = Column(Boolean, default=True)
-    config_json = Column(Text)  # Store the full config in JSON format for future-proofing
+    config_json = Column(JSONDocument)  # Store the full config in JSON format for future-proofing
     
     def __repr__(self):
         return f"<Configuration(id={self.id}, name={self.name}, symbol={self.symbol})>"
@@ -92,35 +121,210 @@ class BacktestResult(Base):
     avg_profit = Column(Float)
     max_drawdown = Column(Float)
     profit_factor = Column(Float)
-    strategy_performance = Column(Text)  # Store strategy performance as JSON
-    config_json = Column(Text)  # Store the config used as JSON
+    strategy_performance = Column(JSONDocument)  # Store strategy performance as JSON
+    config_json = Column(JSONDocument)  # Store the config used as JSON
+    
+    __table_args__ = (
+        # get_backtest_results: newest first
+        Index('ix_backtest_ts', timestamp.desc()),
+    )
     
     def __repr__(self):
         return f"<BacktestResult(id={self.id}, symbol={self.symbol}, win_rate={self.win_rate})>"
 
+# Connection pool settings, overridable through the environment
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # seconds
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 5))  # seconds
+
+# Set when DATABASE_URL points at an external pooler (e.g. pgbouncer) that
+# already multiplexes connections, so the app should not pool on top of it.
+# Transaction pooling is safe: psycopg2 uses no server-side prepared
+# statements and the COPY staging table lives only for its own transaction.
+DB_USE_NULLPOOL = os.environ.get('DB_USE_NULLPOOL', '').lower() in ('1', 'true', 'yes')
+
+# Process-wide engine and session factory, created on first use
+_ENGINE = None
+_SESSION_FACTORY = None
+_ENGINE_LOCK = threading.Lock()
+
+# Set once the tables are known to exist; create_all runs at most once per process
+_SCHEMA_READY = False
+_SCHEMA_LOCK = threading.Lock()
+
+# Indexes replaced by newer definitions; dropped from existing databases at startup
+_SUPERSEDED_INDEXES = ('ix_signals_pending',)
+
 # Create database connection
 def get_engine():
-    database_url = os.environ.get('DATABASE_URL')
-    if not database_url:
-        raise ValueError("DATABASE_URL environment variable is not set")
+    """
+    Get the shared SQLAlchemy engine, creating it on first use
     
-    # Create SQLAlchemy engine
-    engine = create_engine(database_url)
-    return engine
+    Returns:
+        sqlalchemy.engine.Engine: Engine bound to DATABASE_URL
+    """
+    global _ENGINE, _SESSION_FACTORY
+    
+    if _ENGINE is not None:
+        return _ENGINE
+    
+    with _ENGINE_LOCK:
+        if _ENGINE is None:
+            database_url = os.environ.get('DATABASE_URL')
+            if not database_url:
+                raise ValueError("DATABASE_URL environment variable is not set")
+            
+            # Create SQLAlchemy engine; stale connections are detected before use
+            if DB_USE_NULLPOOL:
+                engine = create_engine(database_url, poolclass=NullPool, pool_pre_ping=True)
+            elif database_url.startswith('sqlite'):
+                engine = create_engine(database_url, pool_pre_ping=True)
+            else:
+                engine = create_engine(
+                    database_url,
+                    pool_size=DB_POOL_SIZE,
+                    max_overflow=DB_MAX_OVERFLOW,
+                    pool_recycle=DB_POOL_RECYCLE,
+                    pool_timeout=DB_POOL_TIMEOUT,
+                    pool_pre_ping=True
+                )
+            
+            # Objects stay readable after their session is closed
+            _SESSION_FACTORY = sessionmaker(bind=engine, expire_on_commit=False)
+            _ENGINE = engine
+    
+    return _ENGINE
+
+def init_db_schema():
+    """
+    Create any missing tables; called once at application startup
+    
+    Later calls return immediately, so helpers can call it defensively
+    without issuing catalog queries each time.
+    """
+    global _SCHEMA_READY
+    
+    if _SCHEMA_READY:
+        return
+    
+    with _SCHEMA_LOCK:
+        if not _SCHEMA_READY:
+            engine = get_engine()
+            Base.metadata.create_all(engine)
+            
+            # create_all skips tables that already exist, so add indexes
+            # introduced after a table was first created
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(engine, checkfirst=True)
+            
+            # and remove the ones they replaced
+            with engine.begin() as conn:
+                for name in _SUPERSEDED_INDEXES:
+                    conn.execute(sa.text(f"DROP INDEX IF EXISTS {name}"))
+            
+            _SCHEMA_READY = True
 
 def init_db():
-    engine = get_engine()
+    """
+    Open a new session on the shared engine
+    
+    Returns:
+        sqlalchemy.orm.Session: New session; the caller must close it
+    """
+    init_db_schema()
+    return _SESSION_FACTORY()
+
+@contextmanager
+def session_scope():
+    """
+    Session for one unit of work: committed once when the block exits,
+    rolled back if it raises, and always closed
+    
+    Yields:
+        sqlalchemy.orm.Session: Session whose changes form one transaction
+    """
+    session = init_db()
+    
+    try:
+        yield session
+        session.commit()
+    
+    except Exception:
+        session.rollback()
+        raise
+    
+    finally:
+        session.close()
+
+def _upsert(model):
+    # INSERT ... ON CONFLICT for the engine's dialect (PostgreSQL in production, SQLite for local runs)
+    dialect = get_engine().dialect.name
+    
+    if dialect == 'postgresql':
+        return postgresql.insert(model)
+    if dialect == 'sqlite':
+        return sqlite.insert(model)
     
-    # Create all tables
-    Base.metadata.create_all(engine)
+    raise NotImplementedError(f"Upserts are not supported on {dialect}")
+
+# Signal columns that can be written from a signal dictionary
+_SIGNAL_COLUMNS = frozenset(column.name for column in Signal.__table__.columns) - {'id', 'signal_id'}
+
+# Rows per multi-row INSERT issued by save_signals
+SIGNAL_BATCH_SIZE = 1000
+
+# From this many rows save_signals streams the batch with COPY on PostgreSQL
+SIGNAL_COPY_THRESHOLD = 100
+
+# Column order of the COPY stream
+_SIGNAL_COPY_COLUMNS = ('signal_id',) + tuple(sorted(_SIGNAL_COLUMNS))
+
+def _as_aware(value):
+    # datetime (or ISO 8601 string) as a timezone-aware datetime; naive values are local time
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime) and value.tzinfo is None:
+        value = value.astimezone()
+    return value
+
+def _signal_values(signal_data):
+    # Column values present in a signal dictionary, with timestamps made timezone-aware
+    values = {key: value for key, value in signal_data.items() if key in _SIGNAL_COLUMNS}
+    for key in ('timestamp', 'exit_time'):
+        if values.get(key) is not None:
+            values[key] = _as_aware(values[key])
+    return values
+
+def _signal_row(signal_data):
+    # Full row for a new signal; every row of a batch must carry the same keys
+    values = _signal_values(signal_data)
+    row = {key: values.get(key) for key in _SIGNAL_COLUMNS}
+    row['signal_id'] = signal_data.get('id')
+    row['timestamp'] = row['timestamp'] or datetime.now(timezone.utc)
+    row['status'] = row['status'] or 'OPEN'
+    row['telegram_sent'] = bool(row['telegram_sent'])
+    return row
+
+def _signal_upsert(signal_data):
+    # Insert or update in one statement keyed on the unique signal_id, returning the row
+    values = _signal_values(signal_data)
+    
+    stmt = _upsert(Signal).values(signal_id=signal_data.get('id'), **{'telegram_sent': False, **values})
+    if values:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['signal_id'],
+            set_={key: stmt.excluded[key] for key in values}
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=['signal_id'])
     
-    # Create a session factory
-    Session = sessionmaker(bind=engine)
-    return Session()
+    return stmt.returning(Signal)
 
 def save_signal(signal_data):
     """
-    Save a signal to the database
+    Save a signal to the database, updating it if a signal with the same id exists
     
     Args:
         signal_data (dict): Signal data dictionary
@@ -128,49 +332,151 @@ def save_signal(signal_data):
     Returns:
         Signal: The saved Signal object
     """
-    session = init_db()
-    
     try:
-        # Check if signal already exists
-        existing_signal = session.query(Signal).filter_by(signal_id=signal_data.get('id')).first()
-        
-        if existing_signal:
-            # Update existing signal
-            for key, value in signal_data.items():
-                if key != 'id':
-                    setattr(existing_signal, key, value)
-            signal = existing_signal
-        else:
-            # Create new signal
-            signal = Signal(
-                signal_id=signal_data.get('id'),
-                timestamp=datetime.strptime(signal_data.get('timestamp'), '%Y-%m-%d %H:%M:%S') if isinstance(signal_data.get('timestamp'), str) else signal_data.get('timestamp'),
-                symbol=signal_data.get('symbol'),
-                signal_type=signal_data.get('signal_type'),
-                strategy=signal_data.get('strategy'),
-                entry_price=signal_data.get('entry_price'),
-                current_price=signal_data.get('current_price'),
-                stop_loss=signal_data.get('stop_loss'),
-                target1=signal_data.get('target1'),
-                target2=signal_data.get('target2'),
-                risk_reward_ratio1=signal_data.get('risk_reward_ratio1'),
-                risk_reward_ratio2=signal_data.get('risk_reward_ratio2'),
-                risk_percent=signal_data.get('risk_percent'),
-                leverage=signal_data.get('leverage'),
-                telegram_sent=False
-            )
-            
-        session.add(signal)
-        session.commit()
-        return signal
+        with session_scope() as session:
+            return session.scalars(_signal_upsert(signal_data)).first()
     
     except Exception as e:
-        session.rollback()
         print(f"Error saving signal to database: {str(e)}")
         raise
+
+def save_signals(signal_dicts):
+    """
+    Save many new signals in batched multi-row INSERTs within one transaction;
+    signals whose id is already stored are left unchanged
     
-    finally:
-        session.close()
+    Args:
+        signal_dicts (list): Signal data dictionaries
+        
+    Returns:
+        int: Number of signals submitted
+    """
+    rows = [_signal_row(signal_data) for signal_data in signal_dicts]
+    if not rows:
+        return 0
+    
+    init_db_schema()
+    engine = get_engine()
+    if len(rows) >= SIGNAL_COPY_THRESHOLD and engine.dialect.name == 'postgresql':
+        return bulk_copy_signals(rows)
+    
+    stmt = _upsert(Signal).on_conflict_do_nothing(index_elements=['signal_id'])
+    
+    try:
+        with engine.begin() as conn:
+            # Chunk the input so each statement's parameter set stays bounded
+            for start in range(0, len(rows), SIGNAL_BATCH_SIZE):
+                conn.execute(stmt, rows[start:start + SIGNAL_BATCH_SIZE])
+        return len(rows)
+    
+    except Exception as e:
+        print(f"Error saving signals to database: {str(e)}")
+        raise
+
+def bulk_copy_signals(rows):
+    """
+    Load many new signals with PostgreSQL COPY; signals whose id is already
+    stored are left unchanged
+    
+    The rows are streamed as CSV into a temporary table and moved into
+    `signals` with one INSERT ... SELECT ... ON CONFLICT DO NOTHING, since
+    COPY itself cannot skip duplicates.
+    
+    Args:
+        rows (list): Signal rows as built by _signal_row
+        
+    Returns:
+        int: Number of signals submitted
+    """
+    columns = ', '.join(_SIGNAL_COPY_COLUMNS)
+    
+    # Serialize the rows as CSV; None becomes an unquoted empty field, i.e. NULL
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow([row[column] for column in _SIGNAL_COPY_COLUMNS])
+    buf.seek(0)
+    
+    init_db_schema()
+    try:
+        with get_engine().begin() as conn:
+            # Raw psycopg2 cursor on the transaction's connection
+            cursor = conn.connection.cursor()
+            try:
+                cursor.execute(
+                    f"CREATE TEMP TABLE signals_copy ON COMMIT DROP AS "
+                    f"SELECT {columns} FROM signals WITH NO DATA"
+                )
+                cursor.copy_expert(f"COPY signals_copy ({columns}) FROM STDIN WITH (FORMAT csv)", buf)
+                cursor.execute(
+                    f"INSERT INTO signals ({columns}) SELECT {columns} FROM signals_copy "
+                    f"ON CONFLICT (signal_id) DO NOTHING"
+                )
+            finally:
+                cursor.close()
+        return len(rows)
+    
+    except Exception as e:
+        print(f"Error copying signals to database: {str(e)}")
+        raise
+
+# Signal fields a notification needs (see telegram_notifier.check_and_send_pending_signals)
+_PENDING_SIGNAL_COLUMNS = (
+    'signal_id', 'timestamp', 'symbol', 'signal_type', 'strategy', 'entry_price', 'current_price',
+    'stop_loss', 'target1', 'target2', 'risk_reward_ratio1', 'risk_reward_ratio2', 'risk_percent', 'leverage'
+)
+
+# Most pending signals one check_pending_signals call returns (oldest first);
+# the rest are picked up by the next drain
+PENDING_SIGNALS_LIMIT = 100
+
+# Statements of the hot query paths, built once so SQLAlchemy's compiled
+# cache is hit on every call; values are supplied through bind parameters.
+# Reads select plain columns: rows are returned without building ORM objects.
+# Updates return the matched id, so "not found" needs no extra SELECT.
+_STMT_RECENT_SIGNALS = (
+    sa.select(*Signal.__table__.c)
+    .order_by(Signal.timestamp.desc())
+    .limit(sa.bindparam('limit'))
+)
+_STMT_RECENT_OPEN_SIGNALS = (
+    sa.select(*Signal.__table__.c)
+    .where(Signal.status == 'OPEN')
+    .order_by(Signal.timestamp.desc())
+    .limit(sa.bindparam('limit'))
+)
+_STMT_PENDING_SIGNALS = (
+    sa.select(*[Signal.__table__.c[name] for name in _PENDING_SIGNAL_COLUMNS])
+    .where(Signal.telegram_sent == sa.false())
+    .order_by(Signal.timestamp)
+    .limit(PENDING_SIGNALS_LIMIT)
+)
+_STMT_UPDATE_SIGNAL_STATUS = (
+    sa.update(Signal)
+    .where(Signal.signal_id == sa.bindparam('sid'))
+    .values(
+        # Optional exit fields keep their stored value when passed as None
+        status=sa.bindparam('status'),
+        exit_price=sa.func.coalesce(sa.bindparam('exit_price', type_=Float), Signal.exit_price),
+        exit_time=sa.func.coalesce(sa.bindparam('exit_time', type_=DateTime(timezone=True)), Signal.exit_time),
+        profit_loss=sa.func.coalesce(sa.bindparam('profit_loss', type_=Float), Signal.profit_loss),
+        exit_reason=sa.func.coalesce(sa.bindparam('exit_reason', type_=String), Signal.exit_reason)
+    )
+    .returning(Signal.id)
+)
+_STMT_MARK_TELEGRAM_SENT = (
+    sa.update(Signal)
+    .where(Signal.signal_id == sa.bindparam('sid'))
+    .values(telegram_sent=True)
+    .returning(Signal.id)
+)
+_STMT_MARK_MANY_TELEGRAM_SENT = (
+    sa.update(Signal)
+    .where(Signal.signal_id.in_(sa.bindparam('sids', expanding=True)))
+    .values(telegram_sent=True)
+    .returning(Signal.id)
+)
+_STMT_CONFIGURATION_JSON = sa.select(Configuration.config_json).where(Configuration.name == sa.bindparam('name'))
 
 def get_signals(limit=100, open_only=False):
     """
@@ -181,17 +487,13 @@ def get_signals(limit=100, open_only=False):
         open_only (bool): Only return open signals
         
     Returns:
-        list: List of Signal objects
+        list: Read-only rows with the signal columns as attributes
     """
     session = init_db()
     
     try:
-        query = session.query(Signal)
-        
-        if open_only:
-            query = query.filter(Signal.status == 'OPEN')
-        
-        return query.order_by(Signal.timestamp.desc()).limit(limit).all()
+        stmt = _STMT_RECENT_OPEN_SIGNALS if open_only else _STMT_RECENT_SIGNALS
+        return session.execute(stmt, {'limit': limit}).all()
     
     except Exception as e:
         print(f"Error getting signals from database: {str(e)}")
@@ -215,38 +517,33 @@ def update_signal_status(signal_id, status, exit_price=None, exit_time=None, pro
     Returns:
         bool: True if successful, False otherwise
     """
-    session = init_db()
-    
     try:
-        signal = session.query(Signal).filter_by(signal_id=signal_id).first()
-        
-        if signal:
-            signal.status = status
-            
-            if exit_price is not None:
-                signal.exit_price = exit_price
-                
-            if exit_time is not None:
-                signal.exit_time = exit_time
-                
-            if profit_loss is not None:
-                signal.profit_loss = profit_loss
-                
-            if exit_reason is not None:
-                signal.exit_reason = exit_reason
-                
-            session.commit()
-            return True
-        
-        return False
+        with session_scope() as session:
+            result = session.execute(_STMT_UPDATE_SIGNAL_STATUS, {
+                'sid': signal_id,
+                'status': status,
+                'exit_price': exit_price,
+                'exit_time': _as_aware(exit_time),
+                'profit_loss': profit_loss,
+                'exit_reason': exit_reason
+            })
+            return result.first() is not None
     
     except Exception as e:
-        session.rollback()
         print(f"Error updating signal status: {str(e)}")
         return False
-    
-    finally:
-        session.close()
+
+# Configuration columns that can be written from a config dictionary
+_CFG_COLS = frozenset(column.name for column in Configuration.__table__.columns) - {
+    'id', 'name', 'created_at', 'updated_at', 'is_active', 'config_json'
+}
+
+# Seconds a configuration read from the database is reused
+CONFIG_CACHE_TTL = 30
+
+# name -> (time.monotonic() when read, config dict); cleared by save_configuration
+_CONFIG_CACHE = {}
+_CONFIG_CACHE_LOCK = threading.Lock()
 
 def save_configuration(config_data, name="default"):
     """
@@ -259,103 +556,59 @@ def save_configuration(config_data, name="default"):
     Returns:
         Configuration: The saved Configuration object
     """
-    import json
-    session = init_db()
+    values = {key: value for key, value in config_data.items() if key in _CFG_COLS}
+    values['config_json'] = config_data
+    
+    # Insert or update in one statement keyed on the unique name; only the
+    # columns present in config_data are overwritten
+    stmt = _upsert(Configuration).values(name=name, **values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['name'],
+        set_={**{key: stmt.excluded[key] for key in values}, 'updated_at': datetime.now()}
+    )
     
     try:
-        # Check if configuration already exists
-        existing_config = session.query(Configuration).filter_by(name=name).first()
+        with session_scope() as session:
+            config = session.scalars(stmt.returning(Configuration)).one()
         
-        if existing_config:
-            # Update existing configuration
-            existing_config.updated_at = datetime.now()
-            existing_config.exchange = config_data.get('exchange')
-            existing_config.symbol = config_data.get('symbol')
-            existing_config.timeframe = config_data.get('timeframe')
-            existing_config.check_interval = config_data.get('check_interval')
-            existing_config.use_macd = config_data.get('use_macd')
-            existing_config.macd_fast = config_data.get('macd_fast')
-            existing_config.macd_slow = config_data.get('macd_slow')
-            existing_config.macd_signal = config_data.get('macd_signal')
-            existing_config.use_rsi = config_data.get('use_rsi')
-            existing_config.rsi_period = config_data.get('rsi_period')
-            existing_config.rsi_overbought = config_data.get('rsi_overbought')
-            existing_config.rsi_oversold = config_data.get('rsi_oversold')
-            existing_config.use_atr = config_data.get('use_atr')
-            existing_config.atr_period = config_data.get('atr_period')
-            existing_config.atr_multiplier = config_data.get('atr_multiplier')
-            existing_config.use_candlestick_patterns = config_data.get('use_candlestick_patterns')
-            existing_config.use_harmonic_patterns = config_data.get('use_harmonic_patterns')
-            existing_config.use_price_action = config_data.get('use_price_action')
-            existing_config.telegram_token = config_data.get('telegram_token')
-            existing_config.telegram_chat_id = config_data.get('telegram_chat_id')
-            existing_config.tp1_factor = config_data.get('tp1_factor')
-            existing_config.tp2_factor = config_data.get('tp2_factor')
-            existing_config.default_leverage = config_data.get('default_leverage')
-            existing_config.risk_percent = config_data.get('risk_percent')
-            existing_config.config_json = json.dumps(config_data)
-            config = existing_config
-        else:
-            # Create new configuration
-            config = Configuration(
-                name=name,
-                exchange=config_data.get('exchange'),
-                symbol=config_data.get('symbol'),
-                timeframe=config_data.get('timeframe'),
-                check_interval=config_data.get('check_interval'),
-                use_macd=config_data.get('use_macd'),
-                macd_fast=config_data.get('macd_fast'),
-                macd_slow=config_data.get('macd_slow'),
-                macd_signal=config_data.get('macd_signal'),
-                use_rsi=config_data.get('use_rsi'),
-                rsi_period=config_data.get('rsi_period'),
-                rsi_overbought=config_data.get('rsi_overbought'),
-                rsi_oversold=config_data.get('rsi_oversold'),
-                use_atr=config_data.get('use_atr'),
-                atr_period=config_data.get('atr_period'),
-                atr_multiplier=config_data.get('atr_multiplier'),
-                use_candlestick_patterns=config_data.get('use_candlestick_patterns'),
-                use_harmonic_patterns=config_data.get('use_harmonic_patterns'),
-                use_price_action=config_data.get('use_price_action'),
-                telegram_token=config_data.get('telegram_token'),
-                telegram_chat_id=config_data.get('telegram_chat_id'),
-                tp1_factor=config_data.get('tp1_factor'),
-                tp2_factor=config_data.get('tp2_factor'),
-                default_leverage=config_data.get('default_leverage'),
-                risk_percent=config_data.get('risk_percent'),
-                config_json=json.dumps(config_data)
-            )
-            
-        session.add(config)
-        session.commit()
+        with _CONFIG_CACHE_LOCK:
+            _CONFIG_CACHE.pop(name, None)
         return config
     
     except Exception as e:
-        session.rollback()
         print(f"Error saving configuration to database: {str(e)}")
         raise
-    
-    finally:
-        session.close()
 
 def get_configuration(name="default"):
     """
     Get a configuration from the database
     
+    A configuration is read at most once per CONFIG_CACHE_TTL seconds;
+    callers get their own copy and may modify it.
+    
     Args:
         name (str): Configuration name
         
     Returns:
         dict: Configuration data dictionary
     """
-    import json
+    with _CONFIG_CACHE_LOCK:
+        cached = _CONFIG_CACHE.get(name)
+    if cached is not None and time.monotonic() - cached[0] < CONFIG_CACHE_TTL:
+        return copy.deepcopy(cached[1])
+    
     session = init_db()
     
     try:
-        config = session.query(Configuration).filter_by(name=name).first()
+        read_at = time.monotonic()
+        config_json = session.scalar(_STMT_CONFIGURATION_JSON, {'name': name})
         
-        if config and config.config_json:
-            return json.loads(config.config_json)
+        if config_json:
+            # Rows written before the column became JSON still hold the serialized text
+            config = json.loads(config_json) if isinstance(config_json, str) else config_json
+            with _CONFIG_CACHE_LOCK:
+                _CONFIG_CACHE[name] = (read_at, config)
+            return copy.deepcopy(config)
         
         return None
     
@@ -376,38 +629,30 @@ def save_backtest_result(result_data):
     Returns:
         BacktestResult: The saved BacktestResult object
     """
-    import json
-    session = init_db()
+    # Create new backtest result
+    stmt = sa.insert(BacktestResult).values(
+        exchange=result_data.get('exchange'),
+        symbol=result_data.get('symbol'),
+        timeframe=result_data.get('timeframe'),
+        days=result_data.get('days'),
+        total_signals=result_data.get('total_signals'),
+        winning_signals=result_data.get('winning_signals'),
+        losing_signals=result_data.get('losing_signals'),
+        win_rate=result_data.get('win_rate'),
+        avg_profit=result_data.get('avg_profit'),
+        max_drawdown=result_data.get('max_drawdown'),
+        profit_factor=result_data.get('profit_factor'),
+        strategy_performance=result_data.get('strategy_performance', {}),
+        config_json=result_data.get('config', {})
+    )
     
     try:
-        # Create new backtest result
-        backtest_result = BacktestResult(
-            exchange=result_data.get('exchange'),
-            symbol=result_data.get('symbol'),
-            timeframe=result_data.get('timeframe'),
-            days=result_data.get('days'),
-            total_signals=result_data.get('total_signals'),
-            winning_signals=result_data.get('winning_signals'),
-            losing_signals=result_data.get('losing_signals'),
-            win_rate=result_data.get('win_rate'),
-            avg_profit=result_data.get('avg_profit'),
-            max_drawdown=result_data.get('max_drawdown'),
-            profit_factor=result_data.get('profit_factor'),
-            strategy_performance=json.dumps(result_data.get('strategy_performance', {})),
-            config_json=json.dumps(result_data.get('config', {}))
-        )
-            
-        session.add(backtest_result)
-        session.commit()
-        return backtest_result
+        with session_scope() as session:
+            return session.scalars(stmt.returning(BacktestResult)).one()
     
     except Exception as e:
-        session.rollback()
         print(f"Error saving backtest result to database: {str(e)}")
         raise
-    
-    finally:
-        session.close()
 
 def get_backtest_results(limit=10):
     """
@@ -441,37 +686,56 @@ def mark_signal_telegram_sent(signal_id):
     Returns:
         bool: True if successful, False otherwise
     """
-    session = init_db()
-    
     try:
-        signal = session.query(Signal).filter_by(signal_id=signal_id).first()
-        
-        if signal:
-            signal.telegram_sent = True
-            session.commit()
-            return True
-        
-        return False
+        with session_scope() as session:
+            result = session.execute(_STMT_MARK_TELEGRAM_SENT, {'sid': signal_id})
+            return result.first() is not None
     
     except Exception as e:
-        session.rollback()
         print(f"Error marking signal as sent to Telegram: {str(e)}")
         return False
+
+def mark_signals_telegram_sent(signal_ids):
+    """
+    Mark several signals as sent to Telegram in one transaction
     
-    finally:
-        session.close()
+    Args:
+        signal_ids (list): Signal IDs
+        
+    Returns:
+        int: Number of signals marked
+    """
+    signal_ids = list(signal_ids)
+    if not signal_ids:
+        return 0
+    
+    try:
+        with session_scope() as session:
+            marked = 0
+            # Chunk the ids to keep each statement's IN list bounded
+            for start in range(0, len(signal_ids), SIGNAL_BATCH_SIZE):
+                result = session.execute(_STMT_MARK_MANY_TELEGRAM_SENT, {'sids': signal_ids[start:start + SIGNAL_BATCH_SIZE]})
+                marked += len(result.all())
+            return marked
+    
+    except Exception as e:
+        print(f"Error marking signals as sent to Telegram: {str(e)}")
+        return 0
 
 def check_pending_signals():
     """
     Check for pending signals that haven't been sent to Telegram
     
+    One query returns the oldest PENDING_SIGNALS_LIMIT pending signals,
+    oldest first, with every field a notification needs.
+    
     Returns:
-        list: List of Signal objects
+        list: Read-only rows with the fields of _PENDING_SIGNAL_COLUMNS as attributes
     """
     session = init_db()
     
     try:
-        return session.query(Signal).filter_by(telegram_sent=False).all()
+        return session.execute(_STMT_PENDING_SIGNALS).all()
     
     except Exception as e:
         print(f"Error checking pending signals: {str(e)}")
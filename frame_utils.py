@@ -0,0 +1,47 @@
+import pandas as pd
+import numpy as np
+
+def local_extrema(values, order, kind):
+    """
+    Positions of strict local extrema: bars above (or below) every other bar
+    within `order` bars on each side, as scipy.signal.argrelextrema finds them
+    
+    Args:
+        values (numpy.ndarray): High or low prices
+        order (int): Bars on each side to compare against
+        kind (str): 'high' for local maxima, 'low' for local minima
+        
+    Returns:
+        numpy.ndarray: Positions of the extrema (never the first or last bar)
+    """
+    # Minima are the maxima of the negated prices
+    score = values if kind == 'high' else -values
+    
+    # NaN bars are never extrema and block their neighbours, as in argrelextrema;
+    # bars past the edges never block
+    big = np.finfo(np.float64).max
+    padded = np.concatenate([np.full(order, -big), np.where(np.isnan(score), big, score), np.full(order, -big)])
+    
+    # Maximum of the `order` bars before and after each bar
+    nearby = np.lib.stride_tricks.sliding_window_view(padded, order).max(axis=1)
+    before = nearby[:len(score)]
+    after = nearby[order + 1:]
+    
+    # The edge bars compare against themselves in argrelextrema's clip mode
+    extrema = (score > before) & (score > after)
+    extrema[:1] = False
+    extrema[-1:] = False
+    return np.flatnonzero(extrema)
+
+def with_columns(df, columns):
+    """
+    Frame with new columns appended in one step, leaving `df` unchanged
+    
+    Args:
+        df (pandas.DataFrame): Dataframe with market data
+        columns (dict): Column name -> numpy.ndarray of len(df)
+        
+    Returns:
+        pandas.DataFrame: New dataframe with the input and the new columns
+    """
+    return pd.concat([df, pd.DataFrame(columns, index=df.index, copy=False)], axis=1)
@@ -1,6 +1,74 @@
 import pandas as pd
 import numpy as np
-from scipy.signal import argrelextrema
+
+from jit import njit
+from frame_utils import local_extrema, with_columns
+
+# Pivot window of detect_price_action_patterns, the widest pattern lookback
+PRICE_ACTION_WINDOW = 20
+
+# Candlestick patterns computed by _candle_kernel, in its output column order
+CANDLE_PATTERNS = (
+    'doji', 'hammer', 'inverted_hammer', 'hanging_man', 'shooting_star',
+    'engulfing_bullish', 'engulfing_bearish', 'morning_star', 'evening_star',
+    'three_white_soldiers', 'three_black_crows', 'piercing_pattern', 'dark_cloud_cover',
+    'spinning_top'
+)
+
+def _pivots(values, n_points, kind):
+    """
+    Flag pivot points: bars whose value is the extreme of the centered
+    window of 2*n_points+1 bars
+    
+    Args:
+        values (numpy.ndarray): High or low prices
+        n_points (int): Bars on each side of the pivot
+        kind (str): 'high' for local maxima, 'low' for local minima
+        
+    Returns:
+        numpy.ndarray: Boolean pivot flags (False where the window is incomplete)
+    """
+    rolling = pd.Series(values).rolling(window=2*n_points+1, center=True)
+    extreme = rolling.max() if kind == 'high' else rolling.min()
+    return values == extreme.to_numpy()
+
+def _any_pattern(patterns, columns):
+    """
+    Row-wise OR of boolean pattern columns
+    
+    Args:
+        patterns (dict): Pattern name -> boolean numpy.ndarray
+        columns (tuple): Pattern column names
+        
+    Returns:
+        numpy.ndarray: True where any of the patterns is detected
+    """
+    return np.logical_or.reduce([patterns[name] for name in columns])
+
+def _last_pivot_groups(pivots, group, span, n_bars):
+    """
+    Find the runs of consecutive pivots that are the last `group` pivots of
+    some scan window of span+1 bars, as in a bar-by-bar scan that slides the
+    window over the whole frame
+    
+    Args:
+        pivots (numpy.ndarray): Sorted pivot positions
+        group (int): Number of consecutive pivots (2 for double, 3 for triple patterns)
+        span (int): Window length in bars minus one
+        n_bars (int): Number of bars in the frame
+        
+    Returns:
+        numpy.ndarray: Positions k into `pivots` of the qualifying runs pivots[k:k+group]
+    """
+    runs = len(pivots) - group + 1
+    if runs <= 0 or n_bars < span + 1:
+        return np.empty(0, dtype=np.intp)
+    
+    # All pivots of the run must fit in one window...
+    ok = pivots[group - 1:] - pivots[:runs] <= span
+    # ...that ends before the next pivot; windows start at bar 0 at the earliest
+    ok[:-1] &= pivots[group:] >= span + 1
+    return np.flatnonzero(ok)
 
 def analyze_patterns(df, config):
     """
@@ -13,8 +81,7 @@ def analyze_patterns(df, config):
     Returns:
         pandas.DataFrame: Dataframe with pattern detection columns
     """
-    # Make a copy to avoid modifying the original
-    df = df.copy()
+    # Each detector returns a new frame, so the original is never modified
     
     # Analyze candlestick patterns if enabled
     if config.get('use_candlestick_patterns', True):
@@ -30,6 +97,276 @@ def analyze_patterns(df, config):
     
     return df
 
+class PatternAnalyzer:
+    """
+    analyze_patterns for successive frames of one market, reusing the pattern
+    columns of the previous frame
+    
+    A new frame that repeats the previous one's candles (possibly with some of
+    the oldest dropped and new ones appended) only has its first and last few
+    bars re-analyzed, since every pattern rule looks at most a few price-action
+    windows around a bar; the last candle of the previous frame is treated as
+    still forming and is always re-analyzed. Any other frame is analyzed in full.
+    """
+    
+    # Bars re-analyzed before the first changed bar, and context bars in front of those
+    REUSE_MARGIN = PRICE_ACTION_WINDOW
+    CONTEXT_BARS = 5 * PRICE_ACTION_WINDOW
+    
+    def __init__(self):
+        self._ohlc = None
+        self._patterns = None
+        self._settings = None
+    
+    def analyze(self, df, config):
+        """
+        Analyze patterns in the price data, like analyze_patterns
+        
+        Args:
+            df (pandas.DataFrame): Dataframe with market data
+            config (dict): Configuration with pattern settings
+            
+        Returns:
+            pandas.DataFrame: Dataframe with pattern detection columns
+        """
+        ohlc = df[['open', 'high', 'low', 'close']]
+        settings = tuple(config.get(key, True) for key in
+                         ('use_candlestick_patterns', 'use_harmonic_patterns', 'use_price_action'))
+        
+        changed = self._first_changed_bar(ohlc) if settings == self._settings else None
+        
+        if changed is None:
+            result = analyze_patterns(df, config)
+            patterns = result[[column for column in result.columns if column not in df.columns]]
+        else:
+            patterns = self._update(df, config, changed)
+            result = pd.concat([df, patterns], axis=1)
+        
+        self._ohlc = ohlc
+        self._patterns = patterns
+        self._settings = settings
+        return result
+    
+    def _first_changed_bar(self, ohlc):
+        # Position in the new frame of the previous frame's last candle, or None
+        # if the frames don't overlap enough to reuse the cached columns
+        if self._ohlc is None or len(ohlc) == 0:
+            return None
+        
+        cached = self._ohlc
+        dropped = cached.index.get_indexer(ohlc.index[:1])[0]
+        if dropped < 0:
+            return None
+        
+        changed = len(cached) - 1 - dropped
+        reuse_from = self.CONTEXT_BARS if dropped else 0
+        if changed - self.REUSE_MARGIN - self.CONTEXT_BARS < reuse_from or changed > len(ohlc):
+            return None
+        
+        if not ohlc.iloc[:changed].equals(cached.iloc[dropped:dropped + changed]):
+            return None
+        
+        return changed
+    
+    def _update(self, df, config, changed):
+        # Cached columns between the re-analyzed head and tail of the frame
+        dropped = len(self._ohlc) - 1 - changed
+        keep_to = changed - self.REUSE_MARGIN
+        keep_from = self.CONTEXT_BARS if dropped else 0
+        parts = [self._patterns.iloc[dropped + keep_from:dropped + keep_to]]
+        
+        # Bars that lost their older neighbours: pivots and pattern windows
+        # near the start of the frame shift with it
+        if dropped:
+            head = analyze_patterns(df.iloc[:keep_from + self.REUSE_MARGIN], config)
+            parts.insert(0, head[self._patterns.columns].iloc[:keep_from])
+        
+        # Bars whose window reaches the changed candles
+        tail = analyze_patterns(df.iloc[keep_to - self.CONTEXT_BARS:], config)
+        parts.append(tail[self._patterns.columns].iloc[self.CONTEXT_BARS:])
+        
+        patterns = pd.concat(parts)
+        patterns.index = df.index
+        return patterns
+
+# Price action pattern columns, in output order
+PRICE_ACTION_PATTERNS = (
+    'double_top', 'double_bottom', 'triple_top', 'triple_bottom',
+    'head_and_shoulders', 'inverse_head_and_shoulders',
+    'ascending_triangle', 'descending_triangle', 'symmetrical_triangle',
+    'rising_wedge', 'falling_wedge',
+    'flag_bullish', 'flag_bearish', 'pennant_bullish', 'pennant_bearish'
+)
+
+# Pattern columns folded into the combined bullish / bearish columns
+BULLISH_CANDLESTICK = (
+    'hammer', 'inverted_hammer', 'engulfing_bullish',
+    'morning_star', 'three_white_soldiers', 'piercing_pattern'
+)
+BEARISH_CANDLESTICK = (
+    'hanging_man', 'shooting_star', 'engulfing_bearish',
+    'evening_star', 'three_black_crows', 'dark_cloud_cover'
+)
+BULLISH_HARMONIC = (
+    'gartley_bullish', 'butterfly_bullish', 'bat_bullish',
+    'crab_bullish', 'shark_bullish'
+)
+BEARISH_HARMONIC = (
+    'gartley_bearish', 'butterfly_bearish', 'bat_bearish',
+    'crab_bearish', 'shark_bearish'
+)
+BULLISH_PRICE_ACTION = (
+    'double_bottom', 'triple_bottom', 'inverse_head_and_shoulders',
+    'ascending_triangle', 'falling_wedge', 'flag_bullish', 'pennant_bullish'
+)
+BEARISH_PRICE_ACTION = (
+    'double_top', 'triple_top', 'head_and_shoulders',
+    'descending_triangle', 'rising_wedge', 'flag_bearish', 'pennant_bearish'
+)
+
+# Harmonic patterns (simplified ratios) and the accepted centers of their
+# AB/XA, BC/AB and CD/BC retracements; NaN pads patterns with one center
+HARMONIC_PATTERNS = ('gartley', 'butterfly', 'bat', 'crab', 'shark')
+HARMONIC_RATIOS = np.array([
+    [[0.618, np.nan], [0.382, np.nan], [1.272, 1.618]],  # Gartley
+    [[0.786, np.nan], [0.382, 0.886], [1.618, 2.618]],  # Butterfly
+    [[0.382, 0.5], [0.382, 0.886], [1.618, 2.618]],  # Bat
+    [[0.382, 0.618], [0.382, 0.886], [2.618, 3.618]],  # Crab
+    [[1.13, 1.618], [1.13, 1.618], [1.13, 1.618]],  # Shark
+])
+
+@njit(cache=True)
+def _candle_kernel(o, h, l, c, out):
+    """
+    Evaluate every candlestick rule in one pass over the OHLC arrays
+    
+    Not parallel: frames are already analyzed concurrently on worker threads,
+    and numba's default threading layer cannot be entered from several threads.
+    NaN prices fail every rule, as in the comparisons they replace.
+    
+    Args:
+        o, h, l, c (numpy.ndarray): Open, high, low and close prices
+        out (numpy.ndarray): (n, len(CANDLE_PATTERNS)) boolean matrix, filled in place
+    """
+    n = o.shape[0]
+    
+    for i in range(n):
+        body = abs(c[i] - o[i])
+        rng = h[i] - l[i]
+        top = max(o[i], c[i])
+        bottom = min(o[i], c[i])
+        upper = h[i] - top
+        lower = bottom - l[i]
+        bull = c[i] > o[i]
+        bear = c[i] < o[i]
+        
+        # Range ratios, 0 for zero-range candles
+        inv_rng = 1.0 / rng if rng > 0 else 0.0
+        body_pct = body * inv_rng
+        upper_pct = upper * inv_rng
+        lower_pct = lower * inv_rng
+        
+        # Doji
+        out[i, 0] = body_pct < 0.1 and h[i] > l[i]
+        
+        # Single-candle reversal shapes
+        long_lower = lower > body * 2 and upper < body * 0.1 and body_pct < 0.3 and lower_pct > 0.6
+        long_upper = upper > body * 2 and lower < body * 0.1 and body_pct < 0.3 and upper_pct > 0.6
+        out[i, 1] = bull and long_lower  # hammer
+        out[i, 2] = bull and long_upper  # inverted hammer
+        out[i, 3] = bear and long_lower  # hanging man
+        out[i, 4] = bear and long_upper  # shooting star
+        
+        # Spinning top
+        out[i, 13] = body_pct < 0.3 and upper_pct > 0.3 and lower_pct > 0.3
+        
+        if i < 1:
+            continue
+        
+        # Two-candle patterns
+        o1 = o[i - 1]
+        c1 = c[i - 1]
+        bull1 = c1 > o1
+        bear1 = c1 < o1
+        mid1 = (o1 + c1) / 2
+        out[i, 5] = bull and bear1 and o[i] < c1 and c[i] > o1  # bullish engulfing
+        out[i, 6] = bear and bull1 and o[i] > c1 and c[i] < o1  # bearish engulfing
+        out[i, 11] = bull and bear1 and o[i] < c1 and c[i] > mid1 and c[i] < o1  # piercing
+        out[i, 12] = bear and bull1 and o[i] > c1 and c[i] < mid1 and c[i] > o1  # dark cloud cover
+        
+        if i < 2:
+            continue
+        
+        # Three-candle patterns
+        o2 = o[i - 2]
+        c2 = c[i - 2]
+        bull2 = c2 > o2
+        bear2 = c2 < o2
+        body1 = abs(c1 - o1)
+        body2 = abs(c2 - o2)
+        mid2 = (o2 + c2) / 2
+        star = body1 < 0.3 * body2 and body > 0.6 * body2
+        out[i, 7] = bull and bear2 and star and c[i] > mid2  # morning star
+        out[i, 8] = bear and bull2 and star and c[i] < mid2  # evening star
+        out[i, 9] = (bull and bull1 and bull2 and c[i] > c1 and c1 > c2 and o[i] > o1 and o1 > o2
+                     and o[i] < c1 and o1 < c2)  # three white soldiers
+        out[i, 10] = (bear and bear1 and bear2 and c[i] < c1 and c1 < c2 and o[i] < o1 and o1 < o2
+                      and o[i] > c1 and o1 > c2)  # three black crows
+
+@njit(cache=True)
+def _harmonic_hits(xabcd, centers, tolerance):
+    """
+    Match the XA, AB, BC and CD legs of five swing points against the harmonic
+    ratio table (simplified; bullish and bearish patterns share the ratios)
+    
+    Args:
+        xabcd (numpy.ndarray): Prices of the X, A, B, C and D points
+        centers (numpy.ndarray): HARMONIC_RATIOS
+        tolerance (float): Accepted distance of each ratio from one of its centers
+        
+    Returns:
+        tuple: (boolean numpy.ndarray of hits per pattern, whether the CD leg moves down)
+    """
+    # Calculate simple XA, AB, BC, CD moves
+    xa = xabcd[1] - xabcd[0]
+    ab = xabcd[2] - xabcd[1]
+    bc = xabcd[3] - xabcd[2]
+    cd = xabcd[4] - xabcd[3]
+    
+    # Retracement ratios, 0 where the previous leg is flat
+    ratios = np.zeros(3)
+    if xa != 0:
+        ratios[0] = abs(ab / xa)
+    if ab != 0:
+        ratios[1] = abs(bc / ab)
+    if bc != 0:
+        ratios[2] = abs(cd / bc)
+    
+    # Every ratio must be within tolerance of one of the pattern's centers (NaN pads)
+    hits = np.zeros(centers.shape[0], dtype=np.bool_)
+    for p in range(centers.shape[0]):
+        hit = True
+        for r in range(3):
+            near = False
+            for j in range(centers.shape[2]):
+                if abs(ratios[r] - centers[p, r, j]) < tolerance:
+                    near = True
+            hit = hit and near
+        hits[p] = hit
+    
+    return hits, cd < 0
+
+def warmup_patterns():
+    """
+    Compile the candlestick and harmonic kernels ahead of the first market scan
+    (no-op cost once numba's on-disk cache is populated)
+    """
+    # Fetched frames are float32 (data_fetcher.OHLCV_DTYPE); float64 frames compile on first use
+    sample = np.linspace(1.0, 2.0, 8, dtype=np.float32)
+    _candle_kernel(sample, sample + 0.1, sample - 0.1, sample[::-1].copy(),
+                   np.zeros((8, len(CANDLE_PATTERNS)), dtype=np.bool_))
+    _harmonic_hits(sample[:5], HARMONIC_RATIOS, 0.05)
+
 def detect_candlestick_patterns(df):
     """
     Detect candlestick patterns
@@ -38,140 +375,52 @@ def detect_candlestick_patterns(df):
         df (pandas.DataFrame): Dataframe with market data
         
     Returns:
-        pandas.DataFrame: Dataframe with candlestick pattern detection columns
+        pandas.DataFrame: New dataframe with candlestick pattern detection columns (`df` is not modified)
     """
+    # Raw OHLC arrays for the candle metrics and the pattern kernel, in the
+    # frame's own dtype (float32 for fetched data, no cast)
+    o, h, l, c = df[['open', 'high', 'low', 'close']].to_numpy().T
+    
     # Calculate basic candle metrics
-    df['body_size'] = abs(df['close'] - df['open'])
-    df['upper_shadow'] = df['high'] - df[['open', 'close']].max(axis=1)
-    df['lower_shadow'] = df[['open', 'close']].min(axis=1) - df['low']
-    df['is_bullish'] = df['close'] > df['open']
-    df['is_bearish'] = df['close'] < df['open']
-    df['body_percentage'] = df['body_size'] / (df['high'] - df['low'])
-    df['upper_shadow_percentage'] = df['upper_shadow'] / (df['high'] - df['low'])
-    df['lower_shadow_percentage'] = df['lower_shadow'] / (df['high'] - df['low'])
-    
-    # Doji pattern
-    df['doji'] = (df['body_size'] / (df['high'] - df['low']) < 0.1) & (df['high'] > df['low'])
-    
-    # Hammer pattern (bullish)
-    df['hammer'] = (df['is_bullish']) & \
-                   (df['lower_shadow'] > 2 * df['body_size']) & \
-                   (df['upper_shadow'] < 0.1 * df['body_size']) & \
-                   (df['body_percentage'] < 0.3) & \
-                   (df['lower_shadow_percentage'] > 0.6)
-    
-    # Inverted hammer pattern (bullish)
-    df['inverted_hammer'] = (df['is_bullish']) & \
-                            (df['upper_shadow'] > 2 * df['body_size']) & \
-                            (df['lower_shadow'] < 0.1 * df['body_size']) & \
-                            (df['body_percentage'] < 0.3) & \
-                            (df['upper_shadow_percentage'] > 0.6)
-    
-    # Hanging man pattern (bearish)
-    df['hanging_man'] = (df['is_bearish']) & \
-                        (df['lower_shadow'] > 2 * df['body_size']) & \
-                        (df['upper_shadow'] < 0.1 * df['body_size']) & \
-                        (df['body_percentage'] < 0.3) & \
-                        (df['lower_shadow_percentage'] > 0.6)
-    
-    # Shooting star pattern (bearish)
-    df['shooting_star'] = (df['is_bearish']) & \
-                          (df['upper_shadow'] > 2 * df['body_size']) & \
-                          (df['lower_shadow'] < 0.1 * df['body_size']) & \
-                          (df['body_percentage'] < 0.3) & \
-                          (df['upper_shadow_percentage'] > 0.6)
-    
-    # Engulfing patterns
-    df['prev_close'] = df['close'].shift(1)
-    df['prev_open'] = df['open'].shift(1)
-    df['prev_is_bullish'] = df['is_bullish'].shift(1)
-    df['prev_is_bearish'] = df['is_bearish'].shift(1)
-    
-    # Bullish engulfing
-    df['engulfing_bullish'] = (df['is_bullish']) & \
-                              (df['prev_is_bearish']) & \
-                              (df['open'] < df['prev_close']) & \
-                              (df['close'] > df['prev_open'])
-    
-    # Bearish engulfing
-    df['engulfing_bearish'] = (df['is_bearish']) & \
-                              (df['prev_is_bullish']) & \
-                              (df['open'] > df['prev_close']) & \
-                              (df['close'] < df['prev_open'])
-    
-    # Morning star pattern (bullish)
-    df['morning_star'] = (df['is_bullish']) & \
-                         (df['prev_is_bearish'].shift(1)) & \
-                         (df['body_size'].shift(1) < 0.3 * df['body_size'].shift(2)) & \
-                         (df['body_size'] > 0.6 * df['body_size'].shift(2)) & \
-                         (df['close'] > (df['open'].shift(2) + df['close'].shift(2)) / 2)
-    
-    # Evening star pattern (bearish)
-    df['evening_star'] = (df['is_bearish']) & \
-                         (df['prev_is_bullish'].shift(1)) & \
-                         (df['body_size'].shift(1) < 0.3 * df['body_size'].shift(2)) & \
-                         (df['body_size'] > 0.6 * df['body_size'].shift(2)) & \
-                         (df['close'] < (df['open'].shift(2) + df['close'].shift(2)) / 2)
-    
-    # Three white soldiers (bullish)
-    df['three_white_soldiers'] = (df['is_bullish']) & \
-                                (df['is_bullish'].shift(1)) & \
-                                (df['is_bullish'].shift(2)) & \
-                                (df['close'] > df['close'].shift(1)) & \
-                                (df['close'].shift(1) > df['close'].shift(2)) & \
-                                (df['open'] > df['open'].shift(1)) & \
-                                (df['open'].shift(1) > df['open'].shift(2)) & \
-                                (df['open'] < df['close'].shift(1)) & \
-                                (df['open'].shift(1) < df['close'].shift(2))
-    
-    # Three black crows (bearish)
-    df['three_black_crows'] = (df['is_bearish']) & \
-                             (df['is_bearish'].shift(1)) & \
-                             (df['is_bearish'].shift(2)) & \
-                             (df['close'] < df['close'].shift(1)) & \
-                             (df['close'].shift(1) < df['close'].shift(2)) & \
-                             (df['open'] < df['open'].shift(1)) & \
-                             (df['open'].shift(1) < df['open'].shift(2)) & \
-                             (df['open'] > df['close'].shift(1)) & \
-                             (df['open'].shift(1) > df['close'].shift(2))
-    
-    # Piercing pattern (bullish)
-    df['piercing_pattern'] = (df['is_bullish']) & \
-                            (df['prev_is_bearish']) & \
-                            (df['open'] < df['prev_close']) & \
-                            (df['close'] > (df['prev_open'] + df['prev_close']) / 2) & \
-                            (df['close'] < df['prev_open'])
-    
-    # Dark cloud cover (bearish)
-    df['dark_cloud_cover'] = (df['is_bearish']) & \
-                            (df['prev_is_bullish']) & \
-                            (df['open'] > df['prev_close']) & \
-                            (df['close'] < (df['prev_open'] + df['prev_close']) / 2) & \
-                            (df['close'] > df['prev_open'])
-    
-    # Spinning top
-    df['spinning_top'] = (df['body_percentage'] < 0.3) & \
-                         (df['upper_shadow_percentage'] > 0.3) & \
-                         (df['lower_shadow_percentage'] > 0.3)
-    
-    # Add combined column for bullish and bearish patterns
-    bullish_patterns = [
-        'hammer', 'inverted_hammer', 'engulfing_bullish', 
-        'morning_star', 'three_white_soldiers', 'piercing_pattern'
-    ]
-    
-    bearish_patterns = [
-        'hanging_man', 'shooting_star', 'engulfing_bearish',
-        'evening_star', 'three_black_crows', 'dark_cloud_cover'
-    ]
+    body = np.abs(c - o)
+    rng = h - l
+    upper = h - np.fmax(o, c)
+    lower = np.fmin(o, c) - l
+    is_bull = c > o
+    is_bear = c < o
+    
+    # One division for all range ratios; zero-range candles get ratio 0
+    inv_rng = np.zeros_like(rng)
+    np.divide(1.0, rng, out=inv_rng, where=rng > 0)
+    body_pct = body * inv_rng
+    upper_pct = upper * inv_rng
+    lower_pct = lower * inv_rng
+    
+    patterns = {
+        'body_size': body,
+        'upper_shadow': upper,
+        'lower_shadow': lower,
+        'is_bullish': is_bull,
+        'is_bearish': is_bear,
+        'body_percentage': body_pct,
+        'upper_shadow_percentage': upper_pct,
+        'lower_shadow_percentage': lower_pct,
+    }
+    
+    # All pattern rules in one fused pass
+    matrix = np.zeros((len(df), len(CANDLE_PATTERNS)), dtype=np.bool_)
+    _candle_kernel(o, h, l, c, matrix)
+    for j, name in enumerate(CANDLE_PATTERNS):
+        patterns[name] = matrix[:, j]
     
     # Check if any bullish patterns are detected
-    df['bullish_candlestick'] = df[bullish_patterns].any(axis=1)
+    patterns['bullish_candlestick'] = _any_pattern(patterns, BULLISH_CANDLESTICK)
     
     # Check if any bearish patterns are detected
-    df['bearish_candlestick'] = df[bearish_patterns].any(axis=1)
+    patterns['bearish_candlestick'] = _any_pattern(patterns, BEARISH_CANDLESTICK)
     
-    return df
+    # Attach every column in one step
+    return with_columns(df, patterns)
 
 def detect_harmonic_patterns(df, tolerance=0.05):
     """
@@ -182,31 +431,13 @@ def detect_harmonic_patterns(df, tolerance=0.05):
         tolerance (float): Tolerance for pattern recognition
         
     Returns:
-        pandas.DataFrame: Dataframe with harmonic pattern detection columns
+        pandas.DataFrame: New dataframe with harmonic pattern detection columns (`df` is not modified)
     """
-    # Create a copy to avoid modifying the original
-    df = df.copy()
-    
     # Add columns for harmonic patterns
-    df['gartley_bullish'] = False
-    df['gartley_bearish'] = False
-    df['butterfly_bullish'] = False
-    df['butterfly_bearish'] = False
-    df['bat_bullish'] = False
-    df['bat_bearish'] = False
-    df['crab_bullish'] = False
-    df['crab_bearish'] = False
-    df['shark_bullish'] = False
-    df['shark_bearish'] = False
-    
-    # Find local extrema (pivot points)
-    n_points = 5  # Window for local extrema detection
-    df['local_max'] = df['high'].rolling(window=2*n_points+1, center=True).apply(
-        lambda x: 1 if x[n_points] == max(x) else 0, raw=True
-    )
-    df['local_min'] = df['low'].rolling(window=2*n_points+1, center=True).apply(
-        lambda x: 1 if x[n_points] == min(x) else 0, raw=True
-    )
+    patterns = {
+        f'{name}_{side}': np.zeros(len(df), dtype=np.bool_)
+        for name in HARMONIC_PATTERNS for side in ('bullish', 'bearish')
+    }
     
     # Unable to accurately implement harmonic pattern detection in this context
     # This would require more complex algorithm with point-to-point measurement
@@ -221,131 +452,52 @@ def detect_harmonic_patterns(df, tolerance=0.05):
     last_bars = min(100, len(df))
     window = 10  # Adjust as needed for smoother extrema detection
     
+    # Five extrema include three of one kind, each more than `window` bars
+    # from the next, so shorter frames cannot contain a pattern
+    if len(df) < 2 * window + 1:
+        patterns['bullish_harmonic'] = np.zeros(len(df), dtype=np.bool_)
+        patterns['bearish_harmonic'] = np.zeros(len(df), dtype=np.bool_)
+        return with_columns(df, patterns)
+    
+    high = df['high'].values
+    low = df['low'].values
+    
     # Find local maximum and minimum indices
-    high_idx = list(argrelextrema(df['high'].values[-last_bars:], np.greater, order=window)[0])
-    low_idx = list(argrelextrema(df['low'].values[-last_bars:], np.less, order=window)[0])
+    recent_high = high[-last_bars:]
+    recent_low = low[-last_bars:]
+    high_idx = local_extrema(recent_high, window, 'high')
+    low_idx = local_extrema(recent_low, window, 'low')
     
-    # Sort all extrema by index and take the last 5 (X, A, B, C, D)
-    extrema_idx = sorted(high_idx + low_idx)[-5:]
+    # Last 5 extrema by index (X, A, B, C, D); only those 5 get sorted
+    all_idx = np.concatenate([high_idx, low_idx])
+    if all_idx.size > 5:
+        all_idx = np.partition(all_idx, -5)[-5:]
+    extrema_idx = np.sort(all_idx)
     
     # If we found at least 5 extrema points, check for patterns
     if len(extrema_idx) >= 5:
-        # Get the high/low values at the extrema points
-        extrema_values = []
-        for idx in extrema_idx:
-            if idx in high_idx:
-                extrema_values.append(df['high'].values[-last_bars:][idx])
-            else:
-                extrema_values.append(df['low'].values[-last_bars:][idx])
-        
-        # Calculate retracement levels
-        # This is a simplified approach and would need a more complex implementation for accuracy
-        if len(extrema_values) == 5:
-            xabcd = extrema_values
-            
-            # Calculate simple XA, AB, BC, CD moves
-            xa = xabcd[1] - xabcd[0]
-            ab = xabcd[2] - xabcd[1]
-            bc = xabcd[3] - xabcd[2]
-            cd = xabcd[4] - xabcd[3]
-            
-            # Calculate retracement ratios 
-            # (Simplified - for accurate pattern recognition we need to consider bullish vs bearish patterns)
-            if xa != 0:  # Avoid division by zero
-                ab_xa_ratio = abs(ab / xa)
-            else:
-                ab_xa_ratio = 0
-                
-            if ab != 0:  # Avoid division by zero
-                bc_ab_ratio = abs(bc / ab)
-            else:
-                bc_ab_ratio = 0
-                
-            if bc != 0:  # Avoid division by zero
-                cd_bc_ratio = abs(cd / bc)
-            else:
-                cd_bc_ratio = 0
-            
-            # Check if the recent structure matches any harmonic pattern
-            # Using simplified ratio checks with tolerance
-            
-            # Gartley pattern (simplified ratios)
-            # AB should retrace 61.8% of XA
-            # BC should retrace 38.2% of AB
-            # CD should retrace 127.2% to 161.8% of BC
-            if (abs(ab_xa_ratio - 0.618) < tolerance and 
-                abs(bc_ab_ratio - 0.382) < tolerance and 
-                (abs(cd_bc_ratio - 1.272) < tolerance or abs(cd_bc_ratio - 1.618) < tolerance)):
-                if cd < 0:  # Bullish pattern ends with up move
-                    df.iloc[-1, df.columns.get_loc('gartley_bullish')] = True
-                else:  # Bearish pattern ends with down move
-                    df.iloc[-1, df.columns.get_loc('gartley_bearish')] = True
-            
-            # Butterfly pattern (simplified ratios)
-            # AB should retrace 78.6% of XA
-            # BC should retrace 38.2% to 88.6% of AB
-            # CD should retrace 161.8% to 261.8% of BC
-            if (abs(ab_xa_ratio - 0.786) < tolerance and 
-                (abs(bc_ab_ratio - 0.382) < tolerance or abs(bc_ab_ratio - 0.886) < tolerance) and 
-                (abs(cd_bc_ratio - 1.618) < tolerance or abs(cd_bc_ratio - 2.618) < tolerance)):
-                if cd < 0:  # Bullish pattern ends with up move
-                    df.iloc[-1, df.columns.get_loc('butterfly_bullish')] = True
-                else:  # Bearish pattern ends with down move
-                    df.iloc[-1, df.columns.get_loc('butterfly_bearish')] = True
-            
-            # Bat pattern (simplified ratios)
-            # AB should retrace 38.2% to 50% of XA
-            # BC should retrace 38.2% to 88.6% of AB
-            # CD should retrace 161.8% to 261.8% of BC
-            if ((abs(ab_xa_ratio - 0.382) < tolerance or abs(ab_xa_ratio - 0.5) < tolerance) and 
-                (abs(bc_ab_ratio - 0.382) < tolerance or abs(bc_ab_ratio - 0.886) < tolerance) and 
-                (abs(cd_bc_ratio - 1.618) < tolerance or abs(cd_bc_ratio - 2.618) < tolerance)):
-                if cd < 0:  # Bullish pattern ends with up move
-                    df.iloc[-1, df.columns.get_loc('bat_bullish')] = True
-                else:  # Bearish pattern ends with down move
-                    df.iloc[-1, df.columns.get_loc('bat_bearish')] = True
-            
-            # Crab pattern (simplified ratios)
-            # AB should retrace 38.2% to 61.8% of XA
-            # BC should retrace 38.2% to 88.6% of AB
-            # CD should retrace 261.8% to 361.8% of BC
-            if ((abs(ab_xa_ratio - 0.382) < tolerance or abs(ab_xa_ratio - 0.618) < tolerance) and 
-                (abs(bc_ab_ratio - 0.382) < tolerance or abs(bc_ab_ratio - 0.886) < tolerance) and 
-                (abs(cd_bc_ratio - 2.618) < tolerance or abs(cd_bc_ratio - 3.618) < tolerance)):
-                if cd < 0:  # Bullish pattern ends with up move
-                    df.iloc[-1, df.columns.get_loc('crab_bullish')] = True
-                else:  # Bearish pattern ends with down move
-                    df.iloc[-1, df.columns.get_loc('crab_bearish')] = True
-            
-            # Shark pattern (simplified ratios)
-            # AB should retrace 113.0% to 161.8% of XA
-            # BC should retrace 113.0% to 161.8% of AB
-            # CD should retrace 113.0% to 161.8% of BC
-            if ((abs(ab_xa_ratio - 1.13) < tolerance or abs(ab_xa_ratio - 1.618) < tolerance) and 
-                (abs(bc_ab_ratio - 1.13) < tolerance or abs(bc_ab_ratio - 1.618) < tolerance) and 
-                (abs(cd_bc_ratio - 1.13) < tolerance or abs(cd_bc_ratio - 1.618) < tolerance)):
-                if cd < 0:  # Bullish pattern ends with up move
-                    df.iloc[-1, df.columns.get_loc('shark_bullish')] = True
-                else:  # Bearish pattern ends with down move
-                    df.iloc[-1, df.columns.get_loc('shark_bearish')] = True
+        # Get the high/low values at the extrema points; a bar that is both
+        # a high and a low extremum counts as a high
+        is_high = np.zeros(last_bars, dtype=np.bool_)
+        is_high[high_idx] = True
+        extrema_values = np.where(is_high[extrema_idx], recent_high[extrema_idx], recent_low[extrema_idx])
+        
+        # Check if the recent structure matches any harmonic pattern; bullish
+        # patterns complete with a down leg into D, bearish ones with an up leg
+        hits, bullish = _harmonic_hits(extrema_values, HARMONIC_RATIOS, tolerance)
+        side = 'bullish' if bullish else 'bearish'
+        for name, hit in zip(HARMONIC_PATTERNS, hits):
+            if hit:
+                patterns[f'{name}_{side}'][-1] = True
     
     # Add combined columns for bullish and bearish harmonic patterns
-    bullish_harmonic = [
-        'gartley_bullish', 'butterfly_bullish', 'bat_bullish',
-        'crab_bullish', 'shark_bullish'
-    ]
-    
-    bearish_harmonic = [
-        'gartley_bearish', 'butterfly_bearish', 'bat_bearish',
-        'crab_bearish', 'shark_bearish'
-    ]
+    patterns['bullish_harmonic'] = _any_pattern(patterns, BULLISH_HARMONIC)
+    patterns['bearish_harmonic'] = _any_pattern(patterns, BEARISH_HARMONIC)
     
-    df['bullish_harmonic'] = df[bullish_harmonic].any(axis=1)
-    df['bearish_harmonic'] = df[bearish_harmonic].any(axis=1)
-    
-    return df
+    # Attach every column in one step
+    return with_columns(df, patterns)
 
-def detect_price_action_patterns(df, window=20):
+def detect_price_action_patterns(df, window=PRICE_ACTION_WINDOW):
     """
     Detect price action patterns like double tops/bottoms, head and shoulders, etc.
     
@@ -354,22 +506,12 @@ def detect_price_action_patterns(df, window=20):
         window (int): Window for detecting pivots
         
     Returns:
-        pandas.DataFrame: Dataframe with price action pattern detection columns
+        pandas.DataFrame: New dataframe with price action pattern detection columns (`df` is not modified)
     """
-    # Create a copy to avoid modifying the original
-    df = df.copy()
-    
-    # Add columns for various price action patterns
-    price_action_patterns = [
-        'double_top', 'double_bottom', 'triple_top', 'triple_bottom',
-        'head_and_shoulders', 'inverse_head_and_shoulders',
-        'ascending_triangle', 'descending_triangle', 'symmetrical_triangle',
-        'rising_wedge', 'falling_wedge',
-        'flag_bullish', 'flag_bearish', 'pennant_bullish', 'pennant_bearish'
-    ]
-    
-    for pattern in price_action_patterns:
-        df[pattern] = False
+    # Add columns for various price action patterns: one column-major flag
+    # matrix, with each pattern's column as a contiguous view into it
+    matrix = np.zeros((len(df), len(PRICE_ACTION_PATTERNS)), dtype=np.bool_, order='F')
+    patterns = {pattern: matrix[:, j] for j, pattern in enumerate(PRICE_ACTION_PATTERNS)}
     
     # Find local extrema (pivot points)
     n_points = window  # Window for local extrema detection
@@ -377,152 +519,59 @@ def detect_price_action_patterns(df, window=20):
     # Use rolling window to find local maxima and minima
     # A local maximum is where the price is higher than all prices in the window
     # A local minimum is where the price is lower than all prices in the window
-    df['pivot_high'] = df['high'].rolling(window=2*n_points+1, center=True).apply(
-        lambda x: 1 if x[n_points] == max(x) else 0, raw=True
-    )
-    df['pivot_low'] = df['low'].rolling(window=2*n_points+1, center=True).apply(
-        lambda x: 1 if x[n_points] == min(x) else 0, raw=True
-    )
-    
-    # Check for double top pattern
-    for i in range(len(df) - n_points):
-        if i + 2*n_points >= len(df):
-            continue
-            
-        # Get recent pivot highs
-        pivot_highs = df.iloc[i:i+2*n_points+1]['pivot_high']
-        pivot_high_indices = pivot_highs[pivot_highs == 1].index
-        
-        # Check if we have at least 2 pivot highs
-        if len(pivot_high_indices) >= 2:
-            high1_idx = pivot_high_indices[-2]
-            high2_idx = pivot_high_indices[-1]
-            
-            high1 = df.loc[high1_idx, 'high']
-            high2 = df.loc[high2_idx, 'high']
-            
-            # Check if the two highs are within 1% of each other
-            if abs(high2 - high1) / high1 < 0.01:
-                # Check if there's a pivot low between them
-                between_lows = df.loc[high1_idx:high2_idx, 'pivot_low']
-                if between_lows.sum() >= 1:
-                    df.loc[high2_idx, 'double_top'] = True
-    
-    # Check for double bottom pattern
-    for i in range(len(df) - n_points):
-        if i + 2*n_points >= len(df):
-            continue
-            
-        # Get recent pivot lows
-        pivot_lows = df.iloc[i:i+2*n_points+1]['pivot_low']
-        pivot_low_indices = pivot_lows[pivot_lows == 1].index
-        
-        # Check if we have at least 2 pivot lows
-        if len(pivot_low_indices) >= 2:
-            low1_idx = pivot_low_indices[-2]
-            low2_idx = pivot_low_indices[-1]
-            
-            low1 = df.loc[low1_idx, 'low']
-            low2 = df.loc[low2_idx, 'low']
-            
-            # Check if the two lows are within 1% of each other
-            if abs(low2 - low1) / low1 < 0.01:
-                # Check if there's a pivot high between them
-                between_highs = df.loc[low1_idx:low2_idx, 'pivot_high']
-                if between_highs.sum() >= 1:
-                    df.loc[low2_idx, 'double_bottom'] = True
-    
-    # Check for triple top pattern (simplified)
-    for i in range(len(df) - 2*n_points):
-        if i + 3*n_points >= len(df):
-            continue
-            
-        # Get recent pivot highs
-        pivot_highs = df.iloc[i:i+3*n_points+1]['pivot_high']
-        pivot_high_indices = pivot_highs[pivot_highs == 1].index
-        
-        # Check if we have at least 3 pivot highs
-        if len(pivot_high_indices) >= 3:
-            high1_idx = pivot_high_indices[-3]
-            high2_idx = pivot_high_indices[-2]
-            high3_idx = pivot_high_indices[-1]
-            
-            high1 = df.loc[high1_idx, 'high']
-            high2 = df.loc[high2_idx, 'high']
-            high3 = df.loc[high3_idx, 'high']
-            
-            # Check if the three highs are within 1% of each other
-            if (abs(high2 - high1) / high1 < 0.01) and (abs(high3 - high1) / high1 < 0.01):
-                df.loc[high3_idx, 'triple_top'] = True
-    
-    # Check for triple bottom pattern (simplified)
-    for i in range(len(df) - 2*n_points):
-        if i + 3*n_points >= len(df):
-            continue
-            
-        # Get recent pivot lows
-        pivot_lows = df.iloc[i:i+3*n_points+1]['pivot_low']
-        pivot_low_indices = pivot_lows[pivot_lows == 1].index
-        
-        # Check if we have at least 3 pivot lows
-        if len(pivot_low_indices) >= 3:
-            low1_idx = pivot_low_indices[-3]
-            low2_idx = pivot_low_indices[-2]
-            low3_idx = pivot_low_indices[-1]
-            
-            low1 = df.loc[low1_idx, 'low']
-            low2 = df.loc[low2_idx, 'low']
-            low3 = df.loc[low3_idx, 'low']
-            
-            # Check if the three lows are within 1% of each other
-            if (abs(low2 - low1) / low1 < 0.01) and (abs(low3 - low1) / low1 < 0.01):
-                df.loc[low3_idx, 'triple_bottom'] = True
-    
-    # Check for head and shoulders pattern (simplified)
-    for i in range(len(df) - 2*n_points):
-        if i + 3*n_points >= len(df):
-            continue
-            
-        # Get recent pivot highs
-        pivot_highs = df.iloc[i:i+3*n_points+1]['pivot_high']
-        pivot_high_indices = pivot_highs[pivot_highs == 1].index
-        
-        # Check if we have at least 3 pivot highs
-        if len(pivot_high_indices) >= 3:
-            left_shoulder_idx = pivot_high_indices[-3]
-            head_idx = pivot_high_indices[-2]
-            right_shoulder_idx = pivot_high_indices[-1]
-            
-            left_shoulder = df.loc[left_shoulder_idx, 'high']
-            head = df.loc[head_idx, 'high']
-            right_shoulder = df.loc[right_shoulder_idx, 'high']
-            
-            # Check if head is higher than shoulders and shoulders are within 5% of each other
-            if (head > left_shoulder) and (head > right_shoulder) and (abs(right_shoulder - left_shoulder) / left_shoulder < 0.05):
-                df.loc[right_shoulder_idx, 'head_and_shoulders'] = True
-    
-    # Check for inverse head and shoulders pattern (simplified)
-    for i in range(len(df) - 2*n_points):
-        if i + 3*n_points >= len(df):
-            continue
-            
-        # Get recent pivot lows
-        pivot_lows = df.iloc[i:i+3*n_points+1]['pivot_low']
-        pivot_low_indices = pivot_lows[pivot_lows == 1].index
-        
-        # Check if we have at least 3 pivot lows
-        if len(pivot_low_indices) >= 3:
-            left_shoulder_idx = pivot_low_indices[-3]
-            head_idx = pivot_low_indices[-2]
-            right_shoulder_idx = pivot_low_indices[-1]
-            
-            left_shoulder = df.loc[left_shoulder_idx, 'low']
-            head = df.loc[head_idx, 'low']
-            right_shoulder = df.loc[right_shoulder_idx, 'low']
-            
-            # Check if head is lower than shoulders and shoulders are within 5% of each other
-            if (head < left_shoulder) and (head < right_shoulder) and (abs(right_shoulder - left_shoulder) / left_shoulder < 0.05):
-                df.loc[right_shoulder_idx, 'inverse_head_and_shoulders'] = True
+    high = df['high'].values
+    low = df['low'].values
+    patterns['pivot_high'] = _pivots(high, n_points, 'high')
+    patterns['pivot_low'] = _pivots(low, n_points, 'low')
+    
+    # Pivot positions, and running pivot counts for "pivot in between" checks
+    ph = np.flatnonzero(patterns['pivot_high'])
+    pl = np.flatnonzero(patterns['pivot_low'])
+    high_count = np.concatenate(([0], np.cumsum(patterns['pivot_high'])))
+    low_count = np.concatenate(([0], np.cumsum(patterns['pivot_low'])))
+    
+    # Zero or NaN prices give inf/NaN ratios, which simply fail the tests below
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Check for double top pattern: the last two pivot highs of a 2n+1 bar window
+        # within 1% of each other, with a pivot low between them
+        k = _last_pivot_groups(ph, 2, 2*n_points, len(df))
+        high1, high2 = high[ph[k]], high[ph[k + 1]]
+        between_lows = low_count[ph[k + 1] + 1] - low_count[ph[k]]
+        hit = (np.abs(high2 - high1) / high1 < 0.01) & (between_lows >= 1)
+        patterns['double_top'][ph[k + 1][hit]] = True
+        
+        # Check for double bottom pattern: the mirror image on pivot lows
+        k = _last_pivot_groups(pl, 2, 2*n_points, len(df))
+        low1, low2 = low[pl[k]], low[pl[k + 1]]
+        between_highs = high_count[pl[k + 1] + 1] - high_count[pl[k]]
+        hit = (np.abs(low2 - low1) / low1 < 0.01) & (between_highs >= 1)
+        patterns['double_bottom'][pl[k + 1][hit]] = True
+        
+        # Check for triple top pattern (simplified): the last three pivot highs
+        # of a 3n+1 bar window within 1% of the first
+        k = _last_pivot_groups(ph, 3, 3*n_points, len(df))
+        high1, high2, high3 = high[ph[k]], high[ph[k + 1]], high[ph[k + 2]]
+        hit = (np.abs(high2 - high1) / high1 < 0.01) & (np.abs(high3 - high1) / high1 < 0.01)
+        patterns['triple_top'][ph[k + 2][hit]] = True
+        
+        # Check for head and shoulders pattern (simplified): same pivot triples,
+        # head above both shoulders and shoulders within 5% of each other
+        left_shoulder, head, right_shoulder = high1, high2, high3
+        hit = (head > left_shoulder) & (head > right_shoulder) & \
+              (np.abs(right_shoulder - left_shoulder) / left_shoulder < 0.05)
+        patterns['head_and_shoulders'][ph[k + 2][hit]] = True
+        
+        # Check for triple bottom pattern (simplified)
+        k = _last_pivot_groups(pl, 3, 3*n_points, len(df))
+        low1, low2, low3 = low[pl[k]], low[pl[k + 1]], low[pl[k + 2]]
+        hit = (np.abs(low2 - low1) / low1 < 0.01) & (np.abs(low3 - low1) / low1 < 0.01)
+        patterns['triple_bottom'][pl[k + 2][hit]] = True
+        
+        # Check for inverse head and shoulders pattern (simplified)
+        left_shoulder, head, right_shoulder = low1, low2, low3
+        hit = (head < left_shoulder) & (head < right_shoulder) & \
+              (np.abs(right_shoulder - left_shoulder) / left_shoulder < 0.05)
+        patterns['inverse_head_and_shoulders'][pl[k + 2][hit]] = True
     
     # Detect triangle patterns (simplified)
     # These are more complex patterns and would require trend line fitting
@@ -532,17 +581,8 @@ def detect_price_action_patterns(df, window=20):
     # that's beyond the scope of this simplified implementation
     
     # Add combined columns for bullish and bearish price action patterns
-    bullish_price_action = [
-        'double_bottom', 'triple_bottom', 'inverse_head_and_shoulders',
-        'ascending_triangle', 'falling_wedge', 'flag_bullish', 'pennant_bullish'
-    ]
+    patterns['bullish_price_action'] = _any_pattern(patterns, BULLISH_PRICE_ACTION)
+    patterns['bearish_price_action'] = _any_pattern(patterns, BEARISH_PRICE_ACTION)
     
-    bearish_price_action = [
-        'double_top', 'triple_top', 'head_and_shoulders',
-        'descending_triangle', 'rising_wedge', 'flag_bearish', 'pennant_bearish'
-    ]
-    
-    df['bullish_price_action'] = df[bullish_price_action].any(axis=1)
-    df['bearish_price_action'] = df[bearish_price_action].any(axis=1)
-    
-    return df
+    # Attach every column in one step
+    return with_columns(df, patterns)
@@ -1,7 +1,42 @@
 import pandas as pd
+import numpy as np
 from datetime import datetime
 import uuid
-from database import save_signal
+from database import save_signals
+
+# Signal rules as (config toggle, columns the group needs, rules). A group
+# is skipped when its toggle is off (None: always on) or a needed column is
+# missing; within a group, rules are tried in order and only the first fires.
+# Each rule is (columns that must all be True, signal type, strategy name).
+SIGNAL_RULES = (
+    ('use_macd', ('macd_cross_up', 'macd_cross_down'), (
+        (('macd_cross_up',), 'LONG', 'MACD Bullish Crossover'),
+        (('macd_cross_down',), 'SHORT', 'MACD Bearish Crossover'),
+    )),
+    ('use_rsi', ('rsi',), (
+        (('rsi_oversold', 'bullish_divergence'), 'LONG', 'RSI Oversold with Bullish Divergence'),
+        (('rsi_overbought', 'bearish_divergence'), 'SHORT', 'RSI Overbought with Bearish Divergence'),
+    )),
+    ('use_candlestick_patterns', (), (
+        (('bullish_candlestick', 'uptrend'), 'LONG', 'Bullish Candlestick Pattern in Uptrend'),
+        (('bearish_candlestick', 'downtrend'), 'SHORT', 'Bearish Candlestick Pattern in Downtrend'),
+    )),
+    ('use_harmonic_patterns', (), (
+        (('bullish_harmonic',), 'LONG', 'Bullish Harmonic Pattern'),
+        (('bearish_harmonic',), 'SHORT', 'Bearish Harmonic Pattern'),
+    )),
+    ('use_price_action', (), (
+        (('bullish_price_action',), 'LONG', 'Bullish Price Action Pattern'),
+        (('bearish_price_action',), 'SHORT', 'Bearish Price Action Pattern'),
+    )),
+    # Moving average crossovers and short-term momentum
+    (None, (), (
+        (('golden_cross',), 'LONG', 'Golden Cross (50 MA > 200 MA)'),
+        (('death_cross',), 'SHORT', 'Death Cross (50 MA < 200 MA)'),
+        (('short_term_bull',), 'LONG', 'Short-term Bullish Momentum (20 MA > 50 MA)'),
+        (('short_term_bear',), 'SHORT', 'Short-term Bearish Momentum (20 MA < 50 MA)'),
+    )),
+)
 
 def generate_signals(df, config):
     """
@@ -14,208 +49,214 @@ def generate_signals(df, config):
     Returns:
         list: List of dictionaries containing signal details
     """
-    # Get only the most recent candle for signal generation
-    recent_df = df.iloc[-1:].copy()
+    # Get only the most recent candle for signal generation, as a plain dict
+    # so each rule's column lookup skips pandas indexing
+    return generate_signals_row(df.iloc[-1].to_dict(), config)
+
+def generate_signals_row(row, config):
+    """
+    Generate trading signals for a single candle whose indicators and
+    patterns are already calculated
     
+    Args:
+        row (dict or pandas.Series): Column name -> value for the candle
+        config (dict): Configuration for signal generation
+        
+    Returns:
+        list: List of dictionaries containing signal details
+    """
     # List to store signals
     signals = []
     
+    # One creation time for every signal of this pass
+    created_at = datetime.now()
+    
     # Get symbol from config
     symbol = config.get('symbol', 'BTC/USDT')
     
-    # Check for MACD signals
-    if config.get('use_macd', True) and 'macd_cross_up' in df.columns and 'macd_cross_down' in df.columns:
-        # MACD bullish crossover
-        if recent_df['macd_cross_up'].iloc[0]:
-            # Generate long signal
-            signal = create_signal(
-                symbol=symbol,
-                signal_type='LONG',
-                strategy='MACD Bullish Crossover',
-                entry_price=recent_df['close'].iloc[0],
-                current_price=recent_df['close'].iloc[0],
-                config=config
-            )
-            signals.append(signal)
+    # Evaluate the rule table; within a group only the first matching rule fires
+    for config_key, required, rules in SIGNAL_RULES:
+        if config_key is not None and not config.get(config_key, True):
+            continue
+        if not all(name in row for name in required):
+            continue
         
-        # MACD bearish crossover
-        elif recent_df['macd_cross_down'].iloc[0]:
-            # Generate short signal
-            signal = create_signal(
-                symbol=symbol,
-                signal_type='SHORT',
-                strategy='MACD Bearish Crossover',
-                entry_price=recent_df['close'].iloc[0],
-                current_price=recent_df['close'].iloc[0],
-                config=config
-            )
-            signals.append(signal)
+        for columns, signal_type, strategy in rules:
+            if all(row.get(name) for name in columns):
+                signal = build_signal(
+                    symbol=symbol,
+                    signal_type=signal_type,
+                    strategy=strategy,
+                    entry_price=row['close'],
+                    current_price=row['close'],
+                    config=config,
+                    created_at=created_at
+                )
+                signals.append(signal)
+                break
+    
+    # Save every signal of this pass in one database round trip
+    save_new_signals(signals, created_at)
     
-    # Check for RSI signals
-    if config.get('use_rsi', True) and 'rsi' in df.columns:
-        # RSI oversold with bullish divergence
-        if recent_df['rsi_oversold'].iloc[0] and recent_df['bullish_divergence'].iloc[0]:
-            # Generate long signal
-            signal = create_signal(
-                symbol=symbol,
-                signal_type='LONG',
-                strategy='RSI Oversold with Bullish Divergence',
-                entry_price=recent_df['close'].iloc[0],
-                current_price=recent_df['close'].iloc[0],
-                config=config
-            )
-            signals.append(signal)
-        
-        # RSI overbought with bearish divergence
-        elif recent_df['rsi_overbought'].iloc[0] and recent_df['bearish_divergence'].iloc[0]:
-            # Generate short signal
-            signal = create_signal(
-                symbol=symbol,
-                signal_type='SHORT',
-                strategy='RSI Overbought with Bearish Divergence',
-                entry_price=recent_df['close'].iloc[0],
-                current_price=recent_df['close'].iloc[0],
-                config=config
-            )
-            signals.append(signal)
+    return signals
+
+def _batch_rules(df, config):
+    """
+    Signal rules of SIGNAL_RULES as whole-column masks
     
-    # Check for candlestick pattern signals
-    if config.get('use_candlestick_patterns', True):
-        # Bullish candlestick patterns in uptrend
-        if recent_df['bullish_candlestick'].iloc[0] and recent_df['uptrend'].iloc[0]:
-            # Generate long signal
-            signal = create_signal(
-                symbol=symbol,
-                signal_type='LONG',
-                strategy='Bullish Candlestick Pattern in Uptrend',
-                entry_price=recent_df['close'].iloc[0],
-                current_price=recent_df['close'].iloc[0],
-                config=config
-            )
-            signals.append(signal)
+    Returns:
+        list: Rule groups; within a group only the first matching rule fires.
+              Each rule is (mask, signal_type, strategy).
+    """
+    none = np.zeros(len(df), dtype=bool)
+    
+    def col(name):
+        # Boolean column as a numpy array; missing columns never fire
+        return df[name].to_numpy(dtype=bool) if name in df.columns else none
+    
+    groups = []
+    for config_key, required, rules in SIGNAL_RULES:
+        if config_key is not None and not config.get(config_key, True):
+            continue
+        if not all(name in df.columns for name in required):
+            continue
         
-        # Bearish candlestick patterns in downtrend
-        elif recent_df['bearish_candlestick'].iloc[0] and recent_df['downtrend'].iloc[0]:
-            # Generate short signal
-            signal = create_signal(
-                symbol=symbol,
-                signal_type='SHORT',
-                strategy='Bearish Candlestick Pattern in Downtrend',
-                entry_price=recent_df['close'].iloc[0],
-                current_price=recent_df['close'].iloc[0],
-                config=config
-            )
-            signals.append(signal)
+        groups.append([
+            (np.logical_and.reduce([col(name) for name in columns]), signal_type, strategy)
+            for columns, signal_type, strategy in rules
+        ])
     
-    # Check for harmonic pattern signals
-    if config.get('use_harmonic_patterns', True):
-        # Bullish harmonic patterns
-        if recent_df['bullish_harmonic'].iloc[0]:
-            # Generate long signal
-            signal = create_signal(
-                symbol=symbol,
-                signal_type='LONG',
-                strategy='Bullish Harmonic Pattern',
-                entry_price=recent_df['close'].iloc[0],
-                current_price=recent_df['close'].iloc[0],
-                config=config
-            )
-            signals.append(signal)
+    return groups
+
+def generate_signals_batch(df, config, start=1):
+    """
+    Generate the signals generate_signals_row would produce for every candle
+    at once, with conflicting signals on the same candle already filtered
+    
+    Signals are not saved to the database; this is meant for backtesting.
+    
+    Args:
+        df (pandas.DataFrame): Dataframe with market data, indicators and patterns
+        config (dict): Configuration for signal generation
+        start (int): First bar (position) to generate signals for
         
-        # Bearish harmonic patterns
-        elif recent_df['bearish_harmonic'].iloc[0]:
-            # Generate short signal
-            signal = create_signal(
-                symbol=symbol,
-                signal_type='SHORT',
-                strategy='Bearish Harmonic Pattern',
-                entry_price=recent_df['close'].iloc[0],
-                current_price=recent_df['close'].iloc[0],
-                config=config
-            )
-            signals.append(signal)
+    Returns:
+        pandas.DataFrame: One row per signal, ordered by bar, with the fields
+                          build_signal sets plus '_bar_idx' (bar position)
+    """
+    bars = []
+    types = []
+    strategies = []
     
-    # Check for price action pattern signals
-    if config.get('use_price_action', True):
-        # Bullish price action patterns
-        if recent_df['bullish_price_action'].iloc[0]:
-            # Generate long signal
-            signal = create_signal(
-                symbol=symbol,
-                signal_type='LONG',
-                strategy='Bullish Price Action Pattern',
-                entry_price=recent_df['close'].iloc[0],
-                current_price=recent_df['close'].iloc[0],
-                config=config
-            )
-            signals.append(signal)
+    for rules in _batch_rules(df, config):
+        taken = np.zeros(len(df), dtype=bool)
+        taken[:start] = True
         
-        # Bearish price action patterns
-        elif recent_df['bearish_price_action'].iloc[0]:
-            # Generate short signal
-            signal = create_signal(
-                symbol=symbol,
-                signal_type='SHORT',
-                strategy='Bearish Price Action Pattern',
-                entry_price=recent_df['close'].iloc[0],
-                current_price=recent_df['close'].iloc[0],
-                config=config
-            )
-            signals.append(signal)
+        for mask, signal_type, strategy in rules:
+            fired = mask & ~taken
+            taken |= fired
+            
+            idx = np.flatnonzero(fired)
+            bars.append(idx)
+            types.append(np.full(idx.size, signal_type, dtype=object))
+            strategies.append(np.full(idx.size, strategy, dtype=object))
+    
+    signals = pd.DataFrame({
+        '_bar_idx': np.concatenate(bars) if bars else np.empty(0, dtype=np.int64),
+        'signal_type': np.concatenate(types) if types else np.empty(0, dtype=object),
+        'strategy': np.concatenate(strategies) if strategies else np.empty(0, dtype=object)
+    })
+    
+    # Order by bar, keeping rule order within a bar
+    signals = signals.sort_values('_bar_idx', kind='stable').reset_index(drop=True)
+    
+    # Conflicting LONG/SHORT signals on a bar: keep the majority side, or the
+    # first signal on a tie (all signals share the same risk/reward ratio)
+    bar_idx = signals['_bar_idx'].to_numpy()
+    is_long = (signals['signal_type'] == 'LONG').to_numpy()
+    n_long = np.bincount(bar_idx, weights=is_long, minlength=len(df))[bar_idx]
+    n_short = np.bincount(bar_idx, minlength=len(df))[bar_idx] - n_long
+    first_on_bar = np.diff(bar_idx, prepend=-1) != 0
+    keep = (
+        (n_long == 0) | (n_short == 0)
+        | (is_long & (n_long > n_short))
+        | (~is_long & (n_short > n_long))
+        | ((n_long == n_short) & first_on_bar)
+    )
+    signals = signals[keep].reset_index(drop=True)
+    is_long = is_long[keep]
+    
+    # Prices and risk levels, as in build_signal
+    entry_price = df['close'].to_numpy(dtype=np.float64)[signals['_bar_idx'].to_numpy()]
+    direction = np.where(is_long, 1.0, -1.0)
+    
+    if config.get('use_atr', True) and 'atr' in config:
+        stop_loss = entry_price - direction * (config['atr'] * config.get('atr_multiplier', 2.0))
+    else:
+        # Default stop loss (3% from entry)
+        stop_loss = entry_price * (1 - direction * 0.03)
+    
+    risk = direction * (entry_price - stop_loss)
+    tp1_factor = config.get('tp1_factor', 2.0)
+    tp2_factor = config.get('tp2_factor', 3.0)
     
-    # Check for moving average crossover signals
-    # Golden Cross (50 MA crosses above 200 MA)
-    if 'golden_cross' in df.columns and recent_df['golden_cross'].iloc[0]:
-        signal = create_signal(
-            symbol=symbol,
-            signal_type='LONG',
-            strategy='Golden Cross (50 MA > 200 MA)',
-            entry_price=recent_df['close'].iloc[0],
-            current_price=recent_df['close'].iloc[0],
-            config=config
-        )
-        signals.append(signal)
-    
-    # Death Cross (50 MA crosses below 200 MA)
-    elif 'death_cross' in df.columns and recent_df['death_cross'].iloc[0]:
-        signal = create_signal(
-            symbol=symbol,
-            signal_type='SHORT',
-            strategy='Death Cross (50 MA < 200 MA)',
-            entry_price=recent_df['close'].iloc[0],
-            current_price=recent_df['close'].iloc[0],
-            config=config
-        )
-        signals.append(signal)
-    
-    # Short-term momentum
-    elif 'short_term_bull' in df.columns and recent_df['short_term_bull'].iloc[0]:
-        signal = create_signal(
-            symbol=symbol,
-            signal_type='LONG',
-            strategy='Short-term Bullish Momentum (20 MA > 50 MA)',
-            entry_price=recent_df['close'].iloc[0],
-            current_price=recent_df['close'].iloc[0],
-            config=config
-        )
-        signals.append(signal)
-    
-    elif 'short_term_bear' in df.columns and recent_df['short_term_bear'].iloc[0]:
-        signal = create_signal(
-            symbol=symbol,
-            signal_type='SHORT',
-            strategy='Short-term Bearish Momentum (20 MA < 50 MA)',
-            entry_price=recent_df['close'].iloc[0],
-            current_price=recent_df['close'].iloc[0],
-            config=config
-        )
-        signals.append(signal)
+    signals['timestamp'] = df.index[signals['_bar_idx'].to_numpy()].strftime('%Y-%m-%d %H:%M:%S')
+    signals['symbol'] = config.get('symbol', 'BTC/USDT')
+    signals['entry_price'] = entry_price
+    signals['current_price'] = entry_price
+    signals['stop_loss'] = stop_loss
+    signals['target1'] = entry_price + direction * risk * tp1_factor
+    signals['target2'] = entry_price + direction * risk * tp2_factor
+    signals['risk_reward_ratio1'] = float(tp1_factor)
+    signals['risk_reward_ratio2'] = float(tp2_factor)
+    signals['risk_percent'] = float(config.get('risk_percent', 1.0))
+    signals['leverage'] = int(config.get('default_leverage', 5))
     
     return signals
 
-def create_signal(symbol, signal_type, strategy, entry_price, current_price, config):
+def create_signal(symbol, signal_type, strategy, entry_price, current_price, config, created_at=None):
+    """
+    Create a signal with all required details and save it to the database
+    
+    Args:
+        symbol (str): Trading pair symbol
+        signal_type (str): 'LONG' or 'SHORT'
+        strategy (str): Name of the strategy generating the signal
+        entry_price (float): Entry price for the signal
+        current_price (float): Current price of the asset
+        config (dict): Configuration for signal generation
+        created_at (datetime): Creation time; defaults to now
+        
+    Returns:
+        dict: Signal details
+    """
+    if created_at is None:
+        created_at = datetime.now()
+    
+    signal = build_signal(symbol, signal_type, strategy, entry_price, current_price, config, created_at)
+    save_new_signals([signal], created_at)
+    return signal
+
+def save_new_signals(signals, created_at):
+    """
+    Save signals built by build_signal to the database in one batch
+    
+    Args:
+        signals (list): Signal dictionaries
+        created_at (datetime): Creation time the signals were built with
+    """
+    if not signals:
+        return
+    
+    try:
+        # Pass the datetime itself rather than its display string
+        save_signals([{**signal, 'timestamp': created_at} for signal in signals])
+    except Exception as e:
+        print(f"Error saving signals to database: {str(e)}")
+
+def build_signal(symbol, signal_type, strategy, entry_price, current_price, config, created_at=None):
     """
-    Create a signal with all required details
+    Create a signal with all required details, without saving it
     
     Args:
         symbol (str): Trading pair symbol
@@ -224,51 +265,47 @@ def create_signal(symbol, signal_type, strategy, entry_price, current_price, con
         entry_price (float): Entry price for the signal
         current_price (float): Current price of the asset
         config (dict): Configuration for signal generation
+        created_at (datetime): Creation time; defaults to now
         
     Returns:
         dict: Signal details
     """
+    # Candle data is float32; keep the signal itself in plain Python floats
+    entry_price = float(entry_price)
+    current_price = float(current_price)
+    
+    # Risk settings, each looked up once
+    use_atr = config.get('use_atr', True) and 'atr' in config
+    atr_multiplier = config.get('atr_multiplier', 2.0)
+    tp1_factor = config.get('tp1_factor', 2.0)
+    tp2_factor = config.get('tp2_factor', 3.0)
+    risk_percent = config.get('risk_percent', 1.0)
+    leverage = config.get('default_leverage', 5)
+    
     # Generate unique ID for the signal
     signal_id = str(uuid.uuid4())
     
-    # Current timestamp
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    # Creation timestamp; the signal carries it formatted for display
+    if created_at is None:
+        created_at = datetime.now()
+    timestamp = created_at.strftime('%Y-%m-%d %H:%M:%S')
+    
+    # +1 for LONG, -1 for SHORT: stops sit against the trade, targets with it
+    direction = 1.0 if signal_type == 'LONG' else -1.0
     
     # Calculate stop loss
-    if config.get('use_atr', True) and 'atr' in config:
-        atr = config['atr']
-        atr_multiplier = config.get('atr_multiplier', 2.0)
-        
-        if signal_type == 'LONG':
-            stop_loss = entry_price - (atr * atr_multiplier)
-        else:  # SHORT
-            stop_loss = entry_price + (atr * atr_multiplier)
+    if use_atr:
+        stop_loss = entry_price - direction * (config['atr'] * atr_multiplier)
     else:
         # Default stop loss (3% from entry)
-        if signal_type == 'LONG':
-            stop_loss = entry_price * 0.97
-        else:  # SHORT
-            stop_loss = entry_price * 1.03
+        stop_loss = entry_price * (1 - direction * 0.03)
     
     # Calculate risk (distance to stop loss)
-    if signal_type == 'LONG':
-        risk = entry_price - stop_loss
-    else:  # SHORT
-        risk = stop_loss - entry_price
+    risk = direction * (entry_price - stop_loss)
     
     # Calculate targets
-    tp1_factor = config.get('tp1_factor', 2.0)
-    tp2_factor = config.get('tp2_factor', 3.0)
-    
-    if signal_type == 'LONG':
-        target1 = entry_price + (risk * tp1_factor)
-        target2 = entry_price + (risk * tp2_factor)
-    else:  # SHORT
-        target1 = entry_price - (risk * tp1_factor)
-        target2 = entry_price - (risk * tp2_factor)
-    
-    # Get suggested leverage
-    leverage = config.get('default_leverage', 5)
+    target1 = entry_price + direction * risk * tp1_factor
+    target2 = entry_price + direction * risk * tp2_factor
     
     # Create signal dictionary with all required details
     signal = {
@@ -284,16 +321,10 @@ def create_signal(symbol, signal_type, strategy, entry_price, current_price, con
         'target2': float(target2),
         'risk_reward_ratio1': float(tp1_factor),
         'risk_reward_ratio2': float(tp2_factor),
-        'risk_percent': float(config.get('risk_percent', 1.0)),
+        'risk_percent': float(risk_percent),
         'leverage': int(leverage)
     }
     
-    try:
-        # Save signal to database
-        save_signal(signal)
-    except Exception as e:
-        print(f"Error saving signal to database: {str(e)}")
-    
     return signal
 
 def generate_combined_signals(df, config):
@@ -307,119 +338,136 @@ def generate_combined_signals(df, config):
     Returns:
         list: List of dictionaries containing signal details
     """
-    # Get only the most recent candle for signal generation
-    recent_df = df.iloc[-1:].copy()
+    # Get only the most recent candle for signal generation, as a plain dict
+    last = df.iloc[-1].to_dict()
     
     # List to store signals
     signals = []
     
-    # Get symbol from config
+    # One creation time for every signal of this pass
+    created_at = datetime.now()
+    
+    # Get symbol and strategy toggles from config
     symbol = config.get('symbol', 'BTC/USDT')
+    use_macd = config.get('use_macd', True)
+    use_rsi = config.get('use_rsi', True)
+    use_price_action = config.get('use_price_action', True)
+    use_candlestick_patterns = config.get('use_candlestick_patterns', True)
+    use_harmonic_patterns = config.get('use_harmonic_patterns', True)
     
     # Combined strategy: MACD crossover + RSI confirmation + Trend confirmation
-    if (config.get('use_macd', True) and config.get('use_rsi', True) and 
-            'macd_cross_up' in df.columns and 'rsi' in df.columns):
+    if (use_macd and use_rsi and 
+            'macd_cross_up' in last and 'rsi' in last):
         
         # MACD bullish crossover + RSI < 50 + Uptrend
-        if (recent_df['macd_cross_up'].iloc[0] and 
-                recent_df['rsi'].iloc[0] < 50 and 
-                recent_df['uptrend'].iloc[0]):
+        if (last['macd_cross_up'] and 
+                last['rsi'] < 50 and 
+                last['uptrend']):
             
             # Generate long signal
-            signal = create_signal(
+            signal = build_signal(
                 symbol=symbol,
                 signal_type='LONG',
                 strategy='Combined: MACD Bullish Crossover + RSI < 50 + Uptrend',
-                entry_price=recent_df['close'].iloc[0],
-                current_price=recent_df['close'].iloc[0],
-                config=config
+                entry_price=last['close'],
+                current_price=last['close'],
+                config=config,
+                created_at=created_at
             )
             signals.append(signal)
         
         # MACD bearish crossover + RSI > 50 + Downtrend
-        elif (recent_df['macd_cross_down'].iloc[0] and 
-                recent_df['rsi'].iloc[0] > 50 and 
-                recent_df['downtrend'].iloc[0]):
+        elif (last['macd_cross_down'] and 
+                last['rsi'] > 50 and 
+                last['downtrend']):
             
             # Generate short signal
-            signal = create_signal(
+            signal = build_signal(
                 symbol=symbol,
                 signal_type='SHORT',
                 strategy='Combined: MACD Bearish Crossover + RSI > 50 + Downtrend',
-                entry_price=recent_df['close'].iloc[0],
-                current_price=recent_df['close'].iloc[0],
-                config=config
+                entry_price=last['close'],
+                current_price=last['close'],
+                config=config,
+                created_at=created_at
             )
             signals.append(signal)
     
     # Combined strategy: Price Action + Support/Resistance + RSI
-    if (config.get('use_price_action', True) and config.get('use_rsi', True) and 
-            'bullish_price_action' in df.columns and 'bearish_price_action' in df.columns):
+    if (use_price_action and use_rsi and 
+            'bullish_price_action' in last and 'bearish_price_action' in last):
         
         # Bullish price action + RSI oversold
-        if (recent_df['bullish_price_action'].iloc[0] and 
-                recent_df['rsi_oversold'].iloc[0]):
+        if (last['bullish_price_action'] and 
+                last['rsi_oversold']):
             
             # Generate long signal
-            signal = create_signal(
+            signal = build_signal(
                 symbol=symbol,
                 signal_type='LONG',
                 strategy='Combined: Bullish Price Action + RSI Oversold',
-                entry_price=recent_df['close'].iloc[0],
-                current_price=recent_df['close'].iloc[0],
-                config=config
+                entry_price=last['close'],
+                current_price=last['close'],
+                config=config,
+                created_at=created_at
             )
             signals.append(signal)
         
         # Bearish price action + RSI overbought
-        elif (recent_df['bearish_price_action'].iloc[0] and 
-                recent_df['rsi_overbought'].iloc[0]):
+        elif (last['bearish_price_action'] and 
+                last['rsi_overbought']):
             
             # Generate short signal
-            signal = create_signal(
+            signal = build_signal(
                 symbol=symbol,
                 signal_type='SHORT',
                 strategy='Combined: Bearish Price Action + RSI Overbought',
-                entry_price=recent_df['close'].iloc[0],
-                current_price=recent_df['close'].iloc[0],
-                config=config
+                entry_price=last['close'],
+                current_price=last['close'],
+                config=config,
+                created_at=created_at
             )
             signals.append(signal)
     
     # Combined strategy: Candlestick Patterns + Harmonic Patterns
-    if (config.get('use_candlestick_patterns', True) and config.get('use_harmonic_patterns', True) and 
-            'bullish_candlestick' in df.columns and 'bullish_harmonic' in df.columns):
+    if (use_candlestick_patterns and use_harmonic_patterns and 
+            'bullish_candlestick' in last and 'bullish_harmonic' in last):
         
         # Bullish candlestick + Bullish harmonic
-        if (recent_df['bullish_candlestick'].iloc[0] and 
-                recent_df['bullish_harmonic'].iloc[0]):
+        if (last['bullish_candlestick'] and 
+                last['bullish_harmonic']):
             
             # Generate long signal
-            signal = create_signal(
+            signal = build_signal(
                 symbol=symbol,
                 signal_type='LONG',
                 strategy='Combined: Bullish Candlestick + Bullish Harmonic Pattern',
-                entry_price=recent_df['close'].iloc[0],
-                current_price=recent_df['close'].iloc[0],
-                config=config
+                entry_price=last['close'],
+                current_price=last['close'],
+                config=config,
+                created_at=created_at
             )
             signals.append(signal)
         
         # Bearish candlestick + Bearish harmonic
-        elif (recent_df['bearish_candlestick'].iloc[0] and 
-                recent_df['bearish_harmonic'].iloc[0]):
+        elif (last['bearish_candlestick'] and 
+                last['bearish_harmonic']):
             
             # Generate short signal
-            signal = create_signal(
+            signal = build_signal(
                 symbol=symbol,
                 signal_type='SHORT',
                 strategy='Combined: Bearish Candlestick + Bearish Harmonic Pattern',
-                entry_price=recent_df['close'].iloc[0],
-                current_price=recent_df['close'].iloc[0],
-                config=config
+                entry_price=last['close'],
+                current_price=last['close'],
+                config=config,
+                created_at=created_at
             )
             signals.append(signal)
     
+    # Save every signal of this pass in one database round trip
+    save_new_signals(signals, created_at)
+    
     return signals
 
 def filter_conflicting_signals(signals):
@@ -432,51 +480,36 @@ def filter_conflicting_signals(signals):
     Returns:
         list: Filtered list of signals
     """
-    if not signals:
-        return []
+    # Nothing can conflict with fewer than two signals
+    if len(signals) < 2:
+        return list(signals)
     
-    # Group signals by symbol
+    # Group signals by symbol in one pass, splitting LONG and SHORT as we go
     signals_by_symbol = {}
     for signal in signals:
-        symbol = signal['symbol']
-        if symbol not in signals_by_symbol:
-            signals_by_symbol[symbol] = []
-        signals_by_symbol[symbol].append(signal)
+        group = signals_by_symbol.setdefault(signal['symbol'], {'all': [], 'LONG': [], 'SHORT': []})
+        group['all'].append(signal)
+        if signal['signal_type'] in ('LONG', 'SHORT'):
+            group[signal['signal_type']].append(signal)
     
     # Filter conflicting signals for each symbol
     filtered_signals = []
-    for symbol, symbol_signals in signals_by_symbol.items():
-        # If there are multiple signals for a symbol, check for conflicts
-        if len(symbol_signals) > 1:
-            # Check if there are both LONG and SHORT signals
-            has_long = any(s['signal_type'] == 'LONG' for s in symbol_signals)
-            has_short = any(s['signal_type'] == 'SHORT' for s in symbol_signals)
-            
-            # If there are conflicting signals, prioritize based on strength
-            if has_long and has_short:
-                # Get all LONG signals
-                long_signals = [s for s in symbol_signals if s['signal_type'] == 'LONG']
-                # Get all SHORT signals
-                short_signals = [s for s in symbol_signals if s['signal_type'] == 'SHORT']
-                
-                # Count the number of LONG and SHORT signals
-                long_count = len(long_signals)
-                short_count = len(short_signals)
-                
-                # Select signals based on majority
-                if long_count > short_count:
-                    filtered_signals.extend(long_signals)
-                elif short_count > long_count:
-                    filtered_signals.extend(short_signals)
-                else:
-                    # If equal, select the strongest signal based on risk/reward
-                    all_signals = sorted(symbol_signals, key=lambda s: s['risk_reward_ratio2'], reverse=True)
-                    filtered_signals.append(all_signals[0])
+    for group in signals_by_symbol.values():
+        long_signals = group['LONG']
+        short_signals = group['SHORT']
+        
+        # If there are both LONG and SHORT signals, prioritize based on strength
+        if long_signals and short_signals:
+            # Select signals based on majority
+            if len(long_signals) > len(short_signals):
+                filtered_signals.extend(long_signals)
+            elif len(short_signals) > len(long_signals):
+                filtered_signals.extend(short_signals)
             else:
-                # No conflict, add all signals
-                filtered_signals.extend(symbol_signals)
+                # If equal, select the strongest signal based on risk/reward (the first one on ties)
+                filtered_signals.append(max(group['all'], key=lambda s: s['risk_reward_ratio2']))
         else:
-            # Only one signal, no conflict
-            filtered_signals.extend(symbol_signals)
+            # No conflict, add all signals
+            filtered_signals.extend(group['all'])
     
     return filtered_signals
@@ -1,7 +1,296 @@
+import copy
 import pandas as pd
 import numpy as np
 import pandas_ta as ta
 
+from jit import njit
+from frame_utils import local_extrema, with_columns
+
+@njit(cache=True)
+def _ema(values, length):
+    """
+    Exponential moving average seeded with the SMA of the first `length`
+    valid values, matching pandas_ta.ema
+    
+    Args:
+        values (numpy.ndarray): float64 input series, may start with NaNs
+        length (int): EMA period
+        
+    Returns:
+        numpy.ndarray: EMA values, NaN until the seed is available
+    """
+    n = values.shape[0]
+    out = np.full(n, np.nan)
+    
+    # Skip leading NaNs (e.g. the MACD line before the slow EMA is ready)
+    start = 0
+    while start < n and np.isnan(values[start]):
+        start += 1
+    
+    seed = start + length - 1
+    if seed >= n:
+        return out
+    
+    alpha = 2.0 / (length + 1.0)
+    prev = values[start:seed + 1].mean()
+    out[seed] = prev
+    
+    for i in range(seed + 1, n):
+        if not np.isnan(values[i]):
+            prev = alpha * values[i] + (1.0 - alpha) * prev
+        out[i] = prev
+    
+    return out
+
+@njit(cache=True)
+def _rma(values, length):
+    """
+    Wilder's moving average, matching pandas_ta.rma
+    (ewm(alpha=1/length, min_periods=length, adjust=True))
+    
+    Args:
+        values (numpy.ndarray): float64 input series
+        length (int): Smoothing period
+        
+    Returns:
+        numpy.ndarray: Smoothed values, NaN until `length` observations are seen
+    """
+    n = values.shape[0]
+    out = np.full(n, np.nan)
+    decay = 1.0 - 1.0 / length
+    
+    num = 0.0
+    den = 0.0
+    count = 0
+    
+    for i in range(n):
+        if np.isnan(values[i]):
+            # Missing values still age the earlier observations
+            num *= decay
+            den *= decay
+        else:
+            num = values[i] + decay * num
+            den = 1.0 + decay * den
+            count += 1
+        
+        if count >= length:
+            out[i] = num / den
+    
+    return out
+
+@njit(cache=True)
+def _sma(values, length):
+    """
+    Simple moving average, matching pandas_ta.sma
+    (rolling(length, min_periods=length).mean())
+    
+    Args:
+        values (numpy.ndarray): float64 input series
+        length (int): SMA period
+        
+    Returns:
+        numpy.ndarray: SMA values, NaN where the window has fewer than `length` valid values
+    """
+    n = values.shape[0]
+    out = np.full(n, np.nan)
+    
+    # Running sum and count of the valid values in the window
+    total = 0.0
+    count = 0
+    
+    for i in range(n):
+        if not np.isnan(values[i]):
+            total += values[i]
+            count += 1
+        if i >= length and not np.isnan(values[i - length]):
+            total -= values[i - length]
+            count -= 1
+        
+        if count >= length:
+            out[i] = total / length
+    
+    return out
+
+@njit(cache=True)
+def _bbands(close, length, std):
+    """
+    Bollinger Bands around the SMA with the population standard deviation,
+    matching pandas_ta.bbands (ddof=0)
+    
+    Args:
+        close (numpy.ndarray): float64 close prices
+        length (int): Window length
+        std (float): Band width in standard deviations
+        
+    Returns:
+        tuple: (lower, middle, upper) arrays
+    """
+    n = close.shape[0]
+    middle = _sma(close, length)
+    deviation = np.full(n, np.nan)
+    
+    # Two-pass variance per window: stable even for flat or high-priced series
+    for i in range(length - 1, n):
+        if np.isnan(middle[i]):
+            continue
+        acc = 0.0
+        for j in range(i - length + 1, i + 1):
+            diff = close[j] - middle[i]
+            acc += diff * diff
+        deviation[i] = std * np.sqrt(acc / length)
+    
+    return middle - deviation, middle, middle + deviation
+
+@njit(cache=True)
+def _macd(close, fast, slow, signal):
+    """
+    MACD line, signal line and histogram, matching pandas_ta.macd
+    
+    Args:
+        close (numpy.ndarray): float64 close prices
+        fast (int): Fast EMA period
+        slow (int): Slow EMA period
+        signal (int): Signal EMA period
+        
+    Returns:
+        tuple: (macd, signal, histogram) arrays
+    """
+    macd = _ema(close, fast) - _ema(close, slow)
+    macd_signal = _ema(macd, signal)
+    return macd, macd_signal, macd - macd_signal
+
+@njit(cache=True)
+def _rsi(close, length):
+    """
+    Relative Strength Index, matching pandas_ta.rsi
+    
+    Args:
+        close (numpy.ndarray): float64 close prices
+        length (int): RSI period
+        
+    Returns:
+        numpy.ndarray: RSI values in the 0-100 range
+    """
+    n = close.shape[0]
+    gains = np.full(n, np.nan)
+    losses = np.full(n, np.nan)
+    
+    for i in range(1, n):
+        change = close[i] - close[i - 1]
+        gains[i] = max(change, 0.0)
+        losses[i] = -min(change, 0.0)
+    
+    avg_gain = _rma(gains, length)
+    avg_loss = _rma(losses, length)
+    return 100.0 * avg_gain / (avg_gain + avg_loss)
+
+@njit(cache=True)
+def _atr(high, low, close, length):
+    """
+    Average True Range with Wilder's smoothing, matching pandas_ta.atr
+    
+    Args:
+        high (numpy.ndarray): float64 high prices
+        low (numpy.ndarray): float64 low prices
+        close (numpy.ndarray): float64 close prices
+        length (int): ATR period
+        
+    Returns:
+        numpy.ndarray: ATR values
+    """
+    n = close.shape[0]
+    true_range = np.full(n, np.nan)
+    
+    for i in range(1, n):
+        prev_close = close[i - 1]
+        true_range[i] = max(high[i] - low[i], abs(high[i] - prev_close), abs(low[i] - prev_close))
+    
+    return _rma(true_range, length)
+
+# Boolean signal flags computed by _signal_flags, in its output column order
+SIGNAL_FLAGS = (
+    'macd_cross_up', 'macd_cross_down',
+    'price_higher_high', 'price_lower_low', 'rsi_higher_high', 'rsi_lower_low',
+    'bearish_divergence', 'bullish_divergence',
+    'golden_cross', 'death_cross', 'short_term_bull', 'short_term_bear',
+    'stoch_cross_up', 'stoch_cross_down',
+    'uptrend', 'downtrend', 'sideways'
+)
+MACD_FLAGS = SIGNAL_FLAGS[:2]
+RSI_FLAGS = SIGNAL_FLAGS[2:8]
+
+@njit(cache=True)
+def _signal_flags(close, macd, macd_signal, rsi, ema20, ema50, ema200, stoch_k, stoch_d, out):
+    """
+    Evaluate every crossover, divergence and trend rule in one pass
+    
+    A line crosses above another on a bar where it is above it and was at or
+    below it on the previous bar (and mirrored for crossing below); NaN values
+    fail every rule, as in the pandas comparisons they replace.
+    
+    Args:
+        close, macd, macd_signal, rsi, ema20, ema50, ema200, stoch_k, stoch_d (numpy.ndarray):
+            float64 inputs (all-NaN for disabled indicators)
+        out (numpy.ndarray): (n, len(SIGNAL_FLAGS)) boolean matrix, filled in place
+    """
+    n = close.shape[0]
+    
+    for i in range(n):
+        # Trend direction
+        up = close[i] > ema200[i] and ema50[i] > ema200[i]
+        down = close[i] < ema200[i] and ema50[i] < ema200[i]
+        out[i, 14] = up
+        out[i, 15] = down
+        out[i, 16] = not (up or down)
+        
+        if i < 1:
+            continue
+        
+        # MACD crossovers
+        out[i, 0] = macd[i] > macd_signal[i] and macd[i - 1] <= macd_signal[i - 1]
+        out[i, 1] = macd[i] < macd_signal[i] and macd[i - 1] >= macd_signal[i - 1]
+        
+        # Golden / death cross (50 MA crosses 200 MA) and short-term momentum (20 MA crosses 50 MA)
+        out[i, 8] = ema50[i] > ema200[i] and ema50[i - 1] <= ema200[i - 1]
+        out[i, 9] = ema50[i] < ema200[i] and ema50[i - 1] >= ema200[i - 1]
+        out[i, 10] = ema20[i] > ema50[i] and ema20[i - 1] <= ema50[i - 1]
+        out[i, 11] = ema20[i] < ema50[i] and ema20[i - 1] >= ema50[i - 1]
+        
+        # Stochastic crossovers
+        out[i, 12] = stoch_k[i] > stoch_d[i] and stoch_k[i - 1] <= stoch_d[i - 1]
+        out[i, 13] = stoch_k[i] < stoch_d[i] and stoch_k[i - 1] >= stoch_d[i - 1]
+        
+        if i < 2:
+            continue
+        
+        # RSI divergence (simple implementation): two rising / falling bars in a row
+        price_hh = close[i] > close[i - 1] and close[i - 1] > close[i - 2]
+        price_ll = close[i] < close[i - 1] and close[i - 1] < close[i - 2]
+        rsi_hh = rsi[i] > rsi[i - 1] and rsi[i - 1] > rsi[i - 2]
+        rsi_ll = rsi[i] < rsi[i - 1] and rsi[i - 1] < rsi[i - 2]
+        out[i, 2] = price_hh
+        out[i, 3] = price_ll
+        out[i, 4] = rsi_hh
+        out[i, 5] = rsi_ll
+        
+        # Bearish divergence: price makes higher high, but RSI makes lower high;
+        # bullish divergence: price makes lower low, but RSI makes higher low
+        out[i, 6] = price_hh and not rsi_hh and rsi[i] > 60
+        out[i, 7] = price_ll and not rsi_ll and rsi[i] < 40
+
+def warmup_indicators():
+    """
+    Compile the indicator kernels ahead of the first market scan
+    (no-op cost once numba's on-disk cache is populated)
+    """
+    sample = np.linspace(1.0, 2.0, 64)
+    _macd(sample, 12, 26, 9)
+    _rsi(sample, 14)
+    _atr(sample + 0.1, sample - 0.1, sample, 14)
+    _bbands(sample, 20, 2.0)
+    _signal_flags(sample, sample, sample, sample, sample, sample, sample, sample, sample,
+                  np.zeros((64, len(SIGNAL_FLAGS)), dtype=np.bool_))
+
 def calculate_indicators(df, config):
     """
     Calculate technical indicators based on configuration
@@ -11,10 +300,18 @@ def calculate_indicators(df, config):
         config (dict): Configuration with indicator settings
         
     Returns:
-        pandas.DataFrame: Dataframe with calculated indicators
+        pandas.DataFrame: New dataframe with calculated indicators, stored in the
+                          dtype of `df`'s prices when those are floats and in
+                          float64 otherwise (`df` is not modified)
     """
-    # Create a copy of the dataframe to avoid modifying the original
-    df = df.copy()
+    # Raw float64 arrays for the compiled indicator kernels
+    close = df['close'].to_numpy(dtype=np.float64)
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    volume = df['volume'].to_numpy(dtype=np.float64)
+    
+    # New columns, attached to a new frame in one step at the end
+    columns = {}
     
     # Calculate MACD if enabled
     if config.get('use_macd', True):
@@ -22,16 +319,12 @@ def calculate_indicators(df, config):
         slow = config.get('macd_slow', 26)
         signal = config.get('macd_signal', 9)
         
-        macd = ta.macd(df['close'], fast=fast, slow=slow, signal=signal)
-        df['macd'] = macd['MACD_' + str(fast) + '_' + str(slow) + '_' + str(signal)]
-        df['macd_signal'] = macd['MACDs_' + str(fast) + '_' + str(slow) + '_' + str(signal)]
-        df['macd_hist'] = macd['MACDh_' + str(fast) + '_' + str(slow) + '_' + str(signal)]
-        
-        # Calculate MACD crossover signals
-        df['macd_cross_up'] = ((df['macd'] > df['macd_signal']) & 
-                              (df['macd'].shift(1) <= df['macd_signal'].shift(1)))
-        df['macd_cross_down'] = ((df['macd'] < df['macd_signal']) & 
-                                (df['macd'].shift(1) >= df['macd_signal'].shift(1)))
+        macd, macd_signal, macd_hist = _macd(close, int(fast), int(slow), int(signal))
+        columns['macd'] = macd
+        columns['macd_signal'] = macd_signal
+        columns['macd_hist'] = macd_hist
+    else:
+        macd = macd_signal = np.full(len(df), np.nan)
     
     # Calculate RSI if enabled
     if config.get('use_rsi', True):
@@ -39,108 +332,342 @@ def calculate_indicators(df, config):
         overbought = config.get('rsi_overbought', 70)
         oversold = config.get('rsi_oversold', 30)
         
-        df['rsi'] = ta.rsi(df['close'], length=period)
+        rsi = _rsi(close, int(period))
+        columns['rsi'] = rsi
         
         # Calculate RSI overbought/oversold signals
-        df['rsi_overbought'] = df['rsi'] > overbought
-        df['rsi_oversold'] = df['rsi'] < oversold
-        
-        # Calculate RSI divergence (simple implementation)
-        df['price_higher_high'] = (df['close'] > df['close'].shift(1)) & (df['close'].shift(1) > df['close'].shift(2))
-        df['price_lower_low'] = (df['close'] < df['close'].shift(1)) & (df['close'].shift(1) < df['close'].shift(2))
-        df['rsi_higher_high'] = (df['rsi'] > df['rsi'].shift(1)) & (df['rsi'].shift(1) > df['rsi'].shift(2))
-        df['rsi_lower_low'] = (df['rsi'] < df['rsi'].shift(1)) & (df['rsi'].shift(1) < df['rsi'].shift(2))
-        
-        # Bearish divergence: price makes higher high, but RSI makes lower high
-        df['bearish_divergence'] = (df['price_higher_high'] & ~df['rsi_higher_high']) & (df['rsi'] > 60)
-        # Bullish divergence: price makes lower low, but RSI makes higher low
-        df['bullish_divergence'] = (df['price_lower_low'] & ~df['rsi_lower_low']) & (df['rsi'] < 40)
+        columns['rsi_overbought'] = rsi > overbought
+        columns['rsi_oversold'] = rsi < oversold
+    else:
+        rsi = np.full(len(df), np.nan)
     
     # Calculate ATR if enabled
     if config.get('use_atr', True):
         period = config.get('atr_period', 14)
         multiplier = config.get('atr_multiplier', 2.0)
         
-        df['atr'] = ta.atr(df['high'], df['low'], df['close'], length=period)
+        atr = _atr(high, low, close, int(period))
+        columns['atr'] = atr
         
         # Calculate ATR-based stop loss levels
-        df['atr_stop_long'] = df['close'] - (df['atr'] * multiplier)
-        df['atr_stop_short'] = df['close'] + (df['atr'] * multiplier)
+        columns['atr_stop_long'] = close - (atr * multiplier)
+        columns['atr_stop_short'] = close + (atr * multiplier)
     
     # Calculate moving averages
     # EMA 20, 50, 200
-    df['ema20'] = ta.ema(df['close'], length=20)
-    df['ema50'] = ta.ema(df['close'], length=50)
-    df['ema200'] = ta.ema(df['close'], length=200)
+    ema20 = _ema(close, 20)
+    ema50 = _ema(close, 50)
+    ema200 = _ema(close, 200)
+    columns['ema20'] = ema20
+    columns['ema50'] = ema50
+    columns['ema200'] = ema200
     
     # SMA 20, 50, 200
-    df['sma20'] = ta.sma(df['close'], length=20)
-    df['sma50'] = ta.sma(df['close'], length=50)
-    df['sma200'] = ta.sma(df['close'], length=200)
-    
-    # Calculate moving average crossovers
-    # Golden Cross (50 MA crosses above 200 MA)
-    df['golden_cross'] = ((df['ema50'] > df['ema200']) & 
-                         (df['ema50'].shift(1) <= df['ema200'].shift(1)))
-    
-    # Death Cross (50 MA crosses below 200 MA)
-    df['death_cross'] = ((df['ema50'] < df['ema200']) & 
-                        (df['ema50'].shift(1) >= df['ema200'].shift(1)))
-    
-    # Short-term momentum (20 MA crosses 50 MA)
-    df['short_term_bull'] = ((df['ema20'] > df['ema50']) & 
-                            (df['ema20'].shift(1) <= df['ema50'].shift(1)))
-    df['short_term_bear'] = ((df['ema20'] < df['ema50']) & 
-                            (df['ema20'].shift(1) >= df['ema50'].shift(1)))
+    columns['sma20'] = _sma(close, 20)
+    columns['sma50'] = _sma(close, 50)
+    columns['sma200'] = _sma(close, 200)
     
     # Calculate Bollinger Bands
-    bollinger = ta.bbands(df['close'], length=20, std=2)
-    df['bb_upper'] = bollinger['BBU_20_2.0']
-    df['bb_middle'] = bollinger['BBM_20_2.0']
-    df['bb_lower'] = bollinger['BBL_20_2.0']
-    df['bb_width'] = ((df['bb_upper'] - df['bb_lower']) / df['bb_middle'])
+    bb_lower, bb_middle, bb_upper = _bbands(close, 20, 2.0)
+    columns['bb_upper'] = bb_upper
+    columns['bb_middle'] = bb_middle
+    columns['bb_lower'] = bb_lower
+    bb_width = (bb_upper - bb_lower) / bb_middle
+    columns['bb_width'] = bb_width
     
     # Calculate Bollinger Band signals
-    df['bb_squeeze'] = df['bb_width'] < df['bb_width'].rolling(window=50).mean()
-    df['bb_upper_touch'] = df['high'] >= df['bb_upper']
-    df['bb_lower_touch'] = df['low'] <= df['bb_lower']
+    columns['bb_squeeze'] = bb_width < _sma(bb_width, 50)
+    columns['bb_upper_touch'] = high >= bb_upper
+    columns['bb_lower_touch'] = low <= bb_lower
     
     # Calculate Stochastic Oscillator
-    stoch = ta.stoch(df['high'], df['low'], df['close'], k=14, d=3, smooth_k=3)
-    df['stoch_k'] = stoch['STOCHk_14_3_3']
-    df['stoch_d'] = stoch['STOCHd_14_3_3']
-    
-    # Calculate Stochastic crossover signals
-    df['stoch_cross_up'] = ((df['stoch_k'] > df['stoch_d']) & 
-                           (df['stoch_k'].shift(1) <= df['stoch_d'].shift(1)))
-    df['stoch_cross_down'] = ((df['stoch_k'] < df['stoch_d']) & 
-                             (df['stoch_k'].shift(1) >= df['stoch_d'].shift(1)))
+    # (pandas_ta column order: %K, %D)
+    stoch = ta.stoch(df['high'], df['low'], df['close'], k=14, d=3, smooth_k=3).to_numpy()
+    columns['stoch_k'] = stoch[:, 0]
+    columns['stoch_d'] = stoch[:, 1]
+    stoch = stoch.astype(np.float64)
+    stoch_k = stoch[:, 0]
+    stoch_d = stoch[:, 1]
     
     # Calculate Ichimoku Cloud
-    ichimoku = ta.ichimoku(df['high'], df['low'], df['close'])
-    df['tenkan_sen'] = ichimoku['TENKAN_9']
-    df['kijun_sen'] = ichimoku['KIJUN_26']
-    df['senkou_span_a'] = ichimoku['SENKOU_A_26']
-    df['senkou_span_b'] = ichimoku['SENKOU_B_52']
-    df['chikou_span'] = ichimoku['CHIKOU_26']
+    # (pandas_ta returns the lines plus a frame of forward spans; line column
+    # order: span A, span B, tenkan, kijun, chikou)
+    ichimoku, _ = ta.ichimoku(df['high'], df['low'], df['close'])
+    ichimoku = ichimoku.to_numpy()
+    columns['tenkan_sen'] = ichimoku[:, 2]
+    columns['kijun_sen'] = ichimoku[:, 3]
+    columns['senkou_span_a'] = ichimoku[:, 0]
+    columns['senkou_span_b'] = ichimoku[:, 1]
+    columns['chikou_span'] = ichimoku[:, 4]
     
     # Calculate ADX (Average Directional Index)
-    adx = ta.adx(df['high'], df['low'], df['close'], length=14)
-    df['adx'] = adx['ADX_14']
-    df['di_plus'] = adx['DMP_14']
-    df['di_minus'] = adx['DMN_14']
+    # (pandas_ta column order: ADX, +DI, -DI)
+    adx = ta.adx(df['high'], df['low'], df['close'], length=14).to_numpy()
+    columns['adx'] = adx[:, 0]
+    columns['di_plus'] = adx[:, 1]
+    columns['di_minus'] = adx[:, 2]
     
     # Calculate Volume Profile
-    df['volume_sma'] = ta.sma(df['volume'], length=20)
-    df['volume_ratio'] = df['volume'] / df['volume_sma']
-    df['rising_volume'] = df['volume'] > df['volume'].shift(1)
+    volume_sma = _sma(volume, 20)
+    columns['volume_sma'] = volume_sma
+    columns['volume_ratio'] = volume / volume_sma
+    
+    # The first bar has no previous volume to rise from
+    rising_volume = np.zeros(len(df), dtype=np.bool_)
+    rising_volume[1:] = volume[1:] > volume[:-1]
+    columns['rising_volume'] = rising_volume
+    
+    # Crossover, divergence and trend direction flags in one compiled pass
+    flags = np.zeros((len(df), len(SIGNAL_FLAGS)), dtype=np.bool_)
+    _signal_flags(close, macd, macd_signal, rsi, ema20, ema50, ema200, stoch_k, stoch_d, flags)
+    
+    # MACD and RSI flags only exist when their indicator is enabled
+    skip = set()
+    if not config.get('use_macd', True):
+        skip.update(MACD_FLAGS)
+    if not config.get('use_rsi', True):
+        skip.update(RSI_FLAGS)
+    
+    for j, name in enumerate(SIGNAL_FLAGS):
+        if name not in skip:
+            columns[name] = flags[:, j]
+    
+    # Kernels work in float64; store the results in the frame's own float
+    # dtype so float32 frames don't double in size. Integer-priced frames
+    # keep float64, since indicators are fractional and may be NaN
+    dtype = df['close'].dtype
+    if dtype.kind == 'f':
+        for name, values in columns.items():
+            if values.dtype.kind == 'f' and values.dtype != dtype:
+                columns[name] = values.astype(dtype)
+    
+    # Recalculating replaces indicator columns the frame already has
+    stale = df.columns.intersection(list(columns))
+    if len(stale):
+        df = df.drop(columns=stale)
+    
+    return with_columns(df, columns)
+
+class _EmaState:
+    """
+    Running EMA of one series, seeded like _ema with the SMA of its first
+    `length` valid values
+    """
     
-    # Add trend direction columns
-    df['uptrend'] = (df['close'] > df['ema200']) & (df['ema50'] > df['ema200'])
-    df['downtrend'] = (df['close'] < df['ema200']) & (df['ema50'] < df['ema200'])
-    df['sideways'] = ~(df['uptrend'] | df['downtrend'])
+    def __init__(self, length):
+        self.length = length
+        self.alpha = 2.0 / (length + 1.0)
+        self.seed_sum = 0.0
+        self.seen = 0
+        self.value = np.nan
+    
+    def update(self, x):
+        if self.seen < self.length:
+            # Leading NaNs are skipped; NaNs inside the seed window poison it, as in _ema
+            if self.seen == 0 and np.isnan(x):
+                return np.nan
+            self.seed_sum += x
+            self.seen += 1
+            if self.seen == self.length:
+                self.value = self.seed_sum / self.length
+        elif not np.isnan(x):
+            self.value = self.alpha * x + (1.0 - self.alpha) * self.value
+        return self.value
+
+class _RmaState:
+    """
+    Running Wilder's moving average of one series, like _rma
+    """
     
-    return df
+    def __init__(self, length):
+        self.length = length
+        self.decay = 1.0 - 1.0 / length
+        self.num = 0.0
+        self.den = 0.0
+        self.count = 0
+    
+    def update(self, x):
+        if np.isnan(x):
+            # Missing values still age the earlier observations
+            self.num *= self.decay
+            self.den *= self.decay
+        else:
+            self.num = x + self.decay * self.num
+            self.den = 1.0 + self.decay * self.den
+            self.count += 1
+        return self.num / self.den if self.count >= self.length else np.nan
+
+class IndicatorState:
+    """
+    Incremental indicators for one market's candle stream, for live signal
+    generation: each new candle costs O(1) instead of re-running
+    calculate_indicators over the whole frame
+    
+    Covers the values the signal rules read: close, MACD, RSI, ATR, the 20/50/200
+    EMAs and the crossover, divergence and trend flags (SIGNAL_FLAGS without the
+    stochastic ones). The recursive indicators carry the whole stream's history,
+    so they match calculate_indicators run over every candle fed so far rather
+    than over a truncated frame. Backtests keep using calculate_indicators.
+    """
+    
+    def __init__(self, config):
+        """
+        Args:
+            config (dict): Configuration with indicator settings
+        """
+        self._config = dict(config)
+        self.settings = self.settings_key(config)
+        self.use_macd, self.use_rsi, self.use_atr = self.settings[:3]
+        self.rsi_overbought = config.get('rsi_overbought', 70)
+        self.rsi_oversold = config.get('rsi_oversold', 30)
+        self.atr_multiplier = config.get('atr_multiplier', 2.0)
+        
+        self._macd_fast = _EmaState(int(config.get('macd_fast', 12)))
+        self._macd_slow = _EmaState(int(config.get('macd_slow', 26)))
+        self._macd_signal = _EmaState(int(config.get('macd_signal', 9)))
+        self._rsi_gain = _RmaState(int(config.get('rsi_period', 14)))
+        self._rsi_loss = _RmaState(int(config.get('rsi_period', 14)))
+        self._atr = _RmaState(int(config.get('atr_period', 14)))
+        self._emas = {length: _EmaState(length) for length in (20, 50, 200)}
+        
+        # Inputs of _signal_flags for the last two candles, and the last candle's close
+        self._history = []
+        self._prev_close = np.nan
+        
+        # Open time of the last candle fed to update()
+        self.last_time = None
+    
+    @staticmethod
+    def settings_key(config):
+        """
+        Settings a state is built for; a state only serves configs with the same key
+        
+        Args:
+            config (dict): Configuration with indicator settings
+            
+        Returns:
+            tuple: Hashable indicator settings
+        """
+        return tuple(config.get(key, default) for key, default in (
+            ('use_macd', True), ('use_rsi', True), ('use_atr', True),
+            ('macd_fast', 12), ('macd_slow', 26), ('macd_signal', 9),
+            ('rsi_period', 14), ('rsi_overbought', 70), ('rsi_oversold', 30),
+            ('atr_period', 14), ('atr_multiplier', 2.0)
+        ))
+    
+    def update(self, time, high, low, close):
+        """
+        Feed one closed candle
+        
+        Args:
+            time: Candle open time (index label)
+            high (float): High price
+            low (float): Low price
+            close (float): Close price
+            
+        Returns:
+            dict: Indicator values and flags for the candle
+        """
+        high = float(high)
+        low = float(low)
+        close = float(close)
+        prev_close = self._prev_close
+        
+        # MACD (the signal EMA skips the MACD line's leading NaNs)
+        macd = self._macd_fast.update(close) - self._macd_slow.update(close)
+        macd_signal = self._macd_signal.update(macd)
+        
+        # RSI from Wilder-smoothed gains and losses (no change for the first candle)
+        change = close - prev_close
+        avg_gain = self._rsi_gain.update(max(change, 0.0) if not np.isnan(change) else np.nan)
+        avg_loss = self._rsi_loss.update(-min(change, 0.0) if not np.isnan(change) else np.nan)
+        with np.errstate(invalid='ignore'):
+            # NaN for a flat market (0 / 0), as in _rsi
+            rsi = 100.0 * np.float64(avg_gain) / (avg_gain + avg_loss)
+        
+        # ATR from the true range (undefined for the first candle)
+        if np.isnan(prev_close):
+            true_range = np.nan
+        else:
+            true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        atr = self._atr.update(true_range)
+        
+        ema20, ema50, ema200 = (self._emas[length].update(close) for length in (20, 50, 200))
+        
+        # Flags from the same kernel as calculate_indicators, on the last three candles
+        inputs = (close, macd if self.use_macd else np.nan, macd_signal if self.use_macd else np.nan,
+                  rsi if self.use_rsi else np.nan, ema20, ema50, ema200, np.nan, np.nan)
+        self._history = (self._history + [inputs])[-3:]
+        columns = [np.array(series) for series in zip(*self._history)]
+        flags = np.zeros((len(self._history), len(SIGNAL_FLAGS)), dtype=np.bool_)
+        _signal_flags(*columns, flags)
+        
+        self._prev_close = close
+        self.last_time = time
+        
+        values = {'close': close, 'ema20': ema20, 'ema50': ema50, 'ema200': ema200}
+        if self.use_macd:
+            values.update(macd=macd, macd_signal=macd_signal, macd_hist=macd - macd_signal)
+        if self.use_rsi:
+            values.update(rsi=rsi, rsi_overbought=rsi > self.rsi_overbought, rsi_oversold=rsi < self.rsi_oversold)
+        if self.use_atr:
+            values.update(atr=atr, atr_stop_long=close - atr * self.atr_multiplier,
+                          atr_stop_short=close + atr * self.atr_multiplier)
+        
+        for j, name in enumerate(SIGNAL_FLAGS):
+            if name.startswith('stoch_'):
+                continue
+            if (name in MACD_FLAGS and not self.use_macd) or (name in RSI_FLAGS and not self.use_rsi):
+                continue
+            values[name] = bool(flags[-1, j])
+        
+        return values
+    
+    def peek(self, time, high, low, close):
+        """
+        Indicator values for a candle that is still forming, without feeding it
+        
+        Args:
+            time: Candle open time (index label)
+            high (float): High price so far
+            low (float): Low price so far
+            close (float): Latest price
+            
+        Returns:
+            dict: Indicator values and flags for the candle
+        """
+        return copy.deepcopy(self).update(time, high, low, close)
+    
+    def advance(self, df):
+        """
+        Feed the closed candles of a fetched frame that the state hasn't seen
+        yet and return the values for the frame's last, still forming candle
+        
+        A frame that doesn't continue the stream (no candle at last_time, e.g.
+        after a gap longer than the fetch window) restarts the state from it.
+        
+        Args:
+            df (pandas.DataFrame): Dataframe with market data, oldest candle first
+            
+        Returns:
+            dict: Indicator values and flags for the last candle
+        """
+        start = 0
+        if self.last_time is not None:
+            pos = df.index.get_indexer([self.last_time])[0]
+            if pos < 0 or pos >= len(df) - 1:
+                self.__init__(self._config)
+            else:
+                start = pos + 1
+        
+        high = df['high'].to_numpy()
+        low = df['low'].to_numpy()
+        close = df['close'].to_numpy()
+        
+        for i in range(start, len(df) - 1):
+            self.update(df.index[i], high[i], low[i], close[i])
+        
+        return self.peek(df.index[-1], high[-1], low[-1], close[-1])
 
 def calculate_momentum_indicators(df):
     """
@@ -175,18 +702,20 @@ def calculate_momentum_indicators(df):
     # Volatility indicators
     
     # Keltner Channel
-    keltner = ta.kc(df['high'], df['low'], df['close'], length=20, scalar=2)
-    df['kc_upper'] = keltner['KCUe_20_2.0']
-    df['kc_lower'] = keltner['KCLe_20_2.0']
-    df['kc_middle'] = keltner['KCMe_20_2.0']
+    # (pandas_ta column order: lower, basis, upper)
+    keltner = ta.kc(df['high'], df['low'], df['close'], length=20, scalar=2).to_numpy()
+    df['kc_upper'] = keltner[:, 2]
+    df['kc_lower'] = keltner[:, 0]
+    df['kc_middle'] = keltner[:, 1]
     
     # True Strength Index (TSI)
     df['tsi'] = ta.tsi(df['close'])
     
     # Vortex Indicator
-    vortex = ta.vortex(df['high'], df['low'], df['close'], length=14)
-    df['vi_plus'] = vortex['VTXP_14']
-    df['vi_minus'] = vortex['VTXM_14']
+    # (pandas_ta column order: VI+, VI-)
+    vortex = ta.vortex(df['high'], df['low'], df['close'], length=14).to_numpy()
+    df['vi_plus'] = vortex[:, 0]
+    df['vi_minus'] = vortex[:, 1]
     
     return df
 
@@ -201,29 +730,20 @@ def calculate_support_resistance(df, window=10):
     Returns:
         tuple: Support and resistance levels
     """
-    df = df.copy()
-    
-    # Find pivot highs and lows
-    pivot_highs = []
-    pivot_lows = []
+    high = df['high'].to_numpy()
+    low = df['low'].to_numpy()
     
-    for i in range(window, len(df) - window):
-        # Check for pivot high
-        if all(df['high'].iloc[i] > df['high'].iloc[i-j] for j in range(1, window+1)) and \
-           all(df['high'].iloc[i] > df['high'].iloc[i+j] for j in range(1, window+1)):
-            pivot_highs.append((df.index[i], df['high'].iloc[i]))
-        
-        # Check for pivot low
-        if all(df['low'].iloc[i] < df['low'].iloc[i-j] for j in range(1, window+1)) and \
-           all(df['low'].iloc[i] < df['low'].iloc[i+j] for j in range(1, window+1)):
-            pivot_lows.append((df.index[i], df['low'].iloc[i]))
+    # Find pivot highs and lows: bars strictly above (below) every bar within
+    # `window` bars on either side
+    high_idx = local_extrema(high, window, 'high')
+    low_idx = local_extrema(low, window, 'low')
     
-    # Get most recent pivot points for support and resistance
-    pivot_highs = sorted(pivot_highs, key=lambda x: x[0], reverse=True)
-    pivot_lows = sorted(pivot_lows, key=lambda x: x[0], reverse=True)
+    # Only bars with a full window on both sides qualify
+    high_idx = high_idx[(high_idx >= window) & (high_idx < len(df) - window)]
+    low_idx = low_idx[(low_idx >= window) & (low_idx < len(df) - window)]
     
-    # Get levels as a list of prices
-    resistance_levels = [price for _, price in pivot_highs]
-    support_levels = [price for _, price in pivot_lows]
+    # Get levels as a list of prices, most recent pivot points first
+    resistance_levels = list(high[high_idx[::-1]])
+    support_levels = list(low[low_idx[::-1]])
     
     return support_levels, resistance_levels
@@ -1,13 +1,127 @@
 import requests
+from requests.adapters import HTTPAdapter
 import time
+import random
+import atexit
 import threading
-import json
+from collections import OrderedDict
 from datetime import datetime
-from database import mark_signal_telegram_sent, check_pending_signals
+from database import mark_signal_telegram_sent, mark_signals_telegram_sent, check_pending_signals
 
 # Global variables
 telegram_token = None
 telegram_chat_id = None
+telegram_url = None
+telegram_payload = None
+
+# Connection pool size towards api.telegram.org (one host, several concurrent sends)
+TELEGRAM_POOL_MAXSIZE = 8
+
+# (connect, read) timeouts of a sendMessage request in seconds
+TELEGRAM_TIMEOUT = (3.05, 10)
+
+# Attempts per message on rate limits (429), server errors (5xx) and connection
+# errors, and the cap on one exponential backoff wait in seconds
+TELEGRAM_SEND_ATTEMPTS = 8
+TELEGRAM_BACKOFF_MAX = 60
+
+# Attempts for the connection test, which runs on the Streamlit thread
+TELEGRAM_TEST_ATTEMPTS = 2
+
+# Send rate bounds in messages per second; Telegram allows a bot about 30/s
+TELEGRAM_RATE_MIN = 0.2
+TELEGRAM_RATE_MAX = 30.0
+TELEGRAM_RATE_START = 1.0
+
+class _AdaptiveTokenBucket:
+    """
+    Token bucket whose refill rate grows while sends succeed and halves on
+    every 429, so backlogs go out as fast as Telegram accepts them without
+    spending requests on certain rejections
+    """
+    
+    def __init__(self, rate=TELEGRAM_RATE_START, min_rate=TELEGRAM_RATE_MIN, max_rate=TELEGRAM_RATE_MAX):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """
+        Block until a send is allowed and take its token
+        """
+        while True:
+            with self.lock:
+                # Refill for the time since the last call; one token at most,
+                # so sends are paced rather than burst
+                now = time.monotonic()
+                self.tokens = min(1.0, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                
+                wait = (1.0 - self.tokens) / self.rate
+            
+            time.sleep(wait)
+    
+    def succeeded(self):
+        """
+        Additive increase after a delivered message
+        """
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + 0.5)
+    
+    def throttled(self):
+        """
+        Multiplicative decrease after a 429; pending tokens are dropped
+        """
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate * 0.5)
+            self.tokens = 0.0
+            self.updated = time.monotonic()
+
+# Paces every sendMessage request of the process
+_send_limiter = _AdaptiveTokenBucket()
+
+# A signal whose notification key was delivered this recently (seconds) is
+# not announced again; at most this many keys are remembered
+NOTIFICATION_DEDUP_TTL = 3600
+NOTIFICATION_DEDUP_SIZE = 1024
+
+# Notification key -> time it was delivered, oldest first
+_RECENT_NOTIFICATIONS = OrderedDict()
+_RECENT_NOTIFICATIONS_LOCK = threading.Lock()
+
+# Shared HTTP session so consecutive sends reuse the TCP/TLS connection
+http_session = requests.Session()
+http_session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=TELEGRAM_POOL_MAXSIZE, max_retries=0))
+
+# Telegram rejects messages longer than this many characters
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+
+SIGNAL_DISCLAIMER = "⚠️ *سلب مسئولیت:* این یک سیگنال خودکار است. همیشه تحقیقات خود را انجام دهید و مدیریت ریسک مناسب داشته باشید."
+
+# Layout of one signal in a Telegram message, filled in by format_signal_message
+SIGNAL_MESSAGE_TEMPLATE = "{emoji} *سیگنال جدید {signal_type_fa} برای {symbol}*\n\n" \
+                          "*استراتژی:* {strategy}\n" \
+                          "*زمان:* {timestamp}\n\n" \
+                          "*قیمت ورود:* {entry_price:.8f}\n" \
+                          "*حد ضرر:* {stop_loss:.8f}\n" \
+                          "*هدف اول:* {target1:.8f}\n" \
+                          "*هدف دوم:* {target2:.8f}\n\n" \
+                          "*نسبت ریسک/ریوارد ۱:* {risk_reward_ratio1:.2f}\n" \
+                          "*نسبت ریسک/ریوارد ۲:* {risk_reward_ratio2:.2f}\n" \
+                          "*اهرم پیشنهادی:* {leverage}x"
+_format_signal_message = SIGNAL_MESSAGE_TEMPLATE.format
+
+# Escapes the characters Telegram's (legacy) Markdown treats as markup, for
+# free-text fields outside an entity such as strategy names. Text inside an entity
+# (the bold header with the symbol) is literal and must not be escaped.
+_MARKDOWN_ESCAPE = str.maketrans({c: '\\' + c for c in '_*`['})
 
 def setup_telegram_bot(token, chat_id):
     """
@@ -17,13 +131,15 @@ def setup_telegram_bot(token, chat_id):
         token (str): Telegram bot token
         chat_id (str): Telegram chat ID to send messages to
     """
-    global telegram_token, telegram_chat_id
+    global telegram_token, telegram_chat_id, telegram_url, telegram_payload
     
     if not token or not chat_id:
         raise ValueError("Telegram token and chat ID are required")
     
     telegram_token = token
     telegram_chat_id = chat_id
+    telegram_url = f"https://api.telegram.org/bot{token}/sendMessage"
+    telegram_payload = {"chat_id": chat_id, "parse_mode": "Markdown"}
     
     # Test the connection
     test_telegram_connection()
@@ -44,50 +160,133 @@ def test_telegram_connection():
         message = "🔔 *سیستم سیگنال دهی ترید متصل شد*\n\n" \
                   "سیستم سیگنال دهی ترید راه‌اندازی شده و در حال پایش بازارها است."
         
-        send_telegram_message(message)
-        return True
+        return send_telegram_message(message, attempts=TELEGRAM_TEST_ATTEMPTS)
     
     except Exception as e:
         print(f"Error testing Telegram connection: {str(e)}")
         return False
 
-def send_telegram_message(message):
+def send_telegram_message(message, attempts=TELEGRAM_SEND_ATTEMPTS):
     """
     Send a message to Telegram
     
     Args:
         message (str): Message to send
+        attempts (int): Maximum number of requests before giving up
         
     Returns:
         bool: True if successful, False otherwise
     """
-    global telegram_token, telegram_chat_id
-    
-    if not telegram_token or not telegram_chat_id:
+    if not telegram_url or not telegram_payload:
         print("Telegram bot not initialized")
         return False
     
     try:
-        url = f"https://api.telegram.org/bot{telegram_token}/sendMessage"
+        payload = {**telegram_payload, "text": message}
         
-        data = {
-            "chat_id": telegram_chat_id,
-            "text": message,
-            "parse_mode": "Markdown"
-        }
-        
-        response = requests.post(url, data=data)
+        for attempt in range(attempts):
+            _send_limiter.acquire()
+            try:
+                response = http_session.post(telegram_url, json=payload, timeout=TELEGRAM_TIMEOUT)
+            except requests.ReadTimeout as e:
+                # The request reached Telegram and may have been delivered; a retry could duplicate it
+                print(f"Timed out waiting for Telegram's reply, not retrying: {str(e)}")
+                return False
+            except requests.ConnectionError as e:
+                # Includes ConnectTimeout: the request never reached Telegram, so it is safe to resend
+                print(f"Network error sending Telegram message, retrying: {str(e)}")
+                delay = _backoff_delay(attempt)
+            else:
+                if response.status_code == 200:
+                    _send_limiter.succeeded()
+                    return True
+                
+                if response.status_code == 429:
+                    # Telegram says how long to wait before the next request
+                    _send_limiter.throttled()
+                    delay = _retry_after(response) + random.uniform(0, 0.5)
+                elif response.status_code >= 500:
+                    delay = _backoff_delay(attempt)
+                else:
+                    # Other client errors (bad markdown, wrong chat) won't succeed on retry
+                    print(f"Failed to send Telegram message: {response.text}")
+                    return False
+            
+            if attempt + 1 < attempts:
+                time.sleep(delay)
         
-        if response.status_code == 200:
-            return True
-        else:
-            print(f"Failed to send Telegram message: {response.text}")
-            return False
+        print(f"Failed to send Telegram message after {attempts} attempts")
+        return False
     
     except Exception as e:
         print(f"Error sending Telegram message: {str(e)}")
         return False
 
+def _backoff_delay(attempt):
+    # Exponential backoff with random jitter, so retries from several sends don't line up
+    delay = min(TELEGRAM_BACKOFF_MAX, 0.5 * 2 ** attempt)
+    return delay + random.uniform(0, delay)
+
+def _retry_after(response):
+    # Seconds a 429 response asks us to wait (Telegram's parameters.retry_after)
+    try:
+        return float(response.json().get('parameters', {}).get('retry_after', 1))
+    except (ValueError, TypeError, AttributeError):
+        return 1.0
+
+# (second, formatted local time) of the last _now_str() call
+_NOW_STR_CACHE = (None, "")
+
+def _now_str():
+    # Current local time as 'YYYY-mm-dd HH:MM:SS', formatted at most once per second
+    global _NOW_STR_CACHE
+    
+    second = int(time.time())
+    cached_second, text = _NOW_STR_CACHE
+    if cached_second != second:
+        text = datetime.fromtimestamp(second).strftime('%Y-%m-%d %H:%M:%S')
+        _NOW_STR_CACHE = (second, text)
+    
+    return text
+
+def format_signal_message(signal, include_disclaimer=True):
+    """
+    Format a trading signal as a Telegram message
+    
+    Args:
+        signal (dict): Signal details
+        include_disclaimer (bool): Whether to append the risk disclaimer
+        
+    Returns:
+        str: Formatted message
+    """
+    signal_type = signal.get('signal_type', '')
+    is_long = signal_type == "LONG"
+    
+    # Only fall back to the current time when the signal has none
+    timestamp = signal['timestamp'] if 'timestamp' in signal else _now_str()
+    
+    # Create message
+    message = _format_signal_message(
+        emoji="🟢" if is_long else "🔴",
+        signal_type_fa="خرید" if is_long else "فروش",
+        symbol=signal.get('symbol', ''),
+        strategy=str(signal.get('strategy', '')).translate(_MARKDOWN_ESCAPE),
+        timestamp=timestamp,
+        entry_price=signal.get('entry_price', 0),
+        stop_loss=signal.get('stop_loss', 0),
+        target1=signal.get('target1', 0),
+        target2=signal.get('target2', 0),
+        risk_reward_ratio1=signal.get('risk_reward_ratio1', 0),
+        risk_reward_ratio2=signal.get('risk_reward_ratio2', 0),
+        leverage=signal.get('leverage', 1)
+    )
+    
+    if include_disclaimer:
+        message += "\n\n" + SIGNAL_DISCLAIMER
+    
+    return message
+
 def send_signal_notification(signal):
     """
     Send a trading signal notification via Telegram
@@ -98,38 +297,10 @@ def send_signal_notification(signal):
     Returns:
         bool: True if successful, False otherwise
     """
-    # Format signal for Telegram message
     signal_id = signal.get('id', '')
-    symbol = signal.get('symbol', '')
-    signal_type = signal.get('signal_type', '')
-    signal_type_fa = "خرید" if signal_type == "LONG" else "فروش"
-    strategy = signal.get('strategy', '')
-    entry_price = signal.get('entry_price', 0)
-    stop_loss = signal.get('stop_loss', 0)
-    target1 = signal.get('target1', 0)
-    target2 = signal.get('target2', 0)
-    risk_reward_ratio1 = signal.get('risk_reward_ratio1', 0)
-    risk_reward_ratio2 = signal.get('risk_reward_ratio2', 0)
-    leverage = signal.get('leverage', 1)
-    timestamp = signal.get('timestamp', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-    
-    # Create message
-    emoji = "🟢" if signal_type == "LONG" else "🔴"
-    
-    message = f"{emoji} *سیگنال جدید {signal_type_fa} برای {symbol}*\n\n" \
-              f"*استراتژی:* {strategy}\n" \
-              f"*زمان:* {timestamp}\n\n" \
-              f"*قیمت ورود:* {entry_price:.8f}\n" \
-              f"*حد ضرر:* {stop_loss:.8f}\n" \
-              f"*هدف اول:* {target1:.8f}\n" \
-              f"*هدف دوم:* {target2:.8f}\n\n" \
-              f"*نسبت ریسک/ریوارد ۱:* {risk_reward_ratio1:.2f}\n" \
-              f"*نسبت ریسک/ریوارد ۲:* {risk_reward_ratio2:.2f}\n" \
-              f"*اهرم پیشنهادی:* {leverage}x\n\n" \
-              "⚠️ *سلب مسئولیت:* این یک سیگنال خودکار است. همیشه تحقیقات خود را انجام دهید و مدیریت ریسک مناسب داشته باشید."
     
     # Send the message
-    success = send_telegram_message(message)
+    success = send_telegram_message(format_signal_message(signal))
     
     # Mark signal as sent in database if successful
     if success and signal_id:
@@ -140,6 +311,117 @@ def send_signal_notification(signal):
     
     return success
 
+def notification_key(signal):
+    """
+    Key of a signal's notification: the same setup for the same symbol at
+    the same price within one minute is only announced once
+    
+    Args:
+        signal (dict): Signal details
+        
+    Returns:
+        tuple: Hashable notification key
+    """
+    return (
+        signal.get('symbol'),
+        signal.get('signal_type'),
+        signal.get('strategy'),
+        round(float(signal.get('entry_price') or 0), 8),
+        str(signal.get('timestamp', ''))[:16]
+    )
+
+def _recently_notified(key, now):
+    # True if `key` was delivered within NOTIFICATION_DEDUP_TTL seconds
+    with _RECENT_NOTIFICATIONS_LOCK:
+        sent_at = _RECENT_NOTIFICATIONS.get(key)
+        return sent_at is not None and now - sent_at < NOTIFICATION_DEDUP_TTL
+
+def _remember_notifications(keys, now):
+    # Record delivered keys, evicting the oldest beyond NOTIFICATION_DEDUP_SIZE
+    with _RECENT_NOTIFICATIONS_LOCK:
+        for key in keys:
+            _RECENT_NOTIFICATIONS[key] = now
+            _RECENT_NOTIFICATIONS.move_to_end(key)
+        while len(_RECENT_NOTIFICATIONS) > NOTIFICATION_DEDUP_SIZE:
+            _RECENT_NOTIFICATIONS.popitem(last=False)
+
+def send_signal_notifications_batch(signals):
+    """
+    Send several trading signals in as few Telegram messages as possible
+    
+    Signals are concatenated into one message, split only where the
+    Telegram message length limit would be exceeded. Duplicates (same
+    notification_key) within the batch or of a recent delivery are not
+    sent again, but are marked as sent along with the original.
+    
+    Args:
+        signals (list): List of signal dictionaries
+        
+    Returns:
+        int: Number of signals sent
+    """
+    # Nothing can be delivered before setup_telegram_bot; skip formatting the messages
+    if not signals or telegram_payload is None:
+        return 0
+    
+    separator = "\n\n➖➖➖➖➖\n\n"
+    footer = "\n\n" + SIGNAL_DISCLAIMER
+    limit = TELEGRAM_MAX_MESSAGE_LENGTH - len(footer)
+    
+    # Drop repeats within this batch and signals already announced recently
+    now = time.time()
+    unique = []
+    duplicate_ids = {}
+    sent_ids = []
+    for signal in signals:
+        key = notification_key(signal)
+        if key in duplicate_ids:
+            duplicate_ids[key].append(signal.get('id'))
+        elif _recently_notified(key, now):
+            sent_ids.append(signal.get('id'))
+        else:
+            duplicate_ids[key] = []
+            unique.append(signal)
+    
+    # Group formatted signals into messages that fit the length limit
+    batches = []
+    current_text = ""
+    current_signals = []
+    for signal in unique:
+        text = format_signal_message(signal, include_disclaimer=False)
+        candidate = current_text + separator + text if current_text else text
+        if current_text and len(candidate) > limit:
+            batches.append((current_text, current_signals))
+            current_text = text
+            current_signals = [signal]
+        else:
+            current_text = candidate
+            current_signals.append(signal)
+    if current_text:
+        batches.append((current_text, current_signals))
+    
+    # Send each message, then mark every delivered signal (and its duplicates) as sent in one update
+    sent_count = 0
+    for text, batch_signals in batches:
+        if not send_telegram_message(text + footer):
+            continue
+        
+        sent_count += len(batch_signals)
+        keys = [notification_key(signal) for signal in batch_signals]
+        _remember_notifications(keys, time.time())
+        for signal, key in zip(batch_signals, keys):
+            sent_ids.append(signal.get('id'))
+            sent_ids.extend(duplicate_ids[key])
+    
+    sent_ids = [signal_id for signal_id in sent_ids if signal_id]
+    if sent_ids:
+        try:
+            mark_signals_telegram_sent(sent_ids)
+        except Exception as e:
+            print(f"Error marking signals as sent in database: {str(e)}")
+    
+    return sent_count
+
 def check_and_send_pending_signals():
     """
     Check for pending signals that haven't been sent to Telegram and send them
@@ -154,39 +436,36 @@ def check_and_send_pending_signals():
         if not pending_signals:
             return 0
         
-        # Send each pending signal
-        sent_count = 0
-        for signal in pending_signals:
-            # Convert to dictionary
-            signal_dict = {
-                'id': signal.signal_id,
-                'timestamp': signal.timestamp.strftime('%Y-%m-%d %H:%M:%S') if hasattr(signal.timestamp, 'strftime') else signal.timestamp,
-                'symbol': signal.symbol,
-                'signal_type': signal.signal_type,
-                'strategy': signal.strategy,
-                'entry_price': signal.entry_price,
-                'current_price': signal.current_price,
-                'stop_loss': signal.stop_loss,
-                'target1': signal.target1,
-                'target2': signal.target2,
-                'risk_reward_ratio1': signal.risk_reward_ratio1,
-                'risk_reward_ratio2': signal.risk_reward_ratio2,
-                'risk_percent': signal.risk_percent,
-                'leverage': signal.leverage
-            }
-            
-            # Send the signal
-            success = send_signal_notification(signal_dict)
+        # Rows already carry the signal fields; only the id key and the timestamp's display form differ
+        signal_dicts = []
+        for row in pending_signals:
+            signal = row._asdict()
+            signal['id'] = signal.pop('signal_id')
+            timestamp = signal['timestamp']
+            if hasattr(timestamp, 'strftime'):
+                signal['timestamp'] = timestamp.astimezone().strftime('%Y-%m-%d %H:%M:%S')
+            signal_dicts.append(signal)
             
-            if success:
-                sent_count += 1
-        
-        return sent_count
+        # Send them batched; the delivered ones are marked as sent in one update
+        return send_signal_notifications_batch(signal_dicts)
     
     except Exception as e:
         print(f"Error checking and sending pending signals: {str(e)}")
         return 0
 
+def shutdown_telegram():
+    """
+    Close the pooled connections to Telegram; registered to run at exit
+    
+    The session reconnects on demand, so sending afterwards still works.
+    """
+    try:
+        http_session.close()
+    except Exception as e:
+        print(f"Error closing Telegram session: {str(e)}")
+
+atexit.register(shutdown_telegram)
+
 def send_error_notification(error_message):
     """
     Send an error notification via Telegram
@@ -197,10 +476,14 @@ def send_error_notification(error_message):
     Returns:
         bool: True if successful, False otherwise
     """
+    # Don't build the message when there is no bot to send it to
+    if telegram_payload is None:
+        return False
+    
     message = f"❌ *هشدار خطا*\n\n" \
               f"سیستم سیگنال دهی ترید با خطا مواجه شد:\n" \
               f"`{error_message}`\n\n" \
-              f"زمان: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+              f"زمان: {_now_str()}"
     
     return send_telegram_message(message)
 
@@ -214,8 +497,12 @@ def send_status_update(status_message):
     Returns:
         bool: True if successful, False otherwise
     """
+    # Don't build the message when there is no bot to send it to
+    if telegram_payload is None:
+        return False
+    
     message = f"ℹ️ *بروزرسانی وضعیت*\n\n" \
               f"{status_message}\n\n" \
-              f"زمان: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+              f"زمان: {_now_str()}"
     
     return send_telegram_message(message)
@@ -1,9 +1,32 @@
 import os
+import copy
 import json
+import functools
+import time
+import atexit
+import threading
+import numpy as np
 from datetime import datetime
 from config import DEFAULT_SETTINGS
 from database import save_configuration, get_configuration
 
+# Buffered log lines are flushed after this many writes or seconds, whichever comes first
+LOG_FLUSH_EVERY = 10
+LOG_FLUSH_INTERVAL = 5
+
+# decimals -> "%.<decimals>f".__mod__, used by format_number
+_NUMBER_FORMATTERS = {}
+
+# Parsed config files: path -> (st_mtime_ns, config dict)
+_CONFIG_FILE_CACHE = {}
+
+# Text save_config last wrote to each config file
+_CONFIG_FILE_WRITTEN = {}
+
+# Open log files: path -> [file, writes since last flush, time.monotonic() of last flush]
+_LOG_FILES = {}
+_LOG_LOCK = threading.Lock()
+
 def load_config():
     """
     Load configuration from database or file, or return default settings
@@ -20,8 +43,7 @@ def load_config():
         # If not in database, try to load from file
         config_file = "config.json"
         if os.path.exists(config_file):
-            with open(config_file, "r") as f:
-                config = json.load(f)
+            config = _read_config_file(config_file)
             # Save to database for future use
             save_configuration(config, "default")
             return config
@@ -33,6 +55,18 @@ def load_config():
         print(f"Error loading configuration: {str(e)}")
         return DEFAULT_SETTINGS.copy()
 
+def _read_config_file(path):
+    # Parsed JSON config file, re-read only when the file's mtime changes;
+    # callers get their own copy
+    mtime = os.stat(path).st_mtime_ns
+    cached = _CONFIG_FILE_CACHE.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, "r") as f:
+            cached = (mtime, json.load(f))
+        _CONFIG_FILE_CACHE[path] = cached
+    
+    return copy.deepcopy(cached[1])
+
 def save_config(config):
     """
     Save configuration to database and file
@@ -47,10 +81,16 @@ def save_config(config):
         # Save to database
         save_configuration(config, "default")
         
-        # Also save to file as backup
+        # Also save to file as backup, unless it already holds exactly these settings
         config_file = "config.json"
-        with open(config_file, "w") as f:
-            json.dump(config, f, indent=4)
+        text = json.dumps(config, indent=4)
+        if _CONFIG_FILE_WRITTEN.get(config_file) != text or not os.path.exists(config_file):
+            # Write a temporary file and swap it in, so a crash never leaves a half-written config
+            tmp_file = config_file + ".tmp"
+            with open(tmp_file, "w") as f:
+                f.write(text)
+            os.replace(tmp_file, config_file)
+            _CONFIG_FILE_WRITTEN[config_file] = text
         return True
     
     except Exception as e:
@@ -68,8 +108,24 @@ def format_number(number, decimals=8):
     Returns:
         str: Formatted number
     """
-    format_string = f"{{:.{decimals}f}}"
-    return format_string.format(number)
+    # One bound %-formatter per precision, built on first use
+    formatter = _NUMBER_FORMATTERS.get(decimals)
+    if formatter is None:
+        formatter = _NUMBER_FORMATTERS.setdefault(decimals, f"%.{decimals}f".__mod__)
+    return formatter(number)
+
+def format_numbers(numbers, decimals=8):
+    """
+    Format many numbers at once with a specified number of decimal places
+    
+    Args:
+        numbers (array-like): Numbers to format
+        decimals (int): Number of decimal places
+        
+    Returns:
+        numpy.ndarray: Formatted numbers as strings, same shape as `numbers`
+    """
+    return np.char.mod(f"%.{decimals}f", np.asarray(numbers, dtype=np.float64))
 
 def calculate_position_size(account_balance, risk_percent, entry_price, stop_loss, leverage=1):
     """
@@ -96,10 +152,38 @@ def calculate_position_size(account_balance, risk_percent, entry_price, stop_los
     
     return position_size
 
+def calculate_position_sizes(account_balance, risk_percent, entry_prices, stop_losses, leverage=1):
+    """
+    Calculate position sizes for many trades at once, as calculate_position_size does for one
+    
+    Args:
+        account_balance (float): Account balance
+        risk_percent (float or array-like): Percentage of account to risk
+        entry_prices (array-like): Entry prices
+        stop_losses (array-like): Stop loss prices
+        leverage (float or array-like): Leverage multiplier
+        
+    Returns:
+        numpy.ndarray: Position sizes
+    """
+    entry_prices = np.asarray(entry_prices, dtype=np.float64)
+    stop_losses = np.asarray(stop_losses, dtype=np.float64)
+    
+    # Calculate risk amount and risk per unit
+    risk_amount = account_balance * (np.asarray(risk_percent, dtype=np.float64) / 100)
+    risk_per_unit = np.abs(entry_prices - stop_losses) / entry_prices
+    
+    # Calculate position sizes
+    return (risk_amount / risk_per_unit) * leverage
+
 def log_message(message, log_file="trading_signals.log"):
     """
     Log a message to a file
     
+    The file stays open and lines are buffered; they reach the disk every
+    LOG_FLUSH_EVERY lines, on the first write after LOG_FLUSH_INTERVAL
+    seconds, on flush_logs() and at exit.
+    
     Args:
         message (str): Message to log
         log_file (str): Log file path
@@ -108,11 +192,51 @@ def log_message(message, log_file="trading_signals.log"):
     log_entry = f"[{timestamp}] {message}\n"
     
     try:
-        with open(log_file, "a") as f:
+        with _LOG_LOCK:
+            # Keep the file open between calls; lines are buffered and flushed periodically
+            entry = _LOG_FILES.get(log_file)
+            if entry is None:
+                entry = [open(log_file, "a", buffering=8192), 0, time.monotonic()]
+                _LOG_FILES[log_file] = entry
+            
+            f = entry[0]
             f.write(log_entry)
+            entry[1] += 1
+            
+            now = time.monotonic()
+            if entry[1] >= LOG_FLUSH_EVERY or now - entry[2] >= LOG_FLUSH_INTERVAL:
+                f.flush()
+                entry[1] = 0
+                entry[2] = now
     except Exception as e:
         print(f"Error writing to log file: {str(e)}")
 
+def flush_logs(close=False):
+    """
+    Write out buffered log lines of every open log file
+    
+    Args:
+        close (bool): Also close the files (they are reopened on the next log_message)
+    """
+    with _LOG_LOCK:
+        for log_file, entry in list(_LOG_FILES.items()):
+            try:
+                entry[0].flush()
+                entry[1] = 0
+                entry[2] = time.monotonic()
+                if close:
+                    entry[0].close()
+                    del _LOG_FILES[log_file]
+            except Exception as e:
+                print(f"Error flushing log file {log_file}: {str(e)}")
+
+# Don't lose buffered lines when the process exits
+atexit.register(flush_logs, close=True)
+
+# Minutes per timeframe unit (a month is approximated as 30 days)
+TIMEFRAME_UNIT_MINUTES = {'m': 1, 'h': 60, 'd': 60 * 24, 'w': 60 * 24 * 7, 'M': 60 * 24 * 30}
+
+@functools.lru_cache(maxsize=64)
 def parse_timeframe(timeframe):
     """
     Parse a timeframe string into minutes
@@ -123,18 +247,40 @@ def parse_timeframe(timeframe):
     Returns:
         int: Timeframe in minutes
     """
-    unit = timeframe[-1]
-    value = int(timeframe[:-1])
-    
-    if unit == 'm':
-        return value
-    elif unit == 'h':
-        return value * 60
-    elif unit == 'd':
-        return value * 60 * 24
-    elif unit == 'w':
-        return value * 60 * 24 * 7
-    elif unit == 'M':
-        return value * 60 * 24 * 30  # Approximate
-    else:
-        return value  # Default to the value as is
+    # Unknown units default to the value as is
+    return int(timeframe[:-1]) * TIMEFRAME_UNIT_MINUTES.get(timeframe[-1], 1)
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter for fast "definitely not seen" checks
+    
+    Membership tests can return false positives but never false negatives,
+    so a hit must be confirmed against an exact set.
+    """
+    
+    def __init__(self, size_bytes=131072, items=()):
+        """
+        Args:
+            size_bytes (int): Size of the bit array in bytes (must be a power of two)
+            items (iterable): Hashable items to add initially
+        """
+        self.bits = bytearray(size_bytes)
+        self.mask = size_bytes * 8 - 1
+        
+        for item in items:
+            self.add(item)
+    
+    def _positions(self, item):
+        # Three bit positions taken from different slices of one 64-bit hash
+        h = hash(item)
+        return (h & self.mask, (h >> 21) & self.mask, (h >> 42) & self.mask)
+    
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+    
+    def __contains__(self, item):
+        for pos in self._positions(item):
+            if not self.bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True